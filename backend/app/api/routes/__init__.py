@@ -2,6 +2,8 @@ from .stt import router as stt_router
 from .tts import router as tts_router
 from .translation import router as translation_router
 from .voice_cloning import router as voice_cloning_router
+from .pipeline import router as pipeline_router
+from .jobs import router as jobs_router
 from . import streaming
 
-__all__ = ["stt_router", "tts_router", "translation_router", "voice_cloning_router", "streaming"]
\ No newline at end of file
+__all__ = ["stt_router", "tts_router", "translation_router", "voice_cloning_router", "pipeline_router", "jobs_router", "streaming"]
\ No newline at end of file
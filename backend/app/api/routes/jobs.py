@@ -0,0 +1,216 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Depends, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, AsyncIterator
+from loguru import logger
+import asyncio
+import json
+
+from ...services import get_job_queue, get_file_handler
+from ...database import get_database, AudioProcessingSession, JobStatus
+from ...database.user_models import User, UserRole
+from ...security.auth import get_current_active_user, get_user_from_token
+
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on idle event streams
+KEEPALIVE_INTERVAL = 15.0
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    job_type: str
+    status: str
+    priority: int
+    progress: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+
+def _can_access(job: Dict[str, Any], user: User) -> bool:
+    """Jobs are visible to the user who submitted them and to admins"""
+    return user.role == UserRole.ADMIN or job.get("user_id") == user.id
+
+
+async def _get_owned_job(job_id: str, user: User) -> Dict[str, Any]:
+    """Get a job, answering 404 for unknown jobs and jobs of other users alike"""
+    job = await get_job_queue().get(job_id)
+    if not job or not _can_access(job, user):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+async def _job_events(job_id: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the current job state, then every update until the job finishes"""
+    job_queue = get_job_queue()
+
+    # Subscribe before reading the state so no update is missed in between
+    queue = job_queue.subscribe(job_id)
+    try:
+        job = await job_queue.get(job_id)
+        if job is None:
+            return
+        yield job
+
+        while job["status"] not in JobStatus.TERMINAL:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield {}
+                continue
+            job = {**job, **event}
+            yield event
+    finally:
+        job_queue.unsubscribe(job_id, queue)
+
+
+@router.post("/transcribe", response_model=JobResponse, status_code=202)
+async def submit_transcription_job(
+    file: UploadFile = File(...),
+    language: Optional[str] = None,
+    task: str = "transcribe",
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Queue a transcription job and return immediately
+
+    Args:
+        file: Audio file (wav, mp3, ogg, m4a, flac) of any length
+        language: Source language (optional, auto-detect if None)
+        task: 'transcribe' or 'translate' to English
+    """
+    job_queue = get_job_queue()
+    file_handler = get_file_handler()
+    db = get_database()
+
+    try:
+        if task not in ["transcribe", "translate"]:
+            raise HTTPException(status_code=400, detail="Task must be 'transcribe' or 'translate'")
+
+        file_info = await file_handler.save_upload_file(file, subfolder="jobs")
+
+        session = AudioProcessingSession(
+            original_filename=file_info["original_filename"],
+            file_path=file_info["file_path"],
+            file_size=file_info["file_size"]
+        )
+        session_id = db.create_audio_session(session)
+
+        job = await job_queue.submit(
+            "transcribe",
+            {
+                "session_id": session_id,
+                "file_path": file_info["file_path"],
+                "file_hash": file_info["file_hash"],
+                "language": language,
+                "task": task
+            },
+            user_id=current_user.id
+        )
+
+        logger.info(f"Transcription job {job['job_id']} queued for session {session_id}")
+        return JobResponse(**job)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to queue transcription job: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Get job status, progress and result"""
+    try:
+        job = await _get_owned_job(job_id, current_user)
+        return JobResponse(**job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve job")
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Cancel a job that has not started yet"""
+    job_queue = get_job_queue()
+
+    try:
+        job = await _get_owned_job(job_id, current_user)
+
+        if not await job_queue.cancel(job_id):
+            raise HTTPException(status_code=409, detail=f"Job is {job['status']} and cannot be cancelled")
+
+        return {"message": "Job cancelled", "job_id": job_id}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to cancel job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to cancel job")
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Server-sent events with job progress until the job finishes"""
+    await _get_owned_job(job_id, current_user)
+
+    async def event_stream():
+        async for event in _job_events(job_id):
+            if not event:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws/{job_id}")
+async def job_websocket(websocket: WebSocket, job_id: str, token: Optional[str] = None):
+    """
+    WebSocket with job progress until the job finishes
+
+    Browsers cannot set headers on WebSocket requests, so the access token
+    is passed as the token query parameter.
+    """
+    user = get_user_from_token(token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    try:
+        job = await get_job_queue().get(job_id)
+        if not job or not _can_access(job, user):
+            await websocket.send_json({"type": "error", "message": "Job not found"})
+            await websocket.close()
+            return
+
+        sent = False
+        async for event in _job_events(job_id):
+            if event:
+                await websocket.send_json(event)
+                sent = True
+
+        if not sent:
+            await websocket.send_json({"type": "error", "message": "Job not found"})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info(f"Job subscriber disconnected from {job_id}")
+    except Exception as e:
+        logger.error(f"Job WebSocket error for {job_id}: {e}")
@@ -0,0 +1,179 @@
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Optional, Dict, Any, List
+from loguru import logger
+import base64
+import io
+import json
+import numpy as np
+import soundfile as sf
+
+from ...services import (
+    get_speech_translation_pipeline, get_file_handler, get_translation_service
+)
+
+
+router = APIRouter()
+
+
+class SpeechTranslationResponse(BaseModel):
+    session_id: str
+    transcription: str
+    translation: str
+    source_language: str
+    target_language: str
+    segments: List[Dict[str, Any]]
+    audio_filename: str
+    audio_duration_seconds: float
+    timings: Dict[str, float]
+
+
+async def _load_pipeline_input(
+    file: UploadFile,
+    source_language: Optional[str],
+    target_language: str,
+    model_type: str
+) -> np.ndarray:
+    """Validate a pipeline request and decode the upload straight into memory"""
+    file_handler = get_file_handler()
+    translation_service = get_translation_service()
+
+    if not file_handler.is_allowed_file(file.filename):
+        raise HTTPException(
+            status_code=400,
+            detail=f"File type not allowed. Allowed: {', '.join(file_handler.allowed_extensions)}"
+        )
+
+    if file.size and file.size > file_handler.max_file_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Max size: {file_handler.max_file_size / (1024*1024):.1f} MB"
+        )
+
+    if model_type not in ["nllb", "m2m", "aya"]:
+        raise HTTPException(status_code=400, detail="Invalid model type")
+
+    try:
+        translation_service.languages.validate_pair(
+            model_type, source_language or "en", target_language
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Decode from the spooled upload without an intermediate file
+    pipeline = get_speech_translation_pipeline()
+    return await run_in_threadpool(pipeline.stt_service.preprocess_audio, file.file)
+
+
+def _serialize_event(event: Dict[str, Any], include_audio: bool) -> str:
+    """Encode a pipeline event as one NDJSON line, with audio as base64 WAV"""
+    event = dict(event)
+    audio = event.pop("audio", None)
+
+    if audio is not None and include_audio:
+        buffer = io.BytesIO()
+        sf.write(buffer, audio, event["sample_rate"], format="WAV", subtype="PCM_16")
+        event["audio_base64"] = base64.b64encode(buffer.getvalue()).decode("ascii")
+
+    return json.dumps(event) + "\n"
+
+
+@router.post("/speech-to-speech", response_model=SpeechTranslationResponse)
+async def speech_to_speech(
+    target_language: str,
+    file: UploadFile = File(...),
+    source_language: Optional[str] = None,
+    model_type: str = "nllb",
+    voice_style: str = "neutral",
+    emotion: str = "neutral"
+):
+    """
+    Transcribe, translate and re-synthesize speech in a single request
+
+    Args:
+        target_language: Language to translate and speak in
+        file: Audio file (wav, mp3, ogg, m4a, flac)
+        source_language: Spoken language (optional, auto-detect if None)
+        model_type: Translation model to use
+        voice_style: Voice style for the synthesized speech
+        emotion: Emotion for the synthesized speech
+    """
+    pipeline = get_speech_translation_pipeline()
+
+    try:
+        audio_array = await _load_pipeline_input(file, source_language, target_language, model_type)
+
+        result = await run_in_threadpool(
+            pipeline.run,
+            audio_array,
+            target_language,
+            source_language=source_language,
+            model_type=model_type,
+            voice_style=voice_style,
+            emotion=emotion,
+            original_filename=file.filename,
+            file_size=file.size or 0
+        )
+
+        return SpeechTranslationResponse(**{
+            key: result[key] for key in SpeechTranslationResponse.model_fields
+        })
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Speech translation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Speech translation failed: {str(e)}")
+
+
+@router.post("/speech-to-speech/stream")
+async def speech_to_speech_stream(
+    target_language: str,
+    file: UploadFile = File(...),
+    source_language: Optional[str] = None,
+    model_type: str = "nllb",
+    voice_style: str = "neutral",
+    emotion: str = "neutral",
+    include_audio: bool = True
+):
+    """
+    Speech-to-speech translation streamed as newline-delimited JSON
+
+    Emits a 'transcription' event, then one 'segment' event per sentence
+    (with base64 WAV audio unless include_audio is false), then 'complete'.
+    """
+    pipeline = get_speech_translation_pipeline()
+
+    try:
+        audio_array = await _load_pipeline_input(file, source_language, target_language, model_type)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to decode pipeline input: {e}")
+        raise HTTPException(status_code=400, detail="Could not decode audio file")
+
+    filename = file.filename
+    file_size = file.size or 0
+
+    def event_stream():
+        try:
+            for event in pipeline.iter_events(
+                audio_array,
+                target_language,
+                source_language=source_language,
+                model_type=model_type,
+                voice_style=voice_style,
+                emotion=emotion,
+                original_filename=filename,
+                file_size=file_size
+            ):
+                yield _serialize_event(event, include_audio)
+        except Exception as e:
+            logger.error(f"Streaming speech translation failed: {e}")
+            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
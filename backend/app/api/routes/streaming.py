@@ -2,13 +2,15 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.responses import StreamingResponse
 import json
 import asyncio
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, Optional, Set
 from loguru import logger
 import io
 import wave
 import numpy as np
 
-from ...services import get_stt_service
+from ...services import get_stt_service, get_translation_service, get_tts_service
+from ...services.translation import split_sentences
 from ...core.config import settings
 
 
@@ -35,10 +37,110 @@ class ConnectionManager:
         if client_id in self.active_connections:
             websocket = self.active_connections[client_id]
             await websocket.send_text(json.dumps(message))
+    
+    async def send_bytes(self, client_id: str, data: bytes):
+        if client_id in self.active_connections:
+            websocket = self.active_connections[client_id]
+            await websocket.send_bytes(data)
 
 
 manager = ConnectionManager()
 
+# 1 second of 16kHz 16-bit mono PCM
+CHUNK_SIZE = 16000 * 2
+CHUNK_SECONDS = CHUNK_SIZE / (16000 * 2)
+
+
+async def _receive_audio_chunks(websocket: WebSocket, chunk_size: int = CHUNK_SIZE):
+    """Buffer incoming PCM bytes and yield fixed-size float32 chunks"""
+    audio_buffer = bytearray()
+    
+    while True:
+        # Receive audio data
+        data = await websocket.receive_bytes()
+        audio_buffer.extend(data)
+        
+        # Process audio in chunks for real-time transcription
+        while len(audio_buffer) >= chunk_size:
+            chunk = bytes(audio_buffer[:chunk_size])
+            del audio_buffer[:chunk_size]
+            
+            # Convert audio bytes to numpy array
+            yield np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class TranslationBatcher:
+    """
+    Collect transcript segments from all live connections and translate
+    them together, so concurrent speakers share model batches.
+    """
+    
+    def __init__(self, max_batch_size: int = 16, max_delay: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def translate(
+        self,
+        text: str,
+        source_language: str,
+        target_language: str,
+        model_type: str = "nllb"
+    ) -> Dict[str, Any]:
+        """Queue a segment for the next batch and wait for its translation"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((source_language, target_language, model_type), text, future))
+        return await future
+    
+    async def _run(self):
+        """Drain the queue into batches grouped by language pair and model"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            items = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(items) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            groups: Dict[tuple, list] = {}
+            for key, text, future in items:
+                groups.setdefault(key, []).append((text, future))
+            
+            for (source_language, target_language, model_type), group in groups.items():
+                try:
+                    results = await loop.run_in_executor(
+                        None,
+                        get_translation_service().translate_texts,
+                        [text for text, _ in group],
+                        source_language,
+                        target_language,
+                        model_type
+                    )
+                    for (_, future), result in zip(group, results):
+                        if not future.done():
+                            future.set_result(result)
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+
+
+translation_batcher = TranslationBatcher(
+    max_batch_size=settings.STREAM_TRANSLATION_BATCH_SIZE,
+    max_delay=settings.STREAM_TRANSLATION_MAX_DELAY_MS / 1000
+)
+
 
 @router.websocket("/ws/transcribe/{client_id}")
 async def websocket_transcribe(websocket: WebSocket, client_id: str):
@@ -55,53 +157,196 @@ async def websocket_transcribe(websocket: WebSocket, client_id: str):
     if stt_service.processor is None or stt_service.model is None:
         stt_service.load_model()
     
-    audio_buffer = bytearray()
-    chunk_size = 16000 * 2  # 1 second of 16kHz 16-bit audio
+    try:
+        async for audio_array in _receive_audio_chunks(websocket):
+            try:
+                # Transcribe chunk
+                result = await asyncio.get_event_loop().run_in_executor(
+                    None, 
+                    _transcribe_chunk, 
+                    stt_service, 
+                    audio_array
+                )
+                
+                # Send result back to client
+                await manager.send_message(client_id, {
+                    "type": "transcription",
+                    "text": result.get("transcription", ""),
+                    "is_final": False,
+                    "confidence": result.get("confidence", 1.0),
+                    "timestamp": result.get("timestamp", None)
+                })
+                
+            except Exception as e:
+                logger.error(f"Transcription error: {e}")
+                await manager.send_message(client_id, {
+                    "type": "error",
+                    "message": f"Transcription failed: {str(e)}"
+                })
+    
+    except WebSocketDisconnect:
+        manager.disconnect(client_id)
+    except Exception as e:
+        logger.error(f"WebSocket error: {e}")
+        manager.disconnect(client_id)
+
+
+@router.websocket("/ws/translate/{client_id}")
+async def websocket_translate(
+    websocket: WebSocket,
+    client_id: str,
+    target_language: str,
+    source_language: str = "en",
+    model_type: str = "nllb",
+    synthesize: bool = False
+):
+    """
+    Real-time speech translation via WebSocket
+    
+    Expected audio format: 16kHz, 16-bit, mono PCM
+    Sends 'transcription' messages as chunks are transcribed and
+    'translation' messages once a segment stabilizes (a full sentence, or
+    STREAM_TRANSLATION_MAX_PENDING_SECONDS of audio without one). With
+    synthesize=true each translation is followed by an 'audio' message and
+    binary 16-bit PCM frames at the TTS sample rate.
+    """
+    await manager.connect(websocket, client_id)
+    stt_service = get_stt_service()
+    
+    # Ensure model is loaded
+    if stt_service.processor is None or stt_service.model is None:
+        stt_service.load_model()
+    
+    pending_text = ""
+    pending_chunks = 0
+    segment_index = 0
+    tasks: Set[asyncio.Task] = set()
+    send_lock = asyncio.Lock()
+    
+    def flush(text: str):
+        nonlocal segment_index
+        task = asyncio.create_task(_translate_segment(
+            client_id, segment_index, text, source_language,
+            target_language, model_type, synthesize, send_lock
+        ))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        segment_index += 1
     
     try:
-        while True:
-            # Receive audio data
-            data = await websocket.receive_bytes()
-            audio_buffer.extend(data)
+        async for audio_array in _receive_audio_chunks(websocket):
+            try:
+                result = await asyncio.get_event_loop().run_in_executor(
+                    None, 
+                    _transcribe_chunk, 
+                    stt_service, 
+                    audio_array
+                )
+            except Exception as e:
+                logger.error(f"Transcription error: {e}")
+                await manager.send_message(client_id, {
+                    "type": "error",
+                    "message": f"Transcription failed: {str(e)}"
+                })
+                continue
             
-            # Process audio in chunks for real-time transcription
-            if len(audio_buffer) >= chunk_size:
-                chunk = bytes(audio_buffer[:chunk_size])
-                audio_buffer = audio_buffer[chunk_size:]
-                
-                try:
-                    # Convert audio bytes to numpy array
-                    audio_array = np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
-                    
-                    # Transcribe chunk
-                    result = await asyncio.get_event_loop().run_in_executor(
-                        None, 
-                        _transcribe_chunk, 
-                        stt_service, 
-                        audio_array
-                    )
-                    
-                    # Send result back to client
-                    await manager.send_message(client_id, {
-                        "type": "transcription",
-                        "text": result.get("transcription", ""),
-                        "is_final": False,
-                        "confidence": result.get("confidence", 1.0),
-                        "timestamp": result.get("timestamp", None)
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Transcription error: {e}")
-                    await manager.send_message(client_id, {
-                        "type": "error",
-                        "message": f"Transcription failed: {str(e)}"
-                    })
+            text = result.get("transcription", "")
+            async with send_lock:
+                await manager.send_message(client_id, {
+                    "type": "transcription",
+                    "text": text,
+                    "is_final": False,
+                    "confidence": result.get("confidence", 1.0),
+                    "timestamp": result.get("timestamp", None)
+                })
+            
+            # Translation runs as a task so transcription never waits on it
+            pending_text = f"{pending_text} {text}".strip()
+            pending_chunks += 1
+            sentences = split_sentences(pending_text)
+            if not sentences:
+                continue
+            
+            if pending_chunks * CHUNK_SECONDS >= settings.STREAM_TRANSLATION_MAX_PENDING_SECONDS:
+                complete, pending_text = sentences, ""
+            elif pending_text[-1] in ".!?\u3002\uff01\uff1f":
+                complete, pending_text = sentences, ""
+            else:
+                complete, pending_text = sentences[:-1], sentences[-1]
+            
+            if complete:
+                flush(" ".join(complete))
+                pending_chunks = 0 if not pending_text else 1
     
     except WebSocketDisconnect:
         manager.disconnect(client_id)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(client_id)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _translate_segment(
+    client_id: str,
+    index: int,
+    text: str,
+    source_language: str,
+    target_language: str,
+    model_type: str,
+    synthesize: bool,
+    send_lock: asyncio.Lock
+):
+    """Translate one stabilized segment and optionally stream its speech"""
+    try:
+        result = await translation_batcher.translate(
+            text, source_language, target_language, model_type
+        )
+        
+        async with send_lock:
+            await manager.send_message(client_id, {
+                "type": "translation",
+                "segment": index,
+                "source_text": text,
+                "text": result["translated_text"],
+                "source_language": result["source_language"],
+                "target_language": result["target_language"]
+            })
+        
+        if not synthesize or not result["translated_text"]:
+            return
+        
+        tts_service = get_tts_service()
+        audio = await asyncio.get_event_loop().run_in_executor(
+            None,
+            partial(tts_service.synthesize_array, result["translated_text"], language=result["target_language"])
+        )
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        frame_size = tts_service.sample_rate  # 0.5 seconds of 16-bit samples
+        
+        # Header and frames are sent under one lock so segments never interleave
+        async with send_lock:
+            await manager.send_message(client_id, {
+                "type": "audio",
+                "segment": index,
+                "sample_rate": tts_service.sample_rate,
+                "format": "pcm_s16le",
+                "frames": (len(pcm) + frame_size - 1) // frame_size
+            })
+            for offset in range(0, len(pcm), frame_size):
+                await manager.send_bytes(client_id, pcm[offset:offset + frame_size])
+    
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.error(f"Segment translation failed: {e}")
+        async with send_lock:
+            await manager.send_message(client_id, {
+                "type": "error",
+                "segment": index,
+                "message": f"Translation failed: {str(e)}"
+            })
 
 
 def _transcribe_chunk(stt_service, audio_array: np.ndarray) -> Dict[str, Any]:
@@ -173,6 +418,7 @@ async def test_streaming():
             "streaming_ready": True,
             "model_loaded": True,
             "websocket_endpoint": "/api/v1/stream/ws/transcribe/{client_id}",
+            "translation_websocket_endpoint": "/api/v1/stream/ws/translate/{client_id}",
             "test_status": "OK"
         }
     except Exception as e:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from loguru import logger
 
 from ...services import get_stt_service, get_file_handler
@@ -27,6 +27,16 @@ class TimestampedTranscriptionResponse(BaseModel):
     session_id: str
 
 
+class SimilarRecording(BaseModel):
+    content_hash: str
+    distance: float
+    metadata: Dict[str, Any]
+
+
+class SimilarRecordingsResponse(BaseModel):
+    recordings: List[SimilarRecording]
+
+
 @router.post("/transcribe", response_model=TranscriptionResponse)
 async def transcribe_audio(
     background_tasks: BackgroundTasks,
@@ -62,7 +72,8 @@ async def transcribe_audio(
         transcription_result = stt_service.transcribe_audio(
             audio_path=file_info["file_path"],
             language=language,
-            task=task
+            task=task,
+            content_hash=file_info["file_hash"]
         )
         
         # Update session with results
@@ -122,7 +133,8 @@ async def transcribe_with_timestamps(
         # Transcribe with timestamps
         result = stt_service.transcribe_with_timestamps(
             audio_path=file_info["file_path"],
-            language=language
+            language=language,
+            content_hash=file_info["file_hash"]
         )
         
         # Update session
@@ -164,7 +176,10 @@ async def detect_language(file: UploadFile = File(...)):
         file_info = await file_handler.save_upload_file(file, subfolder="temp")
         
         # Detect language
-        detected_language = stt_service.detect_language(file_info["file_path"])
+        detected_language = stt_service.detect_language(
+            file_info["file_path"],
+            content_hash=file_info["file_hash"]
+        )
         
         # Clean up
         file_handler.delete_file(file_info["filename"], "temp")
@@ -176,6 +191,54 @@ async def detect_language(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Language detection failed: {str(e)}")
 
 
+@router.post("/similar-recordings", response_model=SimilarRecordingsResponse)
+async def find_similar_recordings(
+    file: UploadFile = File(...),
+    limit: int = 10
+):
+    """
+    Find transcribed recordings that sound like an audio file
+    
+    Compares pooled Whisper encoder states, stored for each recording when
+    AUDIO_FEATURE_INDEX is enabled. Results are identified by the SHA-256 of
+    the recording.
+    
+    Args:
+        file: Audio file to compare against the index
+        limit: Number of recordings to return (max 100)
+    """
+    stt_service = get_stt_service()
+    file_handler = get_file_handler()
+    
+    try:
+        if limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+        limit = min(limit, 100)
+        
+        file_info = await file_handler.save_upload_file(file, subfolder="temp")
+        try:
+            results = stt_service.find_similar_recordings(
+                file_info["file_path"],
+                content_hash=file_info["file_hash"],
+                n_results=limit
+            )
+        finally:
+            file_handler.delete_file(file_info["filename"], "temp")
+        
+        return SimilarRecordingsResponse(recordings=[
+            SimilarRecording(content_hash=content_hash, distance=distance, metadata=metadata)
+            for content_hash, distance, metadata in zip(results["ids"], results["distances"], results["metadatas"])
+        ])
+        
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Similar recording search failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Similar recording search failed: {str(e)}")
+
+
 @router.get("/session/{session_id}")
 async def get_transcription_session(session_id: str):
     """Get transcription session details"""
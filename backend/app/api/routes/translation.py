@@ -5,6 +5,7 @@ from loguru import logger
 
 from ...services import get_translation_service
 from ...database import get_database, AudioProcessingSession
+from ...core.config import settings
 
 
 router = APIRouter()
@@ -63,10 +64,22 @@ async def translate_text(request: TranslationRequest):
         if len(request.text) > 10000:
             raise HTTPException(status_code=400, detail="Text too long (max 10000 characters)")
         
+        # Admission control on estimated cost; moderately long inputs are split by the service
+        if translation_service.estimate_tokens(request.text) > settings.TRANSLATION_MAX_REQUEST_TOKENS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Text too long (max ~{settings.TRANSLATION_MAX_REQUEST_TOKENS} tokens)"
+            )
+        
         # Validate model type
         if request.model_type not in ["nllb", "m2m", "aya"]:
             raise HTTPException(status_code=400, detail="Invalid model type")
         
+        # Reject unsupported language pairs before recording a session
+        translation_service.languages.validate_pair(
+            request.model_type, request.source_language, request.target_language
+        )
+        
         # Create session (optional for translation)
         session = AudioProcessingSession(
             original_filename="translation_request.txt",
@@ -103,6 +116,8 @@ async def translate_text(request: TranslationRequest):
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Translation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
@@ -112,31 +127,73 @@ async def translate_text(request: TranslationRequest):
 async def translate_batch(request: BatchTranslationRequest):
     """
     Translate multiple texts in batch
+    
+    Texts are grouped into model batches by estimated token count, so
+    similar-length inputs are padded and decoded together.
     """
     if len(request.texts) > 20:
         raise HTTPException(status_code=400, detail="Maximum 20 texts per batch")
     
     translation_service = get_translation_service()
     results = []
+    accepted = []
+    
+    for i, text in enumerate(request.texts):
+        if not text.strip():
+            results.append({
+                "index": i,
+                "status": "error",
+                "error": "Empty text"
+            })
+        elif translation_service.estimate_tokens(text) > settings.TRANSLATION_MAX_REQUEST_TOKENS:
+            results.append({
+                "index": i,
+                "status": "error",
+                "error": f"Text too long (max ~{settings.TRANSLATION_MAX_REQUEST_TOKENS} tokens)"
+            })
+        else:
+            accepted.append((i, text))
     
     try:
-        for i, text in enumerate(request.texts):
+        # An unsupported language pair fails every text alike
+        translation_service.languages.validate_pair(
+            request.model_type, request.source_language, request.target_language
+        )
+        
+        translations = []
+        if accepted:
             try:
-                if not text.strip():
-                    results.append({
-                        "index": i,
-                        "status": "error",
-                        "error": "Empty text"
-                    })
-                    continue
-                
-                result = translation_service.translate_text(
-                    text=text,
+                translations = translation_service.translate_texts(
+                    texts=[text for _, text in accepted],
                     source_language=request.source_language,
                     target_language=request.target_language,
                     model_type=request.model_type
                 )
-                
+            except ValueError:
+                raise
+            except Exception as e:
+                # One bad input fails the whole batch; retry one by one to isolate it
+                logger.warning(f"Batched translation failed, translating texts individually: {e}")
+                translations = []
+                for _, text in accepted:
+                    try:
+                        translations.append(translation_service.translate_text(
+                            text=text,
+                            source_language=request.source_language,
+                            target_language=request.target_language,
+                            model_type=request.model_type
+                        ))
+                    except Exception as item_error:
+                        translations.append(item_error)
+        
+        for (i, _), result in zip(accepted, translations):
+            if isinstance(result, Exception):
+                results.append({
+                    "index": i,
+                    "status": "error",
+                    "error": str(result)
+                })
+            else:
                 results.append({
                     "index": i,
                     "status": "success",
@@ -145,16 +202,12 @@ async def translate_batch(request: BatchTranslationRequest):
                         "original_text": result["original_text"]
                     }
                 })
-                
-            except Exception as e:
-                results.append({
-                    "index": i,
-                    "status": "error",
-                    "error": str(e)
-                })
         
+        results.sort(key=lambda item: item["index"])
         return {"batch_results": results}
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Batch translation failed: {e}")
         raise HTTPException(status_code=500, detail="Batch translation failed")
@@ -258,6 +311,8 @@ async def translate_with_context(
             "model": result["model"]
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Context-aware translation failed: {e}")
         raise HTTPException(status_code=500, detail=f"Translation failed: {str(e)}")
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, HTTPException, Response
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Response, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Iterator, BinaryIO
+from email.utils import formatdate
 from loguru import logger
 
-from ...services import get_tts_service
+from ...services import get_tts_service, get_file_handler
 from ...database import get_database, AudioProcessingSession
 
 
 router = APIRouter()
 
+# Block size for streamed audio responses (matches the encryption chunk size)
+AUDIO_STREAM_BLOCK_SIZE = 64 * 1024
+
 
 class SynthesisRequest(BaseModel):
     text: str
@@ -113,43 +118,121 @@ async def synthesize_speech(request: SynthesisRequest):
         raise HTTPException(status_code=500, detail=f"Speech synthesis failed: {str(e)}")
 
 
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range 'bytes=' header into an inclusive (start, end)
+    
+    Returns None for headers that should be ignored (malformed, other
+    units or multiple ranges), in which case the full file is served.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in ranges:
+        return None
+    
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            # Suffix range: the final N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    
+    if end < start:
+        return None
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, min(end, size - 1)
+
+
+def _iter_file(file: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    """Stream length bytes from start in fixed-size blocks, then close the file"""
+    try:
+        file.seek(start)
+        remaining = length
+        while remaining > 0:
+            block = file.read(min(AUDIO_STREAM_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+    finally:
+        file.close()
+
+
 @router.get("/audio/{filename}")
-async def get_audio_file(filename: str):
+async def get_audio_file(filename: str, request: Request):
     """
     Serve synthesized audio file
+    
+    Supports single byte-range requests (206), conditional GET with ETags
+    (304) and streams the body, decrypting only the requested chunks of
+    encrypted files.
     """
+    file_handler = get_file_handler()
+    
     try:
-        from ...services import get_file_handler
-        file_handler = get_file_handler()
+        file_info = await run_in_threadpool(file_handler.get_output_file_info, filename)
+        if file_info is None:
+            raise HTTPException(status_code=404, detail="Audio file not found")
         
-        # Get audio file path
-        audio_path = file_handler.audio_output_folder / filename
+        size = file_info["size"]
+        etag = f'"{size:x}-{int(file_info["modified_time"] * 1_000_000):x}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": formatdate(file_info["modified_time"], usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "private, max-age=3600",
+            "Content-Disposition": f"attachment; filename={filename}"
+        }
         
-        # Check if encrypted version exists
-        encrypted_path = audio_path.with_suffix(audio_path.suffix + '.encrypted')
+        # Conditional GET: the client already has this version
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (
+            if_none_match.strip() == "*"
+            or etag in [tag.strip() for tag in if_none_match.split(",")]
+        ):
+            return Response(status_code=304, headers=headers)
         
-        if encrypted_path.exists():
-            # Decrypt and serve
-            content = file_handler.get_file_content(filename.replace('.encrypted', ''))
-            if content is None:
-                raise HTTPException(status_code=404, detail="Audio file not found")
-            
-            return Response(
-                content=content,
-                media_type="audio/wav",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-        
-        elif audio_path.exists():
-            # Serve unencrypted file
-            return FileResponse(
-                path=str(audio_path),
-                media_type="audio/wav",
-                filename=filename
-            )
+        # Honour Range only if the client's copy (If-Range) is still current
+        byte_range = None
+        range_header = request.headers.get("range")
+        if range_header and request.headers.get("if-range", etag) == etag:
+            byte_range = _parse_range(range_header, size)
         
+        if byte_range is None:
+            if not file_info["encrypted"]:
+                return FileResponse(
+                    path=file_info["file_path"],
+                    media_type="audio/wav",
+                    headers=headers
+                )
+            start, end = 0, size - 1
+            status_code = 200
         else:
-            raise HTTPException(status_code=404, detail="Audio file not found")
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        
+        length = max(end - start + 1, 0)
+        headers["Content-Length"] = str(length)
+        file = await run_in_threadpool(file_handler.open_output_file, file_info)
+        
+        return StreamingResponse(
+            _iter_file(file, start, length),
+            status_code=status_code,
+            media_type="audio/wav",
+            headers=headers
+        )
             
     except HTTPException:
         raise
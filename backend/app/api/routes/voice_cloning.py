@@ -1,9 +1,12 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
+from pathlib import Path
+import uuid
 from loguru import logger
 
-from ...services import get_voice_cloning_service, get_file_handler
+from ...core.config import settings
+from ...services import get_voice_cloning_service, get_file_handler, get_job_queue
 from ...database import get_database
 from ...database.user_models import User
 from ...security.auth import get_current_active_user, require_admin_or_moderator
@@ -12,6 +15,13 @@ from ...security.auth import get_current_active_user, require_admin_or_moderator
 router = APIRouter()
 
 
+def _parse_tags(tags: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated tag list from a query parameter"""
+    if not tags:
+        return None
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
 class VoiceCloneRequest(BaseModel):
     name: str
     user_id: Optional[str] = None
@@ -26,6 +36,19 @@ class VoiceCloneResponse(BaseModel):
     sample_path: str
 
 
+class VoiceCloneJobResponse(BaseModel):
+    job_id: str
+    clone_id: str
+    name: str
+    status: str
+    progress: float
+
+
+class BulkVoiceCloneResponse(BaseModel):
+    created: List[VoiceCloneResponse]
+    failed: List[Dict[str, Any]]
+
+
 class VoiceSynthesisRequest(BaseModel):
     text: str
     clone_id: str
@@ -45,22 +68,28 @@ class SimilarVoicesResponse(BaseModel):
     similar_voices: List[Dict[str, Any]]
 
 
-@router.post("/create-clone", response_model=VoiceCloneResponse)
+@router.post("/create-clone", response_model=VoiceCloneJobResponse, status_code=202)
 async def create_voice_clone(
-    background_tasks: BackgroundTasks,
     name: str,
+    language: Optional[str] = None,
+    tags: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
     file: UploadFile = File(...)
 ):
     """
-    Create a new voice clone from audio sample
+    Queue creation of a voice clone from an audio sample
+    
+    Returns once the sample is stored; decoding and embedding extraction
+    run on a job worker. Follow progress at /jobs/{job_id}, whose result is
+    the created clone.
     
     Args:
         name: Name for the voice clone
-        user_id: Optional user identifier
+        language: Optional language of the sample
+        tags: Optional comma-separated labels
         file: Audio sample file for voice cloning
     """
-    voice_service = get_voice_cloning_service()
+    job_queue = get_job_queue()
     file_handler = get_file_handler()
     
     try:
@@ -72,37 +101,111 @@ async def create_voice_clone(
             raise HTTPException(status_code=400, detail="Name too long (max 100 characters)")
         
         # Save audio sample
-        file_info = await file_handler.save_upload_file(file, subfolder="voice_samples")
+        file_info = await file_handler.save_upload_file(file, subfolder="voice_samples", owner=current_user.id)
         
-        # Create voice clone with current user
-        clone_result = voice_service.create_voice_clone(
-            name=name,
-            sample_audio_path=file_info["file_path"],
+        # Reserve the clone ID so clients can refer to the clone before it exists
+        clone_id = str(uuid.uuid4())
+        job = await job_queue.submit(
+            "voice_clone",
+            {
+                "clone_id": clone_id,
+                "name": name,
+                "sample_path": file_info["file_path"],
+                "file_hash": file_info["file_hash"],
+                "user_id": current_user.id,
+                "language": language,
+                "tags": _parse_tags(tags)
+            },
             user_id=current_user.id
         )
         
-        # Schedule cleanup of original sample (keep the processed version)
-        background_tasks.add_task(
-            lambda: logger.info(f"Voice clone {clone_result['clone_id']} created successfully")
+        logger.info(f"Voice clone job {job['job_id']} queued: {name} ({clone_id})")
+        return VoiceCloneJobResponse(
+            job_id=job["job_id"],
+            clone_id=clone_id,
+            name=name,
+            status=job["status"],
+            progress=job["progress"]
         )
         
-        response = VoiceCloneResponse(
-            clone_id=clone_result["clone_id"],
-            name=clone_result["name"],
-            status=clone_result["status"],
-            embedding_path=clone_result["embedding_path"],
-            embedding_dimensions=clone_result["embedding_dimensions"],
-            sample_path=clone_result["sample_path"]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to queue voice clone creation: {e}")
+        raise HTTPException(status_code=500, detail=f"Voice clone creation failed: {str(e)}")
+
+
+@router.post("/bulk-create-clones", response_model=BulkVoiceCloneResponse)
+async def bulk_create_voice_clones(
+    language: Optional[str] = None,
+    tags: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    files: List[UploadFile] = File(...)
+):
+    """
+    Create voice clones from many audio samples at once
+    
+    Each audio file, and each audio file inside an uploaded zip archive,
+    becomes one clone named after its file name. Embeddings are extracted
+    in batches and stored with one write to the vector store.
+    
+    Args:
+        language: Optional language applied to every clone
+        tags: Optional comma-separated labels applied to every clone
+        files: Audio samples and/or zip archives of audio samples
+    """
+    voice_service = get_voice_cloning_service()
+    file_handler = get_file_handler()
+    
+    try:
+        uploads = []
+        for file in files:
+            if file.filename and file.filename.lower().endswith(".zip"):
+                uploads.extend(file_handler.expand_archive(file))
+            else:
+                uploads.append(file)
+        
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No audio samples found in upload")
+        
+        if len(uploads) > settings.VOICE_INGEST_MAX_SAMPLES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many samples (max {settings.VOICE_INGEST_MAX_SAMPLES})"
+            )
+        
+        samples = []
+        try:
+            for upload in uploads:
+                file_info = await file_handler.save_upload_file(upload, subfolder="voice_samples", owner=current_user.id)
+                samples.append({
+                    "name": Path(upload.filename).stem[:100],
+                    "sample_path": file_info["file_path"],
+                    "content_hash": file_info["file_hash"]
+                })
+        except Exception:
+            # e.g. an archive hit its expansion limit part way; drop what was saved
+            for sample in samples:
+                file_handler.delete_file(Path(sample["sample_path"]).name)
+            raise
+        
+        result = voice_service.create_voice_clones(
+            samples,
+            user_id=current_user.id,
+            language=language,
+            tags=_parse_tags(tags)
         )
         
-        logger.info(f"Voice clone created: {name} ({clone_result['clone_id']})")
-        return response
+        return BulkVoiceCloneResponse(
+            created=[VoiceCloneResponse(**clone) for clone in result["created"]],
+            failed=result["failed"]
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Voice clone creation failed: {e}")
-        raise HTTPException(status_code=500, detail=f"Voice clone creation failed: {str(e)}")
+        logger.error(f"Bulk voice clone creation failed: {e}")
+        raise HTTPException(status_code=500, detail=f"Bulk voice clone creation failed: {str(e)}")
 
 
 @router.post("/synthesize", response_model=VoiceSynthesisResponse)
@@ -153,25 +256,39 @@ async def synthesize_with_cloned_voice(
 
 
 @router.get("/list")
-async def list_voice_clones(current_user: User = Depends(get_current_active_user)):
+async def list_voice_clones(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user)
+):
     """
-    List available voice clones
+    List available voice clones, newest first
     
     Args:
-        user_id: Optional filter by user ID
+        limit: Number of clones per page (max 100)
+        cursor: next_cursor returned with the previous page
     """
     voice_service = get_voice_cloning_service()
     
     try:
+        if limit < 1:
+            raise HTTPException(status_code=400, detail="limit must be at least 1")
+        limit = min(limit, 100)
+        
         # Users can only see their own clones, admins can see all
         user_filter = None if current_user.role == "admin" else current_user.id
-        clones = voice_service.list_voice_clones(user_id=user_filter)
+        page = voice_service.list_voice_clones(user_id=user_filter, limit=limit, cursor=cursor)
         
         return {
-            "voice_clones": clones,
-            "total": len(clones)
+            "voice_clones": page["voice_clones"],
+            "total": len(page["voice_clones"]),
+            "next_cursor": page["next_cursor"]
         }
         
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list voice clones: {e}")
         raise HTTPException(status_code=500, detail="Failed to list voice clones")
@@ -181,24 +298,37 @@ async def list_voice_clones(current_user: User = Depends(get_current_active_user
 async def find_similar_voices(
     clone_id: str, 
     n_results: int = 5,
+    language: Optional[str] = None,
+    tags: Optional[str] = None,
     current_user: User = Depends(get_current_active_user)
 ):
     """
-    Find voices similar to the specified clone
+    Find voices similar to the specified clone among its owner's voices
     
     Args:
         clone_id: ID of the voice clone to find similar voices for
         n_results: Number of similar voices to return (max 10)
+        language: Only return voices recorded in this language
+        tags: Only return voices with all of these comma-separated tags
     """
     voice_service = get_voice_cloning_service()
     
     try:
+        clone_info = voice_service.get_voice_clone(clone_id)
+        
+        # Other users' clones are reported as missing, as in /info
+        if not clone_info or (current_user.role != "admin" and clone_info.get("user_id") != current_user.id):
+            raise HTTPException(status_code=404, detail="Voice clone not found")
+        
         if n_results > 10:
             n_results = 10
         
         similar_voices = voice_service.find_similar_voices(
             clone_id=clone_id,
-            n_results=n_results
+            n_results=n_results,
+            user_id=clone_info.get("user_id"),
+            language=language,
+            tags=_parse_tags(tags)
         )
         
         # Format response
@@ -213,6 +343,11 @@ async def find_similar_voices(
         response = SimilarVoicesResponse(similar_voices=formatted_voices)
         return response
         
+    except HTTPException:
+        raise
+    except ValueError:
+        # Catalogued but never embedded, e.g. still being created
+        raise HTTPException(status_code=404, detail="Voice clone not found")
     except Exception as e:
         logger.error(f"Similar voice search failed: {e}")
         raise HTTPException(status_code=500, detail="Similar voice search failed")
@@ -232,6 +367,12 @@ async def delete_voice_clone(
     voice_service = get_voice_cloning_service()
     
     try:
+        clone_info = voice_service.get_voice_clone(clone_id)
+        
+        # Only the owner or an admin may delete; others see it as missing
+        if not clone_info or (current_user.role != "admin" and clone_info.get("user_id") != current_user.id):
+            raise HTTPException(status_code=404, detail="Voice clone not found")
+        
         success = voice_service.delete_voice_clone(clone_id)
         
         if success:
@@ -257,17 +398,10 @@ async def get_voice_clone_info(
     voice_service = get_voice_cloning_service()
     
     try:
-        # This would retrieve detailed clone information
-        # For now, return basic info
-        clones = voice_service.list_voice_clones()
-        clone_info = None
-        
-        for clone in clones:
-            if clone.get('clone_id') == clone_id:
-                clone_info = clone
-                break
+        clone_info = voice_service.get_voice_clone(clone_id)
         
-        if not clone_info:
+        # Other users' clones are reported as missing, as in /list
+        if not clone_info or (current_user.role != "admin" and clone_info.get("user_id") != current_user.id):
             raise HTTPException(status_code=404, detail="Voice clone not found")
         
         return clone_info
@@ -11,8 +11,8 @@ import sys
 
 from .core.config import settings
 from .database import get_database, get_vector_store
-from .services import get_file_handler
-from .api.routes import stt_router, tts_router, translation_router, voice_cloning_router, streaming
+from .services import get_file_handler, get_job_queue, get_retention_service
+from .api.routes import stt_router, tts_router, translation_router, voice_cloning_router, pipeline_router, jobs_router, streaming
 from .api.routes.auth import router as auth_router
 from .security.middleware import (
     RateLimitMiddleware, SecurityHeadersMiddleware, 
@@ -48,7 +48,6 @@ async def lifespan(app: FastAPI):
         settings.MODELS_CACHE_DIR,
         settings.CHROMADB_PATH,
         "logs",
-        "voice_embeddings",
         "vectordb"
     ]
     
@@ -73,6 +72,21 @@ async def lifespan(app: FastAPI):
         logger.error(f"File handler initialization failed: {e}")
         raise
     
+    # Start background job workers
+    try:
+        job_queue = get_job_queue()
+        await job_queue.start()
+    except Exception as e:
+        logger.error(f"Job queue startup failed: {e}")
+        raise
+    
+    # Start periodic retention of uploads and outputs
+    try:
+        await get_retention_service().start()
+    except Exception as e:
+        logger.error(f"Retention startup failed: {e}")
+        raise
+    
     logger.info("Application startup completed successfully")
     
     yield  # Application runs here
@@ -80,13 +94,17 @@ async def lifespan(app: FastAPI):
     # Cleanup on shutdown
     logger.info("Application shutting down...")
     
-    # Perform cleanup tasks
+    # Stop job workers; interrupted jobs are re-queued on next startup
     try:
-        file_handler = get_file_handler()
-        cleaned = file_handler.cleanup_old_files(max_age_hours=24)
-        logger.info(f"Cleaned up {cleaned} old files")
+        await get_job_queue().stop()
+    except Exception as e:
+        logger.warning(f"Job queue shutdown failed: {e}")
+    
+    # Stop retention; expired files are removed by the next instance
+    try:
+        await get_retention_service().stop()
     except Exception as e:
-        logger.warning(f"Cleanup failed: {e}")
+        logger.warning(f"Retention shutdown failed: {e}")
     
     logger.info("Application shutdown completed")
 
@@ -136,6 +154,16 @@ app.include_router(
     prefix=f"{settings.API_PREFIX}/voice", 
     tags=["Voice Cloning"]
 )
+app.include_router(
+    pipeline_router, 
+    prefix=f"{settings.API_PREFIX}/pipeline", 
+    tags=["Speech Translation Pipeline"]
+)
+app.include_router(
+    jobs_router, 
+    prefix=f"{settings.API_PREFIX}/jobs", 
+    tags=["Background Jobs"]
+)
 app.include_router(
     streaming.router, 
     prefix=f"{settings.API_PREFIX}/stream", 
@@ -180,7 +208,9 @@ async def root():
             "speech_to_text": f"{settings.API_PREFIX}/stt",
             "text_to_speech": f"{settings.API_PREFIX}/tts", 
             "translation": f"{settings.API_PREFIX}/translate",
-            "voice_cloning": f"{settings.API_PREFIX}/voice"
+            "voice_cloning": f"{settings.API_PREFIX}/voice",
+            "speech_translation": f"{settings.API_PREFIX}/pipeline",
+            "jobs": f"{settings.API_PREFIX}/jobs"
         }
     }
 
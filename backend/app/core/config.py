@@ -25,20 +25,70 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: Optional[str] = os.getenv("JWT_SECRET_KEY", None)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     ENCRYPTION_KEY: Optional[str] = os.getenv("ENCRYPTION_KEY", None)
+    ENCRYPTION_PREVIOUS_KEYS: List[str] = []  # Retired keys, still accepted for decryption
+    ENCRYPTION_KEY_CACHE: str = "encryption_keys.cache"  # Derived key cache file, "" to disable
 
     # File handling
     UPLOAD_FOLDER: str = "uploads"
     AUDIO_OUTPUT_FOLDER: str = "audio_outputs"
     MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024  # 50MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Uploads are read and written in 1MB blocks
     ALLOWED_AUDIO_EXTENSIONS: set = {"wav", "mp3", "ogg", "m4a", "flac"}
 
     # Model settings
     MODELS_CACHE_DIR: str = "models_cache"
     WHISPER_MODEL: str = "openai/whisper-large-v3-turbo"
     TTS_MODEL: str = "nari-labs/dia-1.6b"  # According to plan
+    TRANSCRIPTION_CACHE_SIZE: int = 256  # Transcripts kept in memory in front of SQLite
+    ENCODER_CACHE_SIZE: int = 64  # Whisper encoder outputs kept for re-decoding the same audio
+    ENCODER_CACHE_BYTES: int = 512 * 1024 * 1024  # Memory bound of the encoder output cache
+    AUDIO_FEATURE_INDEX: bool = False  # Store pooled Whisper encoder states of transcribed audio for similarity search
+
+    # Speaker embeddings
+    SPEAKER_ENCODER_MODEL: str = "microsoft/wavlm-base-plus-sv"
+    SPEAKER_SEGMENT_SECONDS: float = 3.0  # Crop length fed to the encoder
+    SPEAKER_MAX_SEGMENTS: int = 10  # Crops per sample, bounds cost for long samples
+    SPEAKER_BATCH_SIZE: int = 16  # Crops per forward pass
+    SPEAKER_CACHE_SIZE: int = 128  # Cloned voices kept as ready conditioning tensors
+    VOICE_INGEST_BATCH_SIZE: int = 64  # Samples decoded and embedded together in bulk ingestion
+    VOICE_INGEST_MAX_SAMPLES: int = 5000  # Samples accepted per bulk request
+    VOICE_INGEST_MAX_ARCHIVE_BYTES: int = 2 * 1024 * 1024 * 1024  # Uncompressed audio expanded per zip archive
+    VOICE_INGEST_MAX_COMPRESSION_RATIO: float = 50.0  # Uncompressed to compressed size allowed per archive entry
+
+    # Translation
+    TRANSLATION_MAX_INPUT_TOKENS: int = 400  # Longer inputs are split on sentences
+    TRANSLATION_MAX_REQUEST_TOKENS: int = 4096  # Longer requests are rejected
+    TRANSLATION_BATCH_SIZE: int = 8
+    TRANSLATION_TOKEN_CACHE_SIZE: int = 4096
+
+    # Real-time streaming
+    STREAM_TRANSLATION_BATCH_SIZE: int = 16  # Segments per batch across connections
+    STREAM_TRANSLATION_MAX_DELAY_MS: int = 50  # Wait to fill a batch
+    STREAM_TRANSLATION_MAX_PENDING_SECONDS: float = 5.0  # Translate without a sentence end
+
+    # Storage retention
+    UPLOAD_TTL_HOURS: int = 24
+    OUTPUT_TTL_HOURS: int = 24
+    STORAGE_QUOTA_BYTES: int = 10 * 1024 * 1024 * 1024  # 10GB across uploads and outputs
+    RETENTION_INTERVAL_SECONDS: int = 300
+    RETENTION_BATCH_SIZE: int = 500  # Max files deleted per pass
+    RESULT_TTL_HOURS: int = 30 * 24  # Cached transcripts and embeddings, independent of the audio
+    RESULT_MAX_ROWS: int = 100_000  # Oldest cached results beyond this are dropped
+
+    # Background jobs
+    JOB_WORKERS: int = 2  # Jobs processed concurrently
+    JOB_POLL_INTERVAL: float = 2.0  # Seconds between queue checks when idle
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_HEARTBEAT_INTERVAL: float = 15.0  # Seconds between lease renewals of running jobs
+    JOB_LEASE_SECONDS: float = 60.0  # Running jobs without a heartbeat this long are reclaimed
 
     # Database
     CHROMADB_PATH: str = "vectordb"
+    VECTOR_STORE_BACKEND: str = "chroma"  # "chroma" or "numpy" (in-process memory-mapped index)
+    VECTOR_STORE_DTYPE: str = "float32"  # numpy backend storage: "float32" or "float16"
+    VECTOR_STORE_QUANTIZATION: str = "int8"  # numpy backend in-memory search copy: "none", "float16" or "int8"
+    VECTOR_RERANK_FACTOR: int = 4  # Quantized candidates re-scored at full precision, per result
+    VECTOR_ANN_THRESHOLD: int = 50000  # numpy backend uses HNSW (hnswlib) from this many vectors
     SQLITE_DB_PATH: str = "app_data.db"
 
     # Privacy and security
@@ -1,5 +1,8 @@
 from .models import DatabaseManager, AudioProcessingSession, VoiceClone, get_database
-from .vector_store import VectorStore, get_vector_store
+from .vector_store import VectorStore, get_vector_store, voice_filter, voice_metadata
+from .job_store import JobStore, Job, JobStatus, get_job_store
+from .artifact_index import ArtifactIndex, get_artifact_index
+from .blob_store import BlobStore, get_blob_store
 
 __all__ = [
     "DatabaseManager", 
@@ -7,5 +10,15 @@ __all__ = [
     "VoiceClone", 
     "get_database",
     "VectorStore",
-    "get_vector_store"
+    "get_vector_store",
+    "voice_filter",
+    "voice_metadata",
+    "JobStore",
+    "Job",
+    "JobStatus",
+    "get_job_store",
+    "ArtifactIndex",
+    "get_artifact_index",
+    "BlobStore",
+    "get_blob_store"
 ]
\ No newline at end of file
@@ -0,0 +1,223 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+from loguru import logger
+
+
+class ArtifactIndex:
+    """
+    SQLite index of stored files (uploads and generated outputs)
+
+    Every artifact is recorded with its size, owner, creation and last
+    access time and an optional expiry, so retention can find expired and
+    least-recently-used files through indexes instead of walking the
+    filesystem. The total stored size is maintained by triggers and read
+    in constant time.
+    """
+
+    def __init__(self, db_path: str = "app_data.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Initialize artifact tables, indexes and size-tracking triggers"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS artifacts (
+                        path TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        owner TEXT,
+                        created_at REAL NOT NULL,
+                        last_accessed REAL NOT NULL,
+                        expires_at REAL
+                    )
+                """)
+
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_artifacts_expires_at
+                    ON artifacts(expires_at) WHERE expires_at IS NOT NULL
+                """)
+
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_artifacts_last_accessed
+                    ON artifacts(last_accessed)
+                """)
+
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS artifact_stats (
+                        id INTEGER PRIMARY KEY CHECK (id = 1),
+                        total_size INTEGER NOT NULL,
+                        total_count INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("INSERT OR IGNORE INTO artifact_stats (id, total_size, total_count) VALUES (1, 0, 0)")
+
+                # Databases created before files stored earlier were scanned in
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(artifact_stats)")}
+                if "scanned_at" not in columns:
+                    conn.execute("ALTER TABLE artifact_stats ADD COLUMN scanned_at REAL")
+
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS artifacts_insert AFTER INSERT ON artifacts
+                    BEGIN
+                        UPDATE artifact_stats SET total_size = total_size + NEW.size,
+                                                  total_count = total_count + 1 WHERE id = 1;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS artifacts_delete AFTER DELETE ON artifacts
+                    BEGIN
+                        UPDATE artifact_stats SET total_size = total_size - OLD.size,
+                                                  total_count = total_count - 1 WHERE id = 1;
+                    END
+                """)
+                conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS artifacts_update AFTER UPDATE OF size ON artifacts
+                    BEGIN
+                        UPDATE artifact_stats SET total_size = total_size - OLD.size + NEW.size WHERE id = 1;
+                    END
+                """)
+
+                conn.commit()
+                logger.info(f"Artifact index initialized at {self.db_path}")
+
+        except Exception as e:
+            logger.error(f"Artifact index initialization failed: {e}")
+            raise
+
+    def register(
+        self,
+        path: str,
+        size: int,
+        kind: str,
+        owner: Optional[str] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        """Record a stored file; re-registering a path replaces its entry"""
+        now = time.time()
+        expires_at = now + ttl_seconds if ttl_seconds else None
+
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO artifacts (path, kind, size, owner, created_at, last_accessed, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    kind = excluded.kind, size = excluded.size, owner = excluded.owner,
+                    last_accessed = excluded.last_accessed, expires_at = excluded.expires_at
+            """, (str(path), kind, size, owner, now, now, expires_at))
+            conn.commit()
+
+    def register_existing(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        Record files found on disk that are not indexed yet
+
+        Each entry has path, size, kind, mtime and ttl_seconds; the file's
+        modification time stands in for its creation and last access, so
+        its expiry counts from when it was written. Indexed paths are left
+        as they are.
+        """
+        with self._connect() as conn:
+            cursor = conn.executemany("""
+                INSERT OR IGNORE INTO artifacts (path, kind, size, owner, created_at, last_accessed, expires_at)
+                VALUES (?, ?, ?, NULL, ?, ?, ?)
+            """, [
+                (str(entry["path"]), entry["kind"], entry["size"], entry["mtime"], entry["mtime"],
+                 entry["mtime"] + entry["ttl_seconds"])
+                for entry in entries
+            ])
+            conn.commit()
+            return cursor.rowcount
+
+    def scanned(self) -> bool:
+        """Whether files stored before the index have been registered"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT scanned_at FROM artifact_stats WHERE id = 1").fetchone()
+            return row["scanned_at"] is not None
+
+    def mark_scanned(self):
+        """Record that files stored before the index have been registered"""
+        with self._connect() as conn:
+            conn.execute("UPDATE artifact_stats SET scanned_at = ? WHERE id = 1", (time.time(),))
+            conn.commit()
+
+    def touch(self, path: str):
+        """Mark a file as recently used"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE artifacts SET last_accessed = ? WHERE path = ?",
+                (time.time(), str(path))
+            )
+            conn.commit()
+
+    def pin(self, paths: List[str], ttl_seconds: float):
+        """
+        Hold files still in use for another ttl_seconds and mark them recently used
+
+        The expiry is pushed back rather than cleared, so a file is held only
+        while it keeps being pinned and expires ttl_seconds after the last pin.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE artifacts SET expires_at = ?, last_accessed = ? WHERE path = ?",
+                [(now + ttl_seconds, now, str(p)) for p in paths]
+            )
+            conn.commit()
+
+    def remove(self, paths: List[str]):
+        """Forget files that have been deleted"""
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM artifacts WHERE path = ?", [(str(p),) for p in paths])
+            conn.commit()
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the index entry for a file"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM artifacts WHERE path = ?", (str(path),)).fetchone()
+            return dict(row) if row else None
+
+    def expired(self, limit: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Get up to limit files whose TTL has passed, oldest expiry first"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT path, size FROM artifacts
+                WHERE expires_at IS NOT NULL AND expires_at <= ?
+                ORDER BY expires_at LIMIT ?
+            """, (now if now is not None else time.time(), limit)).fetchall()
+            return [dict(row) for row in rows]
+
+    def least_recently_used(self, limit: int) -> List[Dict[str, Any]]:
+        """Get up to limit files in least-recently-used order"""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT path, size FROM artifacts ORDER BY last_accessed LIMIT ?
+            """, (limit,)).fetchall()
+            return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Get total stored size and file count"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT total_size, total_count FROM artifact_stats WHERE id = 1"
+            ).fetchone()
+            return {"total_size": row["total_size"], "total_count": row["total_count"]}
+
+
+# Global artifact index instance
+_artifact_index: Optional[ArtifactIndex] = None
+
+def get_artifact_index() -> ArtifactIndex:
+    """Get or create global artifact index instance"""
+    global _artifact_index
+    if _artifact_index is None:
+        _artifact_index = ArtifactIndex()
+    return _artifact_index
@@ -0,0 +1,217 @@
+import sqlite3
+import json
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+from loguru import logger
+
+
+class BlobStore:
+    """
+    Content-addressed index of uploaded audio
+
+    Each distinct upload is stored once under its SHA-256 and reference
+    counted, so re-uploading the same recording only bumps a counter. Derived
+    results (transcripts, embeddings, ...) are recorded against the content
+    hash and outlive the blob itself, so identical audio is not processed
+    twice; they have their own retention (see prune_results).
+    """
+
+    def __init__(self, db_path: str = "app_data.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Initialize blob and derived result tables"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS blobs (
+                        hash TEXT PRIMARY KEY,
+                        path TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        ref_count INTEGER NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_blobs_path ON blobs(path)")
+
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS blob_results (
+                        hash TEXT NOT NULL,
+                        kind TEXT NOT NULL,
+                        params TEXT NOT NULL,
+                        result TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (hash, kind, params)
+                    )
+                """)
+
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_blob_results_created ON blob_results(created_at)"
+                )
+
+                conn.commit()
+                logger.info(f"Blob store initialized at {self.db_path}")
+
+        except Exception as e:
+            logger.error(f"Blob store initialization failed: {e}")
+            raise
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the blob entry for a content hash"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM blobs WHERE hash = ?", (content_hash,)).fetchone()
+            return dict(row) if row else None
+
+    def find_by_path(self, path: str) -> Optional[Dict[str, Any]]:
+        """Get the blob entry stored at a path"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM blobs WHERE path = ?", (str(path),)).fetchone()
+            return dict(row) if row else None
+
+    def referenced_paths(self, paths: List[str]) -> Set[str]:
+        """Those of the given paths that hold a blob that is still referenced"""
+        if not paths:
+            return set()
+
+        with self._connect() as conn:
+            rows = conn.execute(f"""
+                SELECT path FROM blobs
+                WHERE ref_count > 0 AND path IN ({', '.join('?' for _ in paths)})
+            """, [str(p) for p in paths]).fetchall()
+            return {row["path"] for row in rows}
+
+    def add_reference(self, content_hash: str, path: str, size: int) -> Dict[str, Any]:
+        """
+        Reference a blob, creating it at path if the hash is new
+
+        Returns:
+            The blob entry after the update. Its path differs from the given
+            one when the content was already stored.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""
+                INSERT INTO blobs (hash, path, size, ref_count, created_at)
+                VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT(hash) DO UPDATE SET ref_count = ref_count + 1
+            """, (content_hash, str(path), size, time.time()))
+            row = conn.execute("SELECT * FROM blobs WHERE hash = ?", (content_hash,)).fetchone()
+            conn.commit()
+            return dict(row)
+
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def relocate(self, content_hash: str, path: str):
+        """Point a blob at a new copy of its content"""
+        with self._connect() as conn:
+            conn.execute("UPDATE blobs SET path = ? WHERE hash = ?", (str(path), content_hash))
+            conn.commit()
+
+    def release(self, content_hash: str) -> Optional[str]:
+        """
+        Drop one reference to a blob
+
+        Returns:
+            The blob path once the last reference is gone and the file should
+            be deleted, otherwise None
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT path, ref_count FROM blobs WHERE hash = ?", (content_hash,)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+
+            if row["ref_count"] > 1:
+                conn.execute(
+                    "UPDATE blobs SET ref_count = ref_count - 1 WHERE hash = ?", (content_hash,)
+                )
+                conn.commit()
+                return None
+
+            conn.execute("DELETE FROM blobs WHERE hash = ?", (content_hash,))
+            conn.commit()
+            return row["path"]
+
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def discard_paths(self, paths: List[str]):
+        """Forget unreferenced blobs whose files were deleted outside of release()"""
+        with self._connect() as conn:
+            conn.executemany(
+                "DELETE FROM blobs WHERE path = ? AND ref_count <= 0", [(str(p),) for p in paths]
+            )
+            conn.commit()
+
+    def put_result(self, content_hash: str, kind: str, result: Any, params: str = ""):
+        """Store a derived result for content, keyed by kind and parameters"""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO blob_results (hash, kind, params, result, created_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (content_hash, kind, params, json.dumps(result), time.time()))
+            conn.commit()
+
+    def get_result(self, content_hash: str, kind: str, params: str = "") -> Optional[Any]:
+        """Look up a derived result for content, or None if it was never computed"""
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT result FROM blob_results WHERE hash = ? AND kind = ? AND params = ?
+            """, (content_hash, kind, params)).fetchone()
+            return json.loads(row["result"]) if row else None
+
+    def prune_results(self, max_age_seconds: float, max_rows: int) -> int:
+        """
+        Drop derived results older than max_age_seconds, then the oldest ones
+        beyond max_rows
+
+        Returns:
+            Number of results removed
+        """
+        with self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM blob_results WHERE created_at < ?", (time.time() - max_age_seconds,)
+            ).rowcount
+
+            excess = conn.execute("SELECT COUNT(*) FROM blob_results").fetchone()[0] - max_rows
+            if excess > 0:
+                removed += conn.execute("""
+                    DELETE FROM blob_results WHERE rowid IN (
+                        SELECT rowid FROM blob_results ORDER BY created_at LIMIT ?
+                    )
+                """, (excess,)).rowcount
+
+            conn.commit()
+            return removed
+
+
+# Global blob store instance
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Get or create global blob store instance"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
@@ -0,0 +1,358 @@
+import sqlite3
+import json
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+from dataclasses import dataclass
+from loguru import logger
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    TERMINAL = (COMPLETED, FAILED, CANCELLED)
+
+
+@dataclass
+class Job:
+    id: str
+    job_type: str
+    status: str = JobStatus.QUEUED
+    priority: int = 0
+    payload: Optional[Dict[str, Any]] = None
+    progress: float = 0.0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    user_id: Optional[str] = None
+    worker_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for API responses and progress events"""
+        return {
+            "job_id": self.id,
+            "job_type": self.job_type,
+            "status": self.status,
+            "priority": self.priority,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "attempts": self.attempts,
+            "user_id": self.user_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobStore:
+    """
+    Durable job queue table in SQLite
+
+    Jobs are claimed atomically (highest priority first, then oldest), so
+    several workers can consume the same table without handing out a job
+    twice. A running job records the worker that claimed it, which renews
+    a heartbeat while alive; jobs whose heartbeat is older than the lease
+    belong to a crashed process and are re-queued, or failed when that was
+    their last attempt.
+    """
+
+    def __init__(self, db_path: str = "app_data.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Initialize the jobs table"""
+        try:
+            with self._connect() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        id TEXT PRIMARY KEY,
+                        job_type TEXT NOT NULL,
+                        status TEXT NOT NULL,
+                        priority INTEGER DEFAULT 0,
+                        payload TEXT,
+                        progress REAL DEFAULT 0,
+                        result TEXT,
+                        error TEXT,
+                        attempts INTEGER DEFAULT 0,
+                        user_id TEXT,
+                        worker_id TEXT,
+                        created_at TIMESTAMP,
+                        started_at TIMESTAMP,
+                        finished_at TIMESTAMP,
+                        heartbeat_at TIMESTAMP
+                    )
+                """)
+
+                # Tables created before jobs were leased to a worker
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+                if "worker_id" not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN worker_id TEXT")
+                if "heartbeat_at" not in columns:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TIMESTAMP")
+
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_jobs_queue
+                    ON jobs(status, priority DESC, created_at)
+                """)
+
+                conn.commit()
+                logger.info(f"Job store initialized at {self.db_path}")
+
+        except Exception as e:
+            logger.error(f"Job store initialization failed: {e}")
+            raise
+
+    def _row_to_job(self, row: sqlite3.Row) -> Job:
+        return Job(
+            id=row['id'],
+            job_type=row['job_type'],
+            status=row['status'],
+            priority=row['priority'],
+            payload=json.loads(row['payload']) if row['payload'] else None,
+            progress=row['progress'],
+            result=json.loads(row['result']) if row['result'] else None,
+            error=row['error'],
+            attempts=row['attempts'],
+            user_id=row['user_id'],
+            worker_id=row['worker_id'],
+            created_at=datetime.fromisoformat(row['created_at']) if row['created_at'] else None,
+            started_at=datetime.fromisoformat(row['started_at']) if row['started_at'] else None,
+            finished_at=datetime.fromisoformat(row['finished_at']) if row['finished_at'] else None,
+            heartbeat_at=datetime.fromisoformat(row['heartbeat_at']) if row['heartbeat_at'] else None
+        )
+
+    def create_job(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        user_id: Optional[str] = None
+    ) -> Job:
+        """Add a job to the queue"""
+        job = Job(
+            id=str(uuid.uuid4()),
+            job_type=job_type,
+            priority=priority,
+            payload=payload,
+            user_id=user_id,
+            created_at=datetime.now()
+        )
+
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO jobs (id, job_type, status, priority, payload, user_id, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (
+                job.id, job.job_type, job.status, job.priority,
+                json.dumps(payload), job.user_id, job.created_at.isoformat()
+            ))
+            conn.commit()
+
+        logger.info(f"Job queued: {job.id} ({job_type}, priority {priority})")
+        return job
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        """Get job by ID"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._row_to_job(row) if row else None
+
+    def claim_next_job(
+        self,
+        job_types: Optional[List[str]] = None,
+        worker_id: Optional[str] = None
+    ) -> Optional[Job]:
+        """Atomically move the next queued job to running under worker_id and return it"""
+        conn = self._connect()
+        try:
+            # Take the write lock up front so two workers cannot claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+
+            query = "SELECT id FROM jobs WHERE status = ?"
+            params: List[Any] = [JobStatus.QUEUED]
+            if job_types:
+                query += f" AND job_type IN ({', '.join('?' for _ in job_types)})"
+                params.extend(job_types)
+            query += " ORDER BY priority DESC, created_at LIMIT 1"
+
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+
+            now = datetime.now().isoformat()
+            conn.execute("""
+                UPDATE jobs SET status = ?, worker_id = ?, started_at = ?, heartbeat_at = ?,
+                    attempts = attempts + 1
+                WHERE id = ?
+            """, (JobStatus.RUNNING, worker_id, now, now, row['id']))
+            claimed = conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+            conn.commit()
+            return self._row_to_job(claimed)
+
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def update_progress(self, job_id: str, progress: float):
+        """Record progress (0.0 - 1.0) for a running job, renewing its lease"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                (progress, datetime.now().isoformat(), job_id, JobStatus.RUNNING)
+            )
+            conn.commit()
+
+    def heartbeat(self, worker_id: str) -> int:
+        """Renew the lease on every job the worker is running"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = ?",
+                (datetime.now().isoformat(), worker_id, JobStatus.RUNNING)
+            )
+            conn.commit()
+            return cursor.rowcount
+
+    def complete_job(self, job_id: str, worker_id: Optional[str], result: Dict[str, Any]) -> bool:
+        """
+        Mark a job completed with its result
+
+        Only the worker holding the job's lease can finish it; returns False
+        when the lease was lost (the job was reclaimed by another worker).
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET status = ?, progress = 1.0, result = ?, error = NULL, finished_at = ?
+                WHERE id = ? AND worker_id IS ? AND status = ?
+            """, (JobStatus.COMPLETED, json.dumps(result), datetime.now().isoformat(),
+                  job_id, worker_id, JobStatus.RUNNING))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def fail_job(self, job_id: str, worker_id: Optional[str], error: str, retry: bool = False) -> bool:
+        """
+        Mark a job failed, or put it back in the queue for another attempt
+
+        As with complete_job, returns False when worker_id no longer holds the lease.
+        """
+        with self._connect() as conn:
+            if retry:
+                cursor = conn.execute("""
+                    UPDATE jobs SET status = ?, progress = 0, error = ?, worker_id = NULL,
+                        started_at = NULL, heartbeat_at = NULL
+                    WHERE id = ? AND worker_id IS ? AND status = ?
+                """, (JobStatus.QUEUED, error, job_id, worker_id, JobStatus.RUNNING))
+            else:
+                cursor = conn.execute("""
+                    UPDATE jobs SET status = ?, error = ?, finished_at = ?
+                    WHERE id = ? AND worker_id IS ? AND status = ?
+                """, (JobStatus.FAILED, error, datetime.now().isoformat(), job_id, worker_id, JobStatus.RUNNING))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def cancel_job(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet"""
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET status = ?, finished_at = ?
+                WHERE id = ? AND status = ?
+            """, (JobStatus.CANCELLED, datetime.now().isoformat(), job_id, JobStatus.QUEUED))
+            conn.commit()
+            return cursor.rowcount > 0
+
+    def fail_stale_jobs(self, lease_seconds: float, max_attempts: int) -> List[Job]:
+        """Fail jobs whose lease expired on their last attempt and return them"""
+        cutoff = (datetime.now() - timedelta(seconds=lease_seconds)).isoformat()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("""
+                SELECT * FROM jobs
+                WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?) AND attempts >= ?
+            """, (JobStatus.RUNNING, cutoff, max_attempts)).fetchall()
+
+            now = datetime.now().isoformat()
+            conn.executemany("""
+                UPDATE jobs SET status = ?, error = ?, finished_at = ?
+                WHERE id = ?
+            """, [
+                (JobStatus.FAILED, f"Worker lease expired on attempt {row['attempts']}", now, row['id'])
+                for row in rows
+            ])
+            conn.commit()
+
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        if rows:
+            logger.info(f"Failed {len(rows)} jobs whose lease expired on their last attempt")
+        return [self._row_to_job(row) for row in rows]
+
+    def requeue_stale_jobs(self, lease_seconds: float, max_attempts: int) -> int:
+        """Return jobs whose worker stopped renewing its lease, and that have attempts left, to the queue"""
+        cutoff = (datetime.now() - timedelta(seconds=lease_seconds)).isoformat()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET status = ?, progress = 0, worker_id = NULL,
+                    started_at = NULL, heartbeat_at = NULL
+                WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?) AND attempts < ?
+            """, (JobStatus.QUEUED, JobStatus.RUNNING, cutoff, max_attempts))
+            conn.commit()
+
+            if cursor.rowcount:
+                logger.info(f"Re-queued {cursor.rowcount} jobs with expired leases")
+            return cursor.rowcount
+
+    def requeue_worker_jobs(self, worker_id: str) -> int:
+        """Return a stopping worker's running jobs to the queue"""
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                UPDATE jobs SET status = ?, progress = 0, worker_id = NULL,
+                    started_at = NULL, heartbeat_at = NULL
+                WHERE status = ? AND worker_id = ?
+            """, (JobStatus.QUEUED, JobStatus.RUNNING, worker_id))
+            conn.commit()
+
+            if cursor.rowcount:
+                logger.info(f"Re-queued {cursor.rowcount} interrupted jobs")
+            return cursor.rowcount
+
+    def count_jobs(self, status: str) -> int:
+        """Count jobs in a given status"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)
+            ).fetchone()[0]
+
+
+# Global job store instance
+_job_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    """Get or create global job store instance"""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
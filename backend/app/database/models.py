@@ -1,8 +1,9 @@
 import sqlite3
 import json
+import base64
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict
 try:
     from loguru import logger
@@ -39,6 +40,21 @@ class VoiceClone:
     voice_embedding_path: str
     created_at: datetime
     metadata: Optional[Dict[str, Any]] = None
+    user_id: Optional[str] = None
+
+
+def encode_page_cursor(created_at: str, item_id: str) -> str:
+    """Opaque keyset cursor pointing just after (created_at, id)"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, item_id]).encode()).decode()
+
+
+def decode_page_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a keyset cursor; raises ValueError if it is malformed"""
+    try:
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(item_id)
+    except Exception:
+        raise ValueError("Invalid page cursor")
 
 
 class DatabaseManager:
@@ -77,10 +93,16 @@ class DatabaseManager:
                         sample_audio_path TEXT NOT NULL,
                         voice_embedding_path TEXT NOT NULL,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        metadata TEXT
+                        metadata TEXT,
+                        user_id TEXT
                     )
                 """)
                 
+                # Tables created before clones had owners
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(voice_clones)")}
+                if "user_id" not in columns:
+                    conn.execute("ALTER TABLE voice_clones ADD COLUMN user_id TEXT")
+                
                 conn.execute("""
                     CREATE INDEX IF NOT EXISTS idx_audio_sessions_created_at 
                     ON audio_sessions(created_at)
@@ -91,6 +113,17 @@ class DatabaseManager:
                     ON voice_clones(name)
                 """)
                 
+                # Keyset pagination, newest first, per owner and overall
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_voice_clones_user_created 
+                    ON voice_clones(user_id, created_at, id)
+                """)
+                
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_voice_clones_created 
+                    ON voice_clones(created_at, id)
+                """)
+                
                 conn.commit()
                 logger.info(f"Database initialized at {self.db_path}")
                 
@@ -193,6 +226,127 @@ class DatabaseManager:
             logger.error(f"Failed to update audio session {session.id}: {e}")
             raise
 
+    
+    @staticmethod
+    def _voice_clone_values(clone: VoiceClone) -> tuple:
+        return (
+            clone.id, clone.name, clone.sample_audio_path, clone.voice_embedding_path,
+            clone.created_at.isoformat(), json.dumps(clone.metadata) if clone.metadata else None,
+            clone.user_id
+        )
+    
+    @staticmethod
+    def _row_to_voice_clone(row: sqlite3.Row) -> VoiceClone:
+        return VoiceClone(
+            id=row['id'],
+            name=row['name'],
+            sample_audio_path=row['sample_audio_path'],
+            voice_embedding_path=row['voice_embedding_path'],
+            created_at=datetime.fromisoformat(row['created_at']),
+            metadata=json.loads(row['metadata']) if row['metadata'] else None,
+            user_id=row['user_id']
+        )
+    
+    def create_voice_clone(self, clone: VoiceClone) -> str:
+        """Create voice clone record"""
+        self.create_voice_clones([clone])
+        return clone.id
+    
+    def create_voice_clones(self, clones: List[VoiceClone]) -> int:
+        """Create many voice clone records in one transaction"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.executemany("""
+                    INSERT INTO voice_clones 
+                    (id, name, sample_audio_path, voice_embedding_path, created_at, metadata, user_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, [self._voice_clone_values(clone) for clone in clones])
+                
+                conn.commit()
+                logger.info(f"Voice clones created: {len(clones)}")
+                return len(clones)
+                
+        except Exception as e:
+            logger.error(f"Failed to create voice clones: {e}")
+            raise
+    
+    def get_voice_clone(self, clone_id: str) -> Optional[VoiceClone]:
+        """Get voice clone by ID"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                row = conn.execute(
+                    "SELECT * FROM voice_clones WHERE id = ?", (clone_id,)
+                ).fetchone()
+                return self._row_to_voice_clone(row) if row else None
+                
+        except Exception as e:
+            logger.error(f"Failed to get voice clone {clone_id}: {e}")
+            return None
+    
+    def list_voice_clones(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[VoiceClone], Optional[str]]:
+        """
+        List voice clones newest first, one page at a time
+        
+        Pages are read by seeking the (user_id, created_at, id) index past
+        the cursor, so each page costs O(limit) however many clones exist.
+        
+        Args:
+            user_id: Only list this owner's clones; None lists all clones
+            limit: Maximum clones per page
+            cursor: next_cursor from the previous page
+        
+        Returns:
+            Tuple of the page and the cursor of the next page (None on the last page)
+        """
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if cursor:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(decode_page_cursor(cursor))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                conn.row_factory = sqlite3.Row
+                rows = conn.execute(f"""
+                    SELECT * FROM voice_clones {where}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ?
+                """, (*params, limit + 1)).fetchall()
+                
+        except Exception as e:
+            logger.error(f"Failed to list voice clones: {e}")
+            raise
+        
+        clones = [self._row_to_voice_clone(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_page_cursor(last['created_at'], last['id'])
+        return clones, next_cursor
+    
+    def delete_voice_clone(self, clone_id: str) -> bool:
+        """Delete voice clone record; returns False if it did not exist"""
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                deleted = conn.execute(
+                    "DELETE FROM voice_clones WHERE id = ?", (clone_id,)
+                ).rowcount
+                conn.commit()
+                return deleted > 0
+                
+        except Exception as e:
+            logger.error(f"Failed to delete voice clone {clone_id}: {e}")
+            raise
+
 
 # Global database manager instance
 _db_manager: Optional[DatabaseManager] = None
@@ -0,0 +1,480 @@
+import os
+import json
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterable
+from loguru import logger
+
+try:
+    import hnswlib
+except ImportError:  # Optional: only needed for approximate search on large collections
+    hnswlib = None
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where the process lock is skipped
+    fcntl = None
+
+
+QUANTIZATIONS = (None, "float16", "int8")
+
+# Rows converted to float32 at a time when scoring quantized vectors
+SCORE_BLOCK_ROWS = 16384
+
+
+class NumpyVectorIndex:
+    """
+    In-process cosine similarity index over a memory-mapped embedding matrix
+
+    Embeddings are L2-normalized and stored as rows of a float32 or float16
+    .npy file opened with mmap, next to a SQLite table of ids and metadata
+    in which each write only touches the rows it changes.
+    Lookups by id are a dict access; top-k search is a single matrix-vector
+    product for collections below ann_threshold, and an HNSW index (when
+    hnswlib is installed) above it. The HNSW index is built on the first
+    query above the threshold and then kept up to date in place: added and
+    replaced rows are inserted under their row number, and deleted rows are
+    marked deleted. query_batch answers many queries with one matrix-matrix
+    product.
+
+    Metadata fields listed in filter_fields, and boolean "tag:<name>" keys,
+    are kept in an inverted index. Filtered queries score only the vectors
+    matching the filter, so a tenant's search costs O(tenant vectors).
+
+    With quantization set, a float16 or int8 (one scale per row) copy of the
+    matrix is kept in memory and searched instead of the file; the best
+    rerank_factor * n_results candidates are then re-scored against the
+    full-precision rows on disk. int8 keeps the whole library resident in a
+    quarter of the float32 size, and results match an exact search unless a
+    true neighbour falls outside the shortlist.
+
+    The index is single-process: ids, metadata and the matrix layout are
+    held in memory, so a second process writing the same files would
+    corrupt it. A lock file enforces this where fcntl is available.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        name: str,
+        dtype: str = "float32",
+        ann_threshold: int = 50000,
+        filter_fields: Tuple[str, ...] = ("user_id", "language"),
+        quantization: Optional[str] = None,
+        rerank_factor: int = 4
+    ):
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.ann_threshold = ann_threshold
+        self.filter_fields = set(filter_fields)
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+
+        self._matrix_path = self.directory / f"{name}.{self.dtype.name}.npy"
+        self._table_path = self.directory / f"{name}.sqlite3"
+        self._legacy_table_path = self.directory / f"{name}.json"
+        self._lock = threading.RLock()
+        self._process_lock = self._acquire_process_lock()
+
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        # (field, value) -> ids with that metadata value
+        self._postings: Dict[Tuple[str, Any], Set[str]] = {}
+        self._matrix: Optional[np.memmap] = None
+        # Resident quantized rows (and int8 row scales), parallel to _matrix
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._ann = None
+
+        self._init_table()
+        self._load()
+
+    def _acquire_process_lock(self):
+        """Hold an exclusive lock on the index for the lifetime of this process"""
+        if fcntl is None:
+            return None
+
+        lock_file = open(self.directory / f"{self.name}.lock", "a")
+        try:
+            # lockf locks belong to the process, so reopening the index in the same process succeeds
+            fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Vector index {self.name} in {self.directory} is in use by another process")
+        return lock_file
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._table_path, timeout=30)
+
+    def _init_table(self):
+        """Create the id and metadata table, importing a JSON table from older versions"""
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vectors (
+                    row INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    metadata TEXT NOT NULL
+                )
+            """)
+
+            if self._legacy_table_path.exists():
+                with open(self._legacy_table_path) as f:
+                    table = json.load(f)
+                conn.execute("DELETE FROM vectors")
+                conn.executemany(
+                    "INSERT INTO vectors (row, id, metadata) VALUES (?, ?, ?)",
+                    [(row, voice_id, json.dumps(metadata))
+                     for row, (voice_id, metadata) in enumerate(zip(table["ids"], table["metadatas"]))]
+                )
+                conn.commit()
+                self._legacy_table_path.unlink()
+                logger.info(f"Vector index {self.name}: imported {len(table['ids'])} entries from {self._legacy_table_path.name}")
+
+    def _load(self):
+        """Open an existing matrix and id table"""
+        if not self._matrix_path.exists():
+            return
+
+        with self._connect() as conn:
+            table = conn.execute("SELECT id, metadata FROM vectors ORDER BY row").fetchall()
+        self.ids = [voice_id for voice_id, _ in table]
+        self.metadatas = [json.loads(metadata) for _, metadata in table]
+        self._rows = {voice_id: row for row, voice_id in enumerate(self.ids)}
+        for voice_id, metadata in zip(self.ids, self.metadatas):
+            self._index_metadata(voice_id, metadata)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+        if self.quantization is not None:
+            self._allocate_codes(self._matrix.shape[0], self._matrix.shape[1])
+            for start in range(0, len(self.ids), SCORE_BLOCK_ROWS):
+                rows = np.arange(start, min(start + SCORE_BLOCK_ROWS, len(self.ids)))
+                self._set_codes(rows, np.asarray(self._matrix[rows], dtype=np.float32))
+        logger.info(f"Vector index {self.name} loaded: {len(self.ids)} vectors")
+
+    def _ensure_capacity(self, needed: int, dim: int):
+        """Grow the memory-mapped matrix geometrically so appends stay amortized O(1)"""
+        if self._matrix is not None:
+            if self._matrix.shape[1] != dim:
+                raise ValueError(f"Embedding dimension {dim} does not match index dimension {self._matrix.shape[1]}")
+            if self._matrix.shape[0] >= needed:
+                return
+
+        capacity = max(needed, 64, 2 * (self._matrix.shape[0] if self._matrix is not None else 0))
+        temp_path = self._matrix_path.with_suffix(".tmp.npy")
+        grown = np.lib.format.open_memmap(temp_path, mode="w+", dtype=self.dtype, shape=(capacity, dim))
+        if self._matrix is not None:
+            grown[:len(self.ids)] = self._matrix[:len(self.ids)]
+        grown.flush()
+        del grown
+
+        self._matrix = None
+        os.replace(temp_path, self._matrix_path)
+        self._matrix = np.load(self._matrix_path, mmap_mode="r+")
+
+        if self.quantization is not None:
+            self._allocate_codes(capacity, dim)
+
+    def _allocate_codes(self, capacity: int, dim: int):
+        """Size the resident quantized matrix to the file's capacity, keeping current rows"""
+        codes = np.zeros((capacity, dim), dtype=np.int8 if self.quantization == "int8" else np.float16)
+        scales = np.ones(capacity, dtype=np.float32)
+        if self._codes is not None:
+            count = len(self.ids)
+            codes[:count] = self._codes[:count]
+            scales[:count] = self._scales[:count]
+        self._codes, self._scales = codes, scales
+
+    def _set_codes(self, rows: np.ndarray, vectors: np.ndarray):
+        """Quantize normalized float32 vectors into the resident rows"""
+        if self.quantization == "int8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            self._codes[rows] = np.rint(vectors / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+        else:
+            self._codes[rows] = vectors.astype(np.float16)
+
+    @property
+    def resident_bytes(self) -> int:
+        """Memory held for searching: the quantized rows, or the mapped file rows"""
+        count = len(self.ids)
+        if self._matrix is None:
+            return 0
+        if self.quantization is None:
+            return count * self._matrix.shape[1] * self.dtype.itemsize
+        return count * (self._codes.shape[1] * self._codes.itemsize + (4 if self.quantization == "int8" else 0))
+
+    def _filter_keys(self, metadata: Dict[str, Any]) -> Iterable[Tuple[str, Any]]:
+        for field, value in metadata.items():
+            if field in self.filter_fields or field.startswith("tag:"):
+                yield field, value
+
+    def _index_metadata(self, voice_id: str, metadata: Dict[str, Any]):
+        for key in self._filter_keys(metadata):
+            self._postings.setdefault(key, set()).add(voice_id)
+
+    def _unindex_metadata(self, voice_id: str, metadata: Dict[str, Any]):
+        for key in self._filter_keys(metadata):
+            posting = self._postings.get(key)
+            if posting is not None:
+                posting.discard(voice_id)
+                if not posting:
+                    del self._postings[key]
+
+    def _matching_ids(self, where: Dict[str, Any]) -> Set[str]:
+        """Ids whose metadata equals every value in where"""
+        indexed = [key for key in where.items() if key[0] in self.filter_fields or key[0].startswith("tag:")]
+        if indexed:
+            postings = sorted((self._postings.get(key, set()) for key in indexed), key=len)
+            matches = set(postings[0]).intersection(*postings[1:])
+        else:
+            matches = set(self.ids)
+
+        # Fields without an inverted index are checked on the remaining candidates
+        others = {field: value for field, value in where.items() if (field, value) not in indexed}
+        if others:
+            matches = {
+                voice_id for voice_id in matches
+                if all(self.metadatas[self._rows[voice_id]].get(f) == v for f, v in others.items())
+            }
+        return matches
+
+    @staticmethod
+    def _normalize(embeddings: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.maximum(norms, 1e-12)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Add or replace vectors; the files are written once per call"""
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        metadatas = metadatas or [{} for _ in ids]
+
+        with self._lock:
+            new_ids = [voice_id for voice_id in dict.fromkeys(ids) if voice_id not in self._rows]
+            self._ensure_capacity(len(self.ids) + len(new_ids), vectors.shape[1])
+
+            for voice_id in new_ids:
+                self._rows[voice_id] = len(self.ids)
+                self.ids.append(voice_id)
+                self.metadatas.append({})
+
+            rows = np.array([self._rows[voice_id] for voice_id in ids])
+            self._matrix[rows] = vectors.astype(self.dtype)
+            if self.quantization is not None:
+                self._set_codes(rows, vectors)
+            for voice_id, row, metadata in zip(ids, rows, metadatas):
+                self._unindex_metadata(voice_id, self.metadatas[row])
+                self.metadatas[row] = dict(metadata)
+                self._index_metadata(voice_id, self.metadatas[row])
+
+            self._matrix.flush()
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (row, id, metadata) VALUES (?, ?, ?)",
+                    [(int(row), self.ids[row], json.dumps(self.metadatas[row])) for row in set(rows.tolist())]
+                )
+                conn.commit()
+            if self._ann is not None:
+                self._ann_add(rows, vectors)
+
+    def get(self, voice_id: str) -> Optional[np.ndarray]:
+        """Get the stored (normalized) vector for an id"""
+        with self._lock:
+            row = self._rows.get(voice_id)
+            if row is None:
+                return None
+            return np.asarray(self._matrix[row], dtype=np.float32)
+
+    def delete(self, ids: List[str]):
+        """Remove vectors by moving the last row into each freed slot"""
+        with self._lock, self._connect() as conn:
+            for voice_id in ids:
+                row = self._rows.pop(voice_id, None)
+                if row is None:
+                    continue
+                self._unindex_metadata(voice_id, self.metadatas[row])
+                conn.execute("DELETE FROM vectors WHERE id = ?", (voice_id,))
+
+                last = len(self.ids) - 1
+                if row != last:
+                    self._matrix[row] = self._matrix[last]
+                    if self._codes is not None:
+                        self._codes[row] = self._codes[last]
+                        self._scales[row] = self._scales[last]
+                    self.ids[row] = self.ids[last]
+                    self.metadatas[row] = self.metadatas[last]
+                    self._rows[self.ids[row]] = row
+                    conn.execute("UPDATE vectors SET row = ? WHERE id = ?", (row, self.ids[row]))
+                    if self._ann is not None:
+                        self._ann.add_items(np.asarray(self._matrix[row:row + 1], dtype=np.float32), [row])
+                if self._ann is not None:
+                    self._ann.mark_deleted(last)
+                self.ids.pop()
+                self.metadatas.pop()
+
+            if self._matrix is not None:
+                self._matrix.flush()
+            conn.commit()
+
+    def _build_ann(self):
+        """Build the HNSW index over the current rows, labelled by row number"""
+        count = len(self.ids)
+        index = hnswlib.Index(space="ip", dim=self._matrix.shape[1])
+        index.init_index(max_elements=max(count, 64), ef_construction=200, M=16)
+        index.add_items(np.asarray(self._matrix[:count], dtype=np.float32), np.arange(count))
+        self._ann = index
+        logger.info(f"HNSW index built for {self.name}: {count} vectors")
+
+    def _ann_add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Insert or update rows in the HNSW index, growing it geometrically"""
+        capacity = self._ann.get_max_elements()
+        if len(self.ids) > capacity:
+            self._ann.resize_index(max(len(self.ids), 2 * capacity))
+        # A row number freed by a delete is reused here, which also clears its deleted mark
+        self._ann.add_items(vectors, rows)
+
+    def _scores(self, rows: Optional[np.ndarray], queries: np.ndarray) -> np.ndarray:
+        """Similarity of each candidate row (all rows when rows is None) to each query, (rows, queries)"""
+        if self.quantization is None:
+            matrix = self._matrix[:len(self.ids)] if rows is None else self._matrix[rows]
+            return np.asarray(matrix @ queries.T.astype(self.dtype), dtype=np.float32)
+
+        # Quantized rows are converted block by block, so scoring never
+        # materializes a float32 copy of the whole library
+        total = len(self.ids) if rows is None else len(rows)
+        scores = np.empty((total, len(queries)), dtype=np.float32)
+        for start in range(0, total, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, total)
+            block = slice(start, end) if rows is None else rows[start:end]
+            scores[start:end] = self._codes[block].astype(np.float32) @ queries.T
+            if self.quantization == "int8":
+                scores[start:end] *= self._scales[block][:, None]
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k highest scores, best first"""
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        return top[np.argsort(-scores[top])]
+
+    def _rank(
+        self,
+        rows: Optional[np.ndarray],
+        scores: np.ndarray,
+        query: np.ndarray,
+        k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows of the k best candidates for one query and their cosine distances"""
+        if self.quantization is None:
+            top = self._top(scores, k)
+            return (top if rows is None else rows[top]), 1.0 - scores[top]
+
+        # Re-rank the shortlist against the full-precision rows
+        shortlist = self._top(scores, k * self.rerank_factor)
+        shortlist_rows = np.sort(shortlist if rows is None else rows[shortlist])
+        exact = np.asarray(self._matrix[shortlist_rows], dtype=np.float32) @ query
+        top = self._top(exact, k)
+        return shortlist_rows[top], 1.0 - exact[top]
+
+    def query(
+        self,
+        embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Find the nearest vectors by cosine distance
+
+        Args:
+            embedding: Query vector
+            n_results: Number of results to return
+            where: Metadata equality filter applied before scoring
+            exclude_ids: Ids never returned (e.g. the query voice itself)
+
+        Returns:
+            Dictionary with ids, distances (1 - cosine similarity) and
+            metadatas, nearest first
+        """
+        return self.query_batch([embedding], n_results, where, exclude_ids)[0]
+
+    def query_batch(
+        self,
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the nearest vectors for many queries at once
+
+        The candidate rows are read once and scored against every query in
+        the same matrix product, so a batch costs about as much memory
+        traffic as a single query.
+
+        Returns:
+            One result dictionary (as returned by query) per embedding
+        """
+        queries = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1))
+        excluded = set(exclude_ids or ())
+
+        with self._lock:
+            count = len(self.ids)
+
+            rows = None
+            if where:
+                candidates = self._matching_ids(where) - excluded
+                rows = np.sort(np.fromiter((self._rows[voice_id] for voice_id in candidates), dtype=np.int64))
+
+            # Excluded ids are dropped after scoring when the whole index is searched
+            k = min(n_results + (0 if where else len(excluded)), count if rows is None else len(rows))
+            if k <= 0 or len(queries) == 0:
+                return [{'ids': [], 'distances': [], 'metadatas': []} for _ in queries]
+
+            if rows is None and hnswlib is not None and count >= self.ann_threshold:
+                if self._ann is None:
+                    self._build_ann()
+                self._ann.set_ef(max(50, 2 * k))
+                ranked = list(zip(*self._ann.knn_query(queries, k=k)))
+            else:
+                scores = self._scores(rows, queries)
+                ranked = [self._rank(rows, scores[:, i], query, k) for i, query in enumerate(queries)]
+
+            batch = []
+            for top_rows, distances in ranked:
+                results = [
+                    (self.ids[row], float(distance), row)
+                    for row, distance in zip(top_rows, distances)
+                    if self.ids[row] not in excluded
+                ][:n_results]
+                batch.append({
+                    'ids': [voice_id for voice_id, _, _ in results],
+                    'distances': [distance for _, distance, _ in results],
+                    'metadatas': [dict(self.metadatas[row]) for _, _, row in results]
+                })
+            return batch
+
+    def reset(self):
+        """Remove all vectors and their files"""
+        with self._lock:
+            self.ids, self.metadatas, self._rows, self._postings = [], [], {}, {}
+            self._matrix, self._ann = None, None
+            self._codes, self._scales = None, None
+            self._matrix_path.unlink(missing_ok=True)
+            with self._connect() as conn:
+                conn.execute("DELETE FROM vectors")
+                conn.commit()
@@ -0,0 +1,160 @@
+"""
+Import vectors from older storage layouts into the configured vector store
+
+Voice embeddings used to be kept three times: in ChromaDB, as .npy files
+under voice_embeddings/ and as encrypted copies of those files. The vector
+store is now the only copy. This tool copies ChromaDB collections into the
+numpy backend (or numpy matrices into ChromaDB), then imports any legacy
+embedding files the store does not already hold.
+
+Usage:
+    python -m app.database.vector_migration --source chroma
+    python -m app.database.vector_migration --legacy-dir voice_embeddings --remove-legacy
+"""
+
+import io
+import argparse
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from ..core.config import settings
+from .vector_index import NumpyVectorIndex
+from .vector_store import VectorStore
+
+COLLECTIONS = ("voice_embeddings", "audio_features")
+
+Batch = Tuple[List[str], List[List[float]], List[dict]]
+
+
+def _read_chroma(path: str, name: str, batch_size: int) -> Iterator[Batch]:
+    """Page through a ChromaDB collection"""
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=path, settings=Settings(anonymized_telemetry=False, allow_reset=True))
+    if name not in [collection.name for collection in client.list_collections()]:
+        return
+    collection = client.get_collection(name)
+
+    for offset in range(0, collection.count(), batch_size):
+        page = collection.get(include=["embeddings", "metadatas"], limit=batch_size, offset=offset)
+        yield (
+            page["ids"],
+            [list(map(float, embedding)) for embedding in page["embeddings"]],
+            [metadata or {} for metadata in page["metadatas"]]
+        )
+
+
+def _read_numpy(path: str, name: str, batch_size: int, dtype: str) -> Iterator[Batch]:
+    """Read the rows of a numpy index"""
+    index = NumpyVectorIndex(path, name, dtype=dtype)
+    for start in range(0, len(index), batch_size):
+        ids = index.ids[start:start + batch_size]
+        yield ids, [index.get(voice_id).tolist() for voice_id in ids], index.metadatas[start:start + batch_size]
+
+
+def _read_legacy_file(path: Path) -> np.ndarray:
+    """Load a voice_embeddings/<clone_id>.npy file, decrypting it if needed"""
+    if path.name.endswith(".encrypted"):
+        from ..security import get_encryption
+        with get_encryption().open_decrypted(str(path)) as source:
+            return np.load(io.BytesIO(source.read()))
+    return np.load(path)
+
+
+def migrate_collections(
+    source: str,
+    target: VectorStore,
+    source_path: str,
+    batch_size: int = 1000,
+    source_dtype: str = settings.VECTOR_STORE_DTYPE
+) -> Dict[str, int]:
+    """
+    Copy every collection from the source backend into the target store
+
+    Args:
+        source: Backend the data is read from, "chroma" or "numpy"
+        target: Store the data is written to; must use the other backend
+        source_path: Directory of the source data
+        batch_size: Vectors read and written per batch
+        source_dtype: Storage dtype of a numpy source
+
+    Returns:
+        Number of vectors copied per collection
+    """
+    if source == target.backend:
+        raise ValueError(f"Source and target backends are both {source}")
+
+    readers = {
+        "chroma": lambda name: _read_chroma(source_path, name, batch_size),
+        "numpy": lambda name: _read_numpy(source_path, name, batch_size, source_dtype)
+    }
+    indexes = {"voice_embeddings": target.voice_index, "audio_features": target.audio_index}
+
+    copied = {}
+    for name in COLLECTIONS:
+        copied[name] = 0
+        for ids, embeddings, metadatas in readers[source](name):
+            indexes[name].add(ids, embeddings, metadatas)
+            copied[name] += len(ids)
+        logger.info(f"Migrated {copied[name]} vectors from {source} collection {name}")
+    return copied
+
+
+def migrate_legacy_files(target: VectorStore, legacy_dir: str, remove: bool = False) -> Dict[str, int]:
+    """
+    Import voice_embeddings/<clone_id>.npy[.encrypted] files missing from the store
+
+    Args:
+        target: Store the embeddings are written to
+        legacy_dir: Directory holding the legacy files
+        remove: Delete each file once its embedding is in the store
+
+    Returns:
+        Counts of imported, already present and removed files
+    """
+    counts = {"imported": 0, "present": 0, "removed": 0}
+    files = sorted(Path(legacy_dir).glob("*.npy")) + sorted(Path(legacy_dir).glob("*.npy.encrypted"))
+
+    for path in files:
+        clone_id = path.name.split(".npy")[0]
+        if target.get_voice_embedding(clone_id) is not None:
+            counts["present"] += 1
+        else:
+            embedding = _read_legacy_file(path)
+            target.store_voice_embeddings([clone_id], [embedding.astype(np.float32).tolist()], [{"clone_id": clone_id}])
+            counts["imported"] += 1
+
+        if remove:
+            path.unlink()
+            counts["removed"] += 1
+
+    logger.info(
+        f"Legacy embedding files: {counts['imported']} imported, "
+        f"{counts['present']} already stored, {counts['removed']} removed"
+    )
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Migrate vector data into the configured vector store")
+    parser.add_argument("--source", choices=["chroma", "numpy"], help="Backend to copy collections from")
+    parser.add_argument("--source-path", default=settings.CHROMADB_PATH, help="Directory of the source data")
+    parser.add_argument("--source-dtype", default=settings.VECTOR_STORE_DTYPE, help="Storage dtype of a numpy source")
+    parser.add_argument("--legacy-dir", default="voice_embeddings", help="Directory of legacy .npy embedding files")
+    parser.add_argument("--remove-legacy", action="store_true", help="Delete legacy files once imported")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    target = VectorStore()
+    if args.source:
+        migrate_collections(args.source, target, args.source_path, args.batch_size, args.source_dtype)
+    if Path(args.legacy_dir).is_dir():
+        migrate_legacy_files(target, args.legacy_dir, remove=args.remove_legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,190 @@
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from loguru import logger
 
+from ..core.config import settings
+from .vector_index import NumpyVectorIndex
 
-class VectorStore:
-    def __init__(self, persist_directory: str = "vectordb"):
-        self.persist_directory = Path(persist_directory)
-        self.persist_directory.mkdir(parents=True, exist_ok=True)
+
+class ChromaVectorIndex:
+    """ChromaDB collection behind the same interface as NumpyVectorIndex"""
+    
+    def __init__(self, collection, max_batch_size: int = 5000):
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+    
+    def __len__(self) -> int:
+        return self.collection.count()
+    
+    def add(
+        self,
+        ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        # Chroma rejects empty metadata dicts, but accepts None
+        metadatas = [metadata or None for metadata in metadatas] if metadatas else None
         
-        self.client = chromadb.PersistentClient(
-            path=str(self.persist_directory),
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        # Upsert so that, as with NumpyVectorIndex, adding an existing id
+        # replaces it; Chroma rejects writes above its maximum batch size
+        for start in range(0, len(ids), self.max_batch_size):
+            end = start + self.max_batch_size
+            self.collection.upsert(
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end] if metadatas else None,
+                ids=ids[start:end]
             )
-        )
+    
+    def get(self, voice_id: str) -> Optional[np.ndarray]:
+        result = self.collection.get(ids=[voice_id], include=['embeddings'])
+        if result['embeddings'] is not None and len(result['embeddings']):
+            return np.asarray(result['embeddings'][0], dtype=np.float32)
+        return None
+    
+    def delete(self, ids: List[str]):
+        self.collection.delete(ids=ids)
+    
+    def query(
+        self,
+        embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        return self.query_batch([embedding], n_results, where, exclude_ids)[0]
+    
+    def query_batch(
+        self,
+        embeddings: List[List[float]],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        if not embeddings:
+            return []
+        excluded = set(exclude_ids or ())
         
-        self.voice_embeddings_collection = self.client.get_or_create_collection(
-            name="voice_embeddings",
-            metadata={"hnsw:space": "cosine"}
-        )
+        # Chroma applies the metadata filter before the nearest-neighbour search
+        conditions = [{field: value} for field, value in (where or {}).items()]
+        chroma_where = None
+        if len(conditions) == 1:
+            chroma_where = conditions[0]
+        elif conditions:
+            chroma_where = {"$and": conditions}
         
-        self.audio_features_collection = self.client.get_or_create_collection(
-            name="audio_features", 
-            metadata={"hnsw:space": "cosine"}
+        # Embeddings of the matches are never used, so they are not fetched
+        results = self.collection.query(
+            query_embeddings=embeddings,
+            n_results=n_results + len(excluded),
+            where=chroma_where,
+            include=['metadatas', 'distances']
         )
         
-        logger.info(f"Vector store initialized at {self.persist_directory}")
+        batch = []
+        for i in range(len(embeddings)):
+            ids = results['ids'][i] if results['ids'] else []
+            distances = results['distances'][i] if results['distances'] else []
+            metadatas = results['metadatas'][i] if results['metadatas'] else []
+            kept = [j for j, voice_id in enumerate(ids) if voice_id not in excluded][:n_results]
+            batch.append({
+                'ids': [ids[j] for j in kept],
+                'distances': [distances[j] for j in kept],
+                'metadatas': [metadatas[j] or {} for j in kept]
+            })
+        return batch
+
+
+def voice_filter(
+    user_id: Optional[str] = None,
+    language: Optional[str] = None,
+    tags: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build a metadata filter for voice similarity search
+    
+    Tags are stored as one boolean "tag:<name>" metadata key per tag (see
+    voice_metadata), so every backend can filter them by equality.
+    """
+    where: Dict[str, Any] = {}
+    if user_id is not None:
+        where["user_id"] = user_id
+    if language is not None:
+        where["language"] = language
+    for tag in tags or ():
+        where[f"tag:{tag}"] = True
+    return where
+
+
+def voice_metadata(
+    language: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    **fields: Any
+) -> Dict[str, Any]:
+    """Build voice metadata with filterable language and tag keys, dropping unset values"""
+    metadata = {field: value for field, value in fields.items() if value is not None}
+    if language is not None:
+        metadata["language"] = language
+    for tag in tags or ():
+        metadata[f"tag:{tag}"] = True
+    return metadata
+
+
+class VectorStore:
+    """
+    Voice embedding and audio feature storage
+    
+    The backend is chosen by VECTOR_STORE_BACKEND: "chroma" keeps vectors in
+    a ChromaDB persistent client, "numpy" in memory-mapped matrices searched
+    in-process (see NumpyVectorIndex). Both expose the same methods.
+    
+    This is the only copy of voice embeddings; clones refer to theirs as
+    "voice_embeddings/<clone_id>" (see embedding_ref). Data from older
+    layouts is imported with app.database.vector_migration.
+    """
+    
+    def __init__(
+        self,
+        persist_directory: str = settings.CHROMADB_PATH,
+        backend: str = settings.VECTOR_STORE_BACKEND
+    ):
+        self.persist_directory = Path(persist_directory)
+        self.persist_directory.mkdir(parents=True, exist_ok=True)
+        self.backend = backend
+        self.client = None
+        
+        if backend == "numpy":
+            options = dict(
+                dtype=settings.VECTOR_STORE_DTYPE,
+                ann_threshold=settings.VECTOR_ANN_THRESHOLD,
+                quantization=None if settings.VECTOR_STORE_QUANTIZATION == "none" else settings.VECTOR_STORE_QUANTIZATION,
+                rerank_factor=settings.VECTOR_RERANK_FACTOR
+            )
+            self.voice_index = NumpyVectorIndex(self.persist_directory, "voice_embeddings", **options)
+            self.audio_index = NumpyVectorIndex(self.persist_directory, "audio_features", **options)
+        elif backend == "chroma":
+            self.client = chromadb.PersistentClient(
+                path=str(self.persist_directory),
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
+            )
+            max_batch_size = self.client.get_max_batch_size()
+            self.voice_index = ChromaVectorIndex(self.client.get_or_create_collection(
+                name="voice_embeddings",
+                metadata={"hnsw:space": "cosine"}
+            ), max_batch_size)
+            self.audio_index = ChromaVectorIndex(self.client.get_or_create_collection(
+                name="audio_features", 
+                metadata={"hnsw:space": "cosine"}
+            ), max_batch_size)
+        else:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        
+        logger.info(f"Vector store initialized at {self.persist_directory} ({backend} backend)")
     
     def store_voice_embedding(
         self, 
@@ -38,28 +194,38 @@ class VectorStore:
     ):
         """Store voice embedding for voice cloning"""
         try:
-            self.voice_embeddings_collection.add(
-                embeddings=[embedding],
-                metadatas=[metadata or {}],
-                ids=[voice_id]
-            )
+            self.voice_index.add([voice_id], [embedding], [metadata or {}])
             logger.info(f"Voice embedding stored: {voice_id}")
             
         except Exception as e:
             logger.error(f"Failed to store voice embedding {voice_id}: {e}")
             raise
     
+    def store_voice_embeddings(
+        self,
+        voice_ids: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Store many voice embeddings in one batched write"""
+        try:
+            self.voice_index.add(voice_ids, embeddings, metadatas or [{} for _ in voice_ids])
+            logger.info(f"Voice embeddings stored: {len(voice_ids)}")
+            
+        except Exception as e:
+            logger.error(f"Failed to store {len(voice_ids)} voice embeddings: {e}")
+            raise
+    
+    @staticmethod
+    def embedding_ref(voice_id: str) -> str:
+        """Reference to a voice embedding in the store, recorded on voice clones"""
+        return f"voice_embeddings/{voice_id}"
+    
     def get_voice_embedding(self, voice_id: str) -> Optional[List[float]]:
         """Retrieve voice embedding by ID"""
         try:
-            result = self.voice_embeddings_collection.get(
-                ids=[voice_id],
-                include=['embeddings']
-            )
-            
-            if result['embeddings']:
-                return result['embeddings'][0]
-            return None
+            embedding = self.voice_index.get(voice_id)
+            return embedding.tolist() if embedding is not None else None
             
         except Exception as e:
             logger.error(f"Failed to get voice embedding {voice_id}: {e}")
@@ -68,25 +234,26 @@ class VectorStore:
     def find_similar_voices(
         self, 
         query_embedding: List[float], 
-        n_results: int = 5
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
-        """Find similar voices based on embedding"""
+        """
+        Find similar voices based on embedding
+        
+        Args:
+            query_embedding: Embedding to compare against
+            n_results: Number of results to return
+            where: Metadata equality filter applied before the search
+                (see voice_filter)
+            exclude_ids: Voice ids to leave out of the results
+        """
         try:
-            results = self.voice_embeddings_collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results,
-                include=['embeddings', 'metadatas', 'distances']
-            )
-            
-            return {
-                'ids': results['ids'][0] if results['ids'] else [],
-                'distances': results['distances'][0] if results['distances'] else [],
-                'metadatas': results['metadatas'][0] if results['metadatas'] else []
-            }
+            return self.voice_index.query(query_embedding, n_results, where=where, exclude_ids=exclude_ids)
             
         except Exception as e:
             logger.error(f"Failed to find similar voices: {e}")
-            return {'ids': [], 'distances': [], 'metadatas': []}
+            raise
     
     def store_audio_features(
         self, 
@@ -96,44 +263,71 @@ class VectorStore:
     ):
         """Store audio features for analysis and retrieval"""
         try:
-            self.audio_features_collection.add(
-                embeddings=[features],
-                metadatas=[metadata or {}],
-                ids=[audio_id]
-            )
+            self.audio_index.add([audio_id], [features], [metadata or {}])
             logger.info(f"Audio features stored: {audio_id}")
             
         except Exception as e:
             logger.error(f"Failed to store audio features {audio_id}: {e}")
             raise
     
+    def store_audio_features_batch(
+        self,
+        audio_ids: List[str],
+        features: List[List[float]],
+        metadatas: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Store audio features for many files in one batched write"""
+        try:
+            self.audio_index.add(audio_ids, features, metadatas or [{} for _ in audio_ids])
+            logger.info(f"Audio features stored: {len(audio_ids)}")
+            
+        except Exception as e:
+            logger.error(f"Failed to store {len(audio_ids)} audio features: {e}")
+            raise
+    
+    def get_audio_features(self, audio_id: str) -> Optional[List[float]]:
+        """Get stored audio features"""
+        try:
+            embedding = self.audio_index.get(audio_id)
+            return embedding.tolist() if embedding is not None else None
+            
+        except Exception as e:
+            logger.error(f"Failed to get audio features {audio_id}: {e}")
+            return None
+    
     def search_audio_by_features(
         self, 
         query_features: List[float], 
-        n_results: int = 10
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        exclude_ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """Search for similar audio by features"""
         try:
-            results = self.audio_features_collection.query(
-                query_embeddings=[query_features],
-                n_results=n_results,
-                include=['embeddings', 'metadatas', 'distances']
-            )
-            
-            return {
-                'ids': results['ids'][0] if results['ids'] else [],
-                'distances': results['distances'][0] if results['distances'] else [],
-                'metadatas': results['metadatas'][0] if results['metadatas'] else []
-            }
+            return self.audio_index.query(query_features, n_results, where, exclude_ids)
             
         except Exception as e:
             logger.error(f"Failed to search audio by features: {e}")
             return {'ids': [], 'distances': [], 'metadatas': []}
     
+    def search_audio_by_features_batch(
+        self,
+        query_features: List[List[float]],
+        n_results: int = 10,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Search for similar audio for many queries in one pass over the index"""
+        try:
+            return self.audio_index.query_batch(query_features, n_results, where)
+            
+        except Exception as e:
+            logger.error(f"Failed to search audio by features for {len(query_features)} queries: {e}")
+            return [{'ids': [], 'distances': [], 'metadatas': []} for _ in query_features]
+    
     def delete_voice_embedding(self, voice_id: str):
         """Delete voice embedding"""
         try:
-            self.voice_embeddings_collection.delete(ids=[voice_id])
+            self.voice_index.delete([voice_id])
             logger.info(f"Voice embedding deleted: {voice_id}")
             
         except Exception as e:
@@ -143,7 +337,11 @@ class VectorStore:
     def reset_collections(self):
         """Reset all collections (use with caution)"""
         try:
-            self.client.reset()
+            if self.client is not None:
+                self.client.reset()
+            else:
+                self.voice_index.reset()
+                self.audio_index.reset()
             logger.warning("All vector store collections have been reset")
             
         except Exception as e:
@@ -314,6 +314,21 @@ async def get_optional_user(request: Request) -> Optional[User]:
         return None
 
 
+def get_user_from_token(token: Optional[str]) -> Optional[User]:
+    """Get the active user a token belongs to, for connections that cannot send headers."""
+    if not token:
+        return None
+    try:
+        payload = jwt_manager.verify_token(token)
+        user = get_user_manager().get_user_by_id(payload["sub"])
+    except Exception:
+        return None
+    
+    if not user or user.status.value != "active":
+        return None
+    return user
+
+
 # Rate limiting decorator (basic implementation)
 def rate_limit(max_attempts: int = 5, window_minutes: int = 15):
     """Basic rate limiting decorator."""
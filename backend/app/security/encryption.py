@@ -1,18 +1,334 @@
 import os
+import io
+import hmac
+import json
+import math
 import secrets
+import struct
 from pathlib import Path
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import base64
-from typing import Optional
+from typing import Optional, Iterator, BinaryIO, Dict, List
 from loguru import logger
 from ..core.config import settings
 
 
+# Chunked container layout (all integers big-endian):
+#   header:  magic (4) | version (1) | chunk size (4) | key id (8) | file salt (16)
+#            (version 1 headers have no key id and use the primary key)
+#   chunks:  AES-256-GCM(plaintext chunk) + 16-byte tag, every chunk but the
+#            last holds exactly `chunk size` plaintext bytes
+# Each file gets its own subkey (HKDF over the file salt), so chunk nonces
+# can simply be the chunk index. The header, chunk index and a final-chunk
+# flag are authenticated with every chunk, which detects reordering,
+# truncation and header tampering.
+CONTAINER_MAGIC = b"SAEC"
+CONTAINER_VERSION = 2
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Chunk sizes a writer accepts; a reader rejects headers declaring anything
+# else, so a forged header cannot make it allocate an arbitrarily large chunk
+MIN_CHUNK_SIZE = 1024
+MAX_CHUNK_SIZE = 16 * 1024 * 1024
+TAG_SIZE = 16
+HEADERS = {
+    1: struct.Struct(">4sBI16s"),
+    2: struct.Struct(">4sBI8s16s"),
+}
+PBKDF2_ITERATIONS = 400000
+# Fernet tokens always start with version byte 0x80, base64-encoded
+LEGACY_FERNET_PREFIX = b"gAAAAA"
+
+
+def _file_cipher(key: bytes, file_salt: bytes) -> AESGCM:
+    """Per-file AES-GCM cipher derived from the master key"""
+    subkey = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=file_salt,
+        info=b"speech-app chunked file v1",
+    ).derive(key)
+    return AESGCM(subkey)
+
+
+def _chunk_nonce(index: int) -> bytes:
+    return b"\x00\x00\x00\x00" + struct.pack(">Q", index)
+
+
+def _chunk_aad(header: bytes, index: int, final: bool) -> bytes:
+    return header + struct.pack(">QB", index, int(final))
+
+
+def _key_id(key: bytes) -> bytes:
+    """Short public identifier of a derived key, stored in file headers"""
+    return hmac.new(key, b"speech-app key id", "sha256").digest()[:8]
+
+
+class DerivedKeyCache:
+    """
+    Permission-restricted file caching PBKDF2 output across processes
+
+    Entries are keyed by a fingerprint of (salt, master key, iterations), so
+    a new salt or a rotated master key simply misses and derives once. The
+    file holds key material and is only trusted when it is private to the
+    current user (mode 0600).
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    @staticmethod
+    def fingerprint(master_key: bytes, salt: bytes) -> str:
+        message = master_key + struct.pack(">I", PBKDF2_ITERATIONS)
+        return hmac.new(salt, message, "sha256").hexdigest()
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path.exists():
+            return {}
+        if self.path.stat().st_mode & 0o077:
+            logger.warning(f"Ignoring key cache {self.path}: permissions are not 0600")
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read key cache: {e}")
+            return {}
+
+    def get(self, master_key: bytes, salt: bytes) -> Optional[bytes]:
+        """Get a cached derived key"""
+        entry = self._load().get(self.fingerprint(master_key, salt))
+        return entry.encode() if entry else None
+
+    def put(self, master_key: bytes, salt: bytes, derived_key: bytes):
+        """Store a derived key, replacing the file atomically"""
+        entries = self._load()
+        entries[self.fingerprint(master_key, salt)] = derived_key.decode()
+
+        temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entries, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            temp_path.unlink(missing_ok=True)
+            logger.warning(f"Could not write key cache: {e}")
+
+
+class EncryptedFileWriter:
+    """
+    File-like sink that encrypts streamed plaintext into a chunked container
+
+    Plaintext is buffered only until a full chunk is available, so memory
+    use is bounded by the chunk size regardless of how much is written.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        sink: BinaryIO,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        path: Optional[Path] = None
+    ):
+        if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Chunk size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes")
+
+        self.sink = sink
+        self.path = path
+        self.chunk_size = chunk_size
+        self.header = HEADERS[CONTAINER_VERSION].pack(
+            CONTAINER_MAGIC, CONTAINER_VERSION, chunk_size, _key_id(key), secrets.token_bytes(16)
+        )
+        self._cipher = _file_cipher(key, self.header[-16:])
+        self._buffer = bytearray()
+        self._index = 0
+        self.closed = False
+
+        self.sink.write(self.header)
+
+    def _emit(self, chunk: bytes, final: bool):
+        self.sink.write(self._cipher.encrypt(
+            _chunk_nonce(self._index), chunk, _chunk_aad(self.header, self._index, final)
+        ))
+        self._index += 1
+
+    def write(self, data: bytes) -> int:
+        """Add plaintext to the encrypted file"""
+        self._buffer.extend(data)
+        # Hold back the last full chunk: it may turn out to be the final one
+        while len(self._buffer) > self.chunk_size:
+            self._emit(bytes(self._buffer[:self.chunk_size]), final=False)
+            del self._buffer[:self.chunk_size]
+        return len(data)
+
+    def close(self):
+        """Write the final chunk and close the file"""
+        if self.closed:
+            return
+        self._emit(bytes(self._buffer), final=True)
+        self._buffer = bytearray()
+        self.closed = True
+        if self.path is not None:
+            self.sink.close()
+
+    def abort(self):
+        """Discard everything written so far"""
+        self._buffer = bytearray()
+        self.closed = True
+        if self.path is not None:
+            self.sink.close()
+            self.path.unlink(missing_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class EncryptedFileReader:
+    """Random-access reader for a chunked container"""
+
+    def __init__(self, keys: Dict[bytes, bytes], source: BinaryIO, default_key: Optional[bytes] = None):
+        """
+        Args:
+            keys: Derived keys by key id
+            source: Seekable encrypted file
+            default_key: Key for version 1 containers, which carry no key id
+        """
+        self.source = source
+
+        prefix = source.read(5)
+        if len(prefix) != 5 or prefix[:4] != CONTAINER_MAGIC:
+            raise ValueError("Not an encrypted container")
+        header_struct = HEADERS.get(prefix[4])
+        if header_struct is None:
+            raise ValueError(f"Unsupported encrypted container version: {prefix[4]}")
+
+        self.header = prefix + source.read(header_struct.size - 5)
+        if len(self.header) != header_struct.size:
+            raise ValueError("Encrypted file is truncated")
+        self.header_size = header_struct.size
+
+        if prefix[4] == 1:
+            _, _, self.chunk_size, file_salt = header_struct.unpack(self.header)
+            key = default_key
+        else:
+            _, _, self.chunk_size, key_id, file_salt = header_struct.unpack(self.header)
+            key = keys.get(key_id)
+        if not MIN_CHUNK_SIZE <= self.chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError(f"Encrypted file declares an invalid chunk size: {self.chunk_size}")
+        if key is None:
+            raise ValueError("Encrypted file uses an unknown key")
+
+        self._cipher = _file_cipher(key, file_salt)
+
+        source.seek(0, os.SEEK_END)
+        body_size = source.tell() - self.header_size
+        stored_chunk = self.chunk_size + TAG_SIZE
+        self.chunk_count = max(1, math.ceil(body_size / stored_chunk))
+        last_chunk = body_size - (self.chunk_count - 1) * stored_chunk
+        if last_chunk < TAG_SIZE:
+            raise ValueError("Encrypted file is truncated")
+
+        self.size = (self.chunk_count - 1) * self.chunk_size + last_chunk - TAG_SIZE
+
+    def read_chunk(self, index: int) -> bytes:
+        """Decrypt and authenticate one chunk"""
+        stored_chunk = self.chunk_size + TAG_SIZE
+        self.source.seek(self.header_size + index * stored_chunk)
+        final = index == self.chunk_count - 1
+        return self._cipher.decrypt(
+            _chunk_nonce(index), self.source.read(stored_chunk), _chunk_aad(self.header, index, final)
+        )
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield plaintext bytes [start, end), decrypting only the chunks involved"""
+        end = self.size if end is None else min(end, self.size)
+        if start >= end:
+            return
+
+        for index in range(start // self.chunk_size, (end - 1) // self.chunk_size + 1):
+            chunk = self.read_chunk(index)
+            chunk_start = index * self.chunk_size
+            yield chunk[max(start - chunk_start, 0):end - chunk_start]
+
+
+class DecryptedFile(io.RawIOBase):
+    """
+    Read-only, seekable plaintext view of a chunked container
+
+    Chunks are decrypted on demand as the reader moves through the file, so
+    audio decoders can read or seek anywhere without the plaintext ever
+    being written to disk or held in memory as a whole.
+    """
+
+    def __init__(self, reader: EncryptedFileReader):
+        self.reader = reader
+        self._position = 0
+        self._chunk_index = -1
+        self._chunk = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.reader.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.reader.size:
+            return 0
+
+        index, offset = divmod(self._position, self.reader.chunk_size)
+        if index != self._chunk_index:
+            self._chunk = self.reader.read_chunk(index)
+            self._chunk_index = index
+
+        data = self._chunk[offset:offset + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.reader.source.close()
+        super().close()
+
+
 class FileEncryption:
-    def __init__(self, key: Optional[str] = None):
-        """Initialize encryption with secure key management."""
+    def __init__(self, key: Optional[str] = None, previous_keys: Optional[List[str]] = None):
+        """
+        Initialize encryption with secure key management.
+        
+        Args:
+            key: Master key for new files (defaults to ENCRYPTION_KEY)
+            previous_keys: Retired master keys still accepted for decryption
+                (defaults to ENCRYPTION_PREVIOUS_KEYS when key is not given)
+        """
         if key:
             # Use provided key for encryption
             if isinstance(key, str):
@@ -22,12 +338,29 @@ class FileEncryption:
             # Use key from settings or generate a secure one
             if settings.ENCRYPTION_KEY:
                 self.master_key = settings.ENCRYPTION_KEY.encode()
+                if previous_keys is None:
+                    previous_keys = settings.ENCRYPTION_PREVIOUS_KEYS
             else:
                 raise ValueError("ENCRYPTION_KEY not configured. Set ENCRYPTION_KEY environment variable.")
         
+        self.key_cache = DerivedKeyCache(settings.ENCRYPTION_KEY_CACHE) if settings.ENCRYPTION_KEY_CACHE else None
+        
         # Generate a random salt for each encryption instance
         self.salt = self._get_or_generate_salt()
-        self.cipher = Fernet(self._derive_key(self.master_key, self.salt))
+        self.chunk_size = DEFAULT_CHUNK_SIZE
+        
+        # Raw 256-bit keys for the chunked container, by key id; new files
+        # use the current key. Fernet reads legacy files.
+        derived_keys = [self._derive_key(self.master_key, self.salt)]
+        derived_keys += [self._derive_key(k.encode(), self.salt) for k in previous_keys or []]
+        
+        self.key = base64.urlsafe_b64decode(derived_keys[0])
+        self.key_id = _key_id(self.key)
+        self.keys = {}
+        for derived_key in derived_keys:
+            raw_key = base64.urlsafe_b64decode(derived_key)
+            self.keys[_key_id(raw_key)] = raw_key
+        self.cipher = MultiFernet([Fernet(derived_key) for derived_key in derived_keys])
     
     def _get_or_generate_salt(self) -> bytes:
         """Get existing salt or generate a new secure salt."""
@@ -55,18 +388,29 @@ class FileEncryption:
         return salt
     
     def _derive_key(self, password: bytes, salt: bytes) -> bytes:
-        """Derive encryption key from password with secure parameters."""
+        """Derive encryption key from password with secure parameters, at most once per key."""
+        if self.key_cache:
+            cached = self.key_cache.get(password, salt)
+            if cached:
+                return cached
+        
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=400000,  # Increased iterations for better security
+            iterations=PBKDF2_ITERATIONS,  # Increased iterations for better security
         )
         key = base64.urlsafe_b64encode(kdf.derive(password))
+        
+        if self.key_cache:
+            self.key_cache.put(password, salt, key)
         return key
     
+    def _reader(self, source: BinaryIO) -> EncryptedFileReader:
+        return EncryptedFileReader(self.keys, source, default_key=self.key)
+    
     def encrypt_file(self, file_path: str, encrypted_path: Optional[str] = None) -> str:
-        """Encrypt a file and save it to encrypted_path"""
+        """Encrypt a file into a chunked container at encrypted_path"""
         try:
             file_path = Path(file_path)
             if encrypted_path is None:
@@ -74,13 +418,9 @@ class FileEncryption:
             else:
                 encrypted_path = Path(encrypted_path)
             
-            with open(file_path, 'rb') as file:
-                file_data = file.read()
-            
-            encrypted_data = self.cipher.encrypt(file_data)
-            
-            with open(encrypted_path, 'wb') as encrypted_file:
-                encrypted_file.write(encrypted_data)
+            with open(file_path, 'rb') as file, self.open_writer(str(encrypted_path)) as writer:
+                while block := file.read(self.chunk_size):
+                    writer.write(block)
             
             logger.info(f"File encrypted: {file_path} -> {encrypted_path}")
             return str(encrypted_path)
@@ -89,8 +429,13 @@ class FileEncryption:
             logger.error(f"Encryption failed for {file_path}: {e}")
             raise
     
+    def open_writer(self, encrypted_path: str) -> EncryptedFileWriter:
+        """Open a writer that encrypts streamed plaintext into encrypted_path"""
+        path = Path(encrypted_path)
+        return EncryptedFileWriter(self.key, open(path, 'wb'), self.chunk_size, path=path)
+    
     def decrypt_file(self, encrypted_path: str, decrypted_path: Optional[str] = None) -> str:
-        """Decrypt a file and save it to decrypted_path"""
+        """Decrypt a file (chunked or legacy Fernet) and save it to decrypted_path"""
         try:
             encrypted_path = Path(encrypted_path)
             if decrypted_path is None:
@@ -98,27 +443,85 @@ class FileEncryption:
             else:
                 decrypted_path = Path(decrypted_path)
             
-            with open(encrypted_path, 'rb') as encrypted_file:
-                encrypted_data = encrypted_file.read()
-            
-            decrypted_data = self.cipher.decrypt(encrypted_data)
-            
             with open(decrypted_path, 'wb') as file:
-                file.write(decrypted_data)
+                for block in self.iter_decrypted(str(encrypted_path)):
+                    file.write(block)
             
             logger.info(f"File decrypted: {encrypted_path} -> {decrypted_path}")
             return str(decrypted_path)
             
         except Exception as e:
             logger.error(f"Decryption failed for {encrypted_path}: {e}")
+            if decrypted_path is not None and Path(decrypted_path).exists():
+                Path(decrypted_path).unlink()
             raise
     
+    def iter_decrypted(self, encrypted_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Stream the plaintext bytes [start, end) of an encrypted file"""
+        with open(encrypted_path, 'rb') as source:
+            prefix = source.read(len(LEGACY_FERNET_PREFIX))
+            source.seek(0)
+            
+            if prefix.startswith(CONTAINER_MAGIC):
+                yield from self._reader(source).iter_range(start, end)
+            elif prefix == LEGACY_FERNET_PREFIX:
+                # Legacy whole-file Fernet token: no random access
+                yield self.cipher.decrypt(source.read())[start:end]
+            else:
+                raise ValueError(f"Unrecognized encrypted file format: {encrypted_path}")
+    
+    def open_decrypted(self, encrypted_path: str) -> BinaryIO:
+        """
+        Open an encrypted file as a seekable plaintext file object
+        
+        Chunked containers are decrypted lazily; legacy Fernet files are
+        decrypted into memory. Nothing is written to disk either way.
+        """
+        source = open(encrypted_path, 'rb')
+        try:
+            prefix = source.read(len(LEGACY_FERNET_PREFIX))
+            source.seek(0)
+            
+            if prefix.startswith(CONTAINER_MAGIC):
+                return io.BufferedReader(DecryptedFile(self._reader(source)))
+            if prefix == LEGACY_FERNET_PREFIX:
+                with source:
+                    return io.BytesIO(self.cipher.decrypt(source.read()))
+            raise ValueError(f"Unrecognized encrypted file format: {encrypted_path}")
+        except Exception:
+            source.close()
+            raise
+    
+    def decrypt_range(self, encrypted_path: str, start: int, end: Optional[int] = None) -> bytes:
+        """Decrypt plaintext bytes [start, end) of an encrypted file"""
+        return b"".join(self.iter_decrypted(encrypted_path, start, end))
+    
+    def plaintext_size(self, encrypted_path: str) -> int:
+        """Get the decrypted size of an encrypted file without decrypting it"""
+        with open(encrypted_path, 'rb') as source:
+            if source.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC:
+                source.seek(0)
+                return self._reader(source).size
+        return sum(len(block) for block in self.iter_decrypted(encrypted_path))
+    
+    def write_encrypted(self, encrypted_path: str, data: bytes) -> str:
+        """Encrypt in-memory data straight into encrypted_path"""
+        with self.open_writer(encrypted_path) as writer:
+            writer.write(data)
+        return str(encrypted_path)
+    
     def encrypt_data(self, data: bytes) -> bytes:
-        """Encrypt raw bytes data"""
-        return self.cipher.encrypt(data)
+        """Encrypt raw bytes data into a chunked container"""
+        buffer = io.BytesIO()
+        writer = EncryptedFileWriter(self.key, buffer, self.chunk_size)
+        writer.write(data)
+        writer.close()
+        return buffer.getvalue()
     
     def decrypt_data(self, encrypted_data: bytes) -> bytes:
-        """Decrypt raw bytes data"""
+        """Decrypt raw bytes data (chunked container or legacy Fernet token)"""
+        if encrypted_data.startswith(CONTAINER_MAGIC):
+            return b"".join(self._reader(io.BytesIO(encrypted_data)).iter_range())
         return self.cipher.decrypt(encrypted_data)
 
 
@@ -1,8 +1,12 @@
 from .speech_to_text import WhisperSTTService, get_stt_service
 from .text_to_speech import DiaTTSService, get_tts_service
 from .translation import TranslationService, get_translation_service
+from .speaker_encoder import SpeakerEncoder, get_speaker_encoder
 from .voice_cloning import VoiceCloningService, get_voice_cloning_service
 from .file_handler import FileHandlerService, get_file_handler
+from .speech_translation import SpeechTranslationPipeline, get_speech_translation_pipeline
+from .job_queue import JobQueue, get_job_queue
+from .retention import RetentionService, get_retention_service
 
 __all__ = [
     "WhisperSTTService",
@@ -11,8 +15,16 @@ __all__ = [
     "get_tts_service",
     "TranslationService",
     "get_translation_service",
+    "SpeakerEncoder",
+    "get_speaker_encoder",
     "VoiceCloningService",
     "get_voice_cloning_service",
     "FileHandlerService",
-    "get_file_handler"
+    "get_file_handler",
+    "SpeechTranslationPipeline",
+    "get_speech_translation_pipeline",
+    "JobQueue",
+    "get_job_queue",
+    "RetentionService",
+    "get_retention_service"
 ]
\ No newline at end of file
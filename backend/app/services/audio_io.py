@@ -0,0 +1,192 @@
+import shutil
+import subprocess
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Union, BinaryIO
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import firwin, resample_poly
+from loguru import logger
+
+
+AudioSource = Union[str, Path, BinaryIO]
+
+# Containers decoded in-process by libsndfile; mp3 and m4a go through ffmpeg
+SOUNDFILE_FORMATS = {"wav", "flac", "ogg"}
+FFMPEG_FORMATS = {"mp3", "m4a"}
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """Identify the audio container from its first bytes"""
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def _read_header(source: AudioSource, size: int = 12) -> bytes:
+    """Read the first bytes of a path or seekable file without consuming them"""
+    if isinstance(source, (str, Path)):
+        with open(source, 'rb') as f:
+            return f.read(size)
+
+    position = source.tell()
+    header = source.read(size)
+    source.seek(position)
+    return header
+
+
+class PolyphaseResampler:
+    """
+    Rational-ratio polyphase FIR resampler
+
+    The anti-aliasing filter is the one scipy's resample_poly designs by
+    default (Kaiser window, beta 5), computed once per rate pair instead of
+    on every call.
+    """
+
+    def __init__(self, src_sr: int, dst_sr: int):
+        ratio = Fraction(dst_sr, src_sr)
+        self.src_sr = src_sr
+        self.dst_sr = dst_sr
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+
+        self.taps: Optional[np.ndarray] = None
+        if self.up != self.down:
+            max_rate = max(self.up, self.down)
+            half_len = 10 * max_rate
+            self.taps = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)).astype(np.float32)
+
+    def __call__(self, audio: np.ndarray) -> np.ndarray:
+        if self.taps is None:
+            return audio
+        return resample_poly(audio, self.up, self.down, window=self.taps)
+
+
+@lru_cache(maxsize=32)
+def get_resampler(src_sr: int, dst_sr: int) -> PolyphaseResampler:
+    """Get the shared resampler for a rate pair"""
+    return PolyphaseResampler(src_sr, dst_sr)
+
+
+@lru_cache(maxsize=16)
+def get_mel_filterbank(
+    sample_rate: int,
+    n_fft: int,
+    n_mels: int,
+    fmin: float = 0.0,
+    fmax: Optional[float] = None
+) -> np.ndarray:
+    """
+    Get the shared mel filterbank for a feature configuration
+
+    Returns:
+        Read-only float32 array of shape (n_mels, n_fft // 2 + 1)
+    """
+    import librosa
+
+    filters = librosa.filters.mel(
+        sr=sample_rate, n_fft=n_fft, n_mels=n_mels, fmin=fmin, fmax=fmax, dtype=np.float32
+    )
+    # Shared between callers, so it must not be modified in place
+    filters.setflags(write=False)
+    return filters
+
+
+def filter_cache_info() -> Dict[str, Dict[str, int]]:
+    """Hit/miss counters of the shared resampler and filterbank caches"""
+    return {
+        "resamplers": get_resampler.cache_info()._asdict(),
+        "mel_filterbanks": get_mel_filterbank.cache_info()._asdict()
+    }
+
+
+def _decode_soundfile(source: AudioSource, target_sr: int) -> np.ndarray:
+    audio, sr = sf.read(source, dtype="float32", always_2d=False)
+    if audio.ndim > 1:
+        # Mix down as a matrix-vector product; a strided mean over the
+        # channel axis is several times slower on interleaved frames
+        audio = audio @ np.full(audio.shape[1], 1.0 / audio.shape[1], dtype=np.float32)
+    return get_resampler(sr, target_sr)(audio)
+
+
+def _decode_ffmpeg(source: AudioSource, target_sr: int) -> np.ndarray:
+    """Decode with ffmpeg straight to mono float32 PCM at the target rate"""
+    from_pipe = not isinstance(source, (str, Path))
+    command = [
+        "ffmpeg", "-nostdin", "-loglevel", "error",
+        "-i", "pipe:0" if from_pipe else str(source),
+        "-f", "f32le", "-ac", "1", "-ar", str(target_sr),
+        "pipe:1"
+    ]
+    process = subprocess.run(
+        command,
+        input=source.read() if from_pipe else None,
+        capture_output=True,
+        check=False
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg decoding failed: {process.stderr.decode(errors='replace').strip()}")
+
+    return np.frombuffer(process.stdout, dtype=np.float32)
+
+
+def load_audio(source: AudioSource, target_sr: int = 16000) -> np.ndarray:
+    """
+    Decode audio to mono float32 at target_sr
+
+    The container is identified from its header rather than the file name,
+    so encrypted uploads opened in memory decode the same way as plain files.
+    wav, flac and ogg are decoded by libsndfile and resampled with a cached
+    polyphase filter; mp3 and m4a are decoded and resampled by ffmpeg in one
+    pass, falling back to libsndfile and librosa when ffmpeg cannot decode a
+    file object through its pipe. Arrays returned from ffmpeg are read-only
+    views of its output.
+
+    Args:
+        source: Path or seekable binary file object
+        target_sr: Output sample rate
+
+    Returns:
+        1-D float32 array of samples
+    """
+    audio_format = sniff_format(_read_header(source))
+    start = None if isinstance(source, (str, Path)) else source.tell()
+
+    if audio_format in FFMPEG_FORMATS and shutil.which("ffmpeg"):
+        try:
+            return _decode_ffmpeg(source, target_sr)
+        except RuntimeError as e:
+            if start is None:
+                raise
+            # Containers indexed at the end (m4a without faststart) cannot be
+            # demuxed from a pipe; decrypted audio is not spooled to disk, so
+            # try the in-process decoders on the same buffer instead
+            logger.debug(f"ffmpeg could not decode {audio_format} from a pipe: {e}")
+            source.seek(start)
+
+    try:
+        return _decode_soundfile(source, target_sr)
+    except RuntimeError:
+        # libsndfile errors subclass RuntimeError
+        if audio_format in SOUNDFILE_FORMATS:
+            raise
+
+    # Unknown container, or ffmpeg is not installed: use librosa's fallbacks
+    logger.debug(f"Falling back to librosa for {audio_format or 'unknown'} audio")
+    if start is not None:
+        source.seek(start)
+
+    import librosa
+    audio, _ = librosa.load(source, sr=target_sr, mono=True)
+    return audio.astype(np.float32, copy=False)
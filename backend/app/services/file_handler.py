@@ -1,15 +1,48 @@
 import os
 import uuid
+import hmac
 import hashlib
+import zipfile
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple, Union, AsyncIterator, BinaryIO
+from datetime import datetime
 import aiofiles
 from fastapi import UploadFile, HTTPException
 from loguru import logger
 
 from ..core.config import settings
 from ..security import get_encryption
+from ..database import get_artifact_index, get_blob_store
+
+
+class _ArchiveEntryReader:
+    """
+    Reads one zip entry, enforcing expansion limits on the bytes actually
+    inflated rather than the sizes the archive declares
+    """
+    
+    def __init__(self, source: BinaryIO, compressed_size: int, budget: Dict[str, int], max_ratio: float):
+        self.source = source
+        self.max_bytes = max(compressed_size, 1) * max_ratio
+        self.budget = budget
+        self.read_bytes = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.source.read(size)
+        self.read_bytes += len(data)
+        self.budget["remaining"] -= len(data)
+        
+        if self.budget["remaining"] < 0:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Archive too large. Max expanded size: {settings.VOICE_INGEST_MAX_ARCHIVE_BYTES / (1024*1024):.1f} MB"
+            )
+        if self.read_bytes > self.max_bytes:
+            raise HTTPException(status_code=413, detail="Archive entry compression ratio too high")
+        return data
+    
+    def close(self):
+        self.source.close()
 
 
 class FileHandlerService:
@@ -19,11 +52,16 @@ class FileHandlerService:
         self.upload_folder = Path(settings.UPLOAD_FOLDER)
         self.audio_output_folder = Path(settings.AUDIO_OUTPUT_FOLDER)
         self.max_file_size = settings.MAX_UPLOAD_SIZE
+        self.chunk_size = settings.UPLOAD_CHUNK_SIZE
         self.allowed_extensions = settings.ALLOWED_AUDIO_EXTENSIONS
         self.encryption = get_encryption() if settings.ENCRYPT_AUDIO_FILES else None
+        self.artifacts = get_artifact_index()
+        self.blobs = get_blob_store()
+        self.blob_folder = self.upload_folder / "blobs"
         
         # Ensure directories exist
         self.upload_folder.mkdir(parents=True, exist_ok=True)
+        self.blob_folder.mkdir(parents=True, exist_ok=True)
         self.audio_output_folder.mkdir(parents=True, exist_ok=True)
         
         logger.info(f"FileHandlerService initialized with encryption: {self.encryption is not None}")
@@ -67,17 +105,40 @@ class FileHandlerService:
         # Limit length
         return filename[:50] if len(filename) > 50 else filename
     
+    async def _read_upload_blocks(self, file: UploadFile) -> AsyncIterator[bytes]:
+        """Read an upload in fixed-size blocks, enforcing the size limit mid-stream"""
+        received = 0
+        while True:
+            block = await file.read(self.chunk_size)
+            if not block:
+                break
+            
+            received += len(block)
+            if received > self.max_file_size:
+                raise HTTPException(
+                    status_code=413, 
+                    detail=f"File too large. Max size: {self.max_file_size / (1024*1024):.1f} MB"
+                )
+            yield block
+    
     async def save_upload_file(
         self, 
         file: UploadFile, 
-        subfolder: Optional[str] = None
+        subfolder: Optional[str] = None,
+        owner: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Save uploaded file securely
         
+        Uploads are stored once per distinct content under the blob folder,
+        named by a keyed hash of their SHA-256; saving content that is already
+        stored adds a reference instead of writing a second copy.
+        
         Args:
             file: FastAPI UploadFile object
-            subfolder: Optional subfolder within upload directory
+            subfolder: Kept for compatibility; content-addressed uploads are
+                shared across callers and no longer split by subfolder
+            owner: Optional user ID recorded in the artifact index
         
         Returns:
             Dictionary with file information
@@ -97,46 +158,61 @@ class FileHandlerService:
                     detail=f"File too large. Max size: {self.max_file_size / (1024*1024):.1f} MB"
                 )
             
-            # Generate secure filename
-            secure_filename = self.generate_secure_filename(file.filename)
-            
-            # Determine save path
-            save_dir = self.upload_folder
-            if subfolder:
-                save_dir = save_dir / subfolder
-                save_dir.mkdir(parents=True, exist_ok=True)
-            
-            file_path = save_dir / secure_filename
-            
-            # Save file
-            async with aiofiles.open(file_path, 'wb') as f:
-                content = await file.read()
-                await f.write(content)
-            
-            # Get file info
-            file_size = len(content)
-            file_hash = hashlib.sha256(content).hexdigest()
-            
-            # Encrypt if required
-            final_path = str(file_path)
-            if self.encryption:
-                encrypted_path = str(file_path) + '.encrypted'
-                self.encryption.encrypt_file(str(file_path), encrypted_path)
-                file_path.unlink()  # Remove unencrypted file
-                final_path = encrypted_path
+            # Stream to a temporary file first: the content hash, and so the
+            # final name, is only known once the whole upload has been read
+            extension = Path(file.filename).suffix.lower()
+            temp_path = self.blob_folder / f".{uuid.uuid4().hex}.part"
+            
+            # Stream the upload block by block: hash, size-check and write each
+            # block as it arrives so memory use does not grow with file size
+            hasher = hashlib.sha256()
+            file_size = 0
+            
+            try:
+                if self.encryption:
+                    with self.encryption.open_writer(str(temp_path)) as writer:
+                        async for block in self._read_upload_blocks(file):
+                            hasher.update(block)
+                            file_size += len(block)
+                            writer.write(block)
+                else:
+                    async with aiofiles.open(temp_path, 'wb') as f:
+                        async for block in self._read_upload_blocks(file):
+                            hasher.update(block)
+                            file_size += len(block)
+                            await f.write(block)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+            
+            file_hash = hasher.hexdigest()
+            final_path, deduplicated = self._store_blob(temp_path, file_hash, extension, file_size)
+            
+            # Index for retention; a repeated upload refreshes the expiry
+            self.artifacts.register(
+                final_path,
+                Path(final_path).stat().st_size,
+                kind="upload",
+                owner=owner,
+                ttl_seconds=settings.UPLOAD_TTL_HOURS * 3600
+            )
             
             result = {
-                "filename": secure_filename,
+                "filename": Path(final_path).name.removesuffix('.encrypted'),
                 "original_filename": file.filename,
                 "file_path": final_path,
                 "file_size": file_size,
                 "file_hash": file_hash,
                 "content_type": file.content_type,
-                "encrypted": self.encryption is not None,
+                "encrypted": final_path.endswith('.encrypted'),
+                "deduplicated": deduplicated,
                 "upload_time": datetime.now().isoformat()
             }
             
-            logger.info(f"File uploaded: {file.filename} -> {secure_filename}")
+            logger.info(
+                f"File uploaded: {file.filename} -> {result['filename']}"
+                f"{' (deduplicated)' if deduplicated else ''}"
+            )
             return result
             
         except HTTPException:
@@ -145,8 +221,125 @@ class FileHandlerService:
             logger.error(f"File upload failed: {e}")
             raise HTTPException(status_code=500, detail="File upload failed")
     
+    def expand_archive(self, file: UploadFile) -> List[UploadFile]:
+        """
+        Expand a zip upload into one upload per audio entry
+        
+        Entries are read lazily from the archive when each one is saved, so
+        the size limit applies per entry while it is streamed. The total
+        expanded size of the archive and each entry's compression ratio are
+        limited the same way, against the bytes actually inflated, so a zip
+        bomb fails part way through its first oversized entry. Directories,
+        hidden files and files with other extensions are skipped.
+        
+        Args:
+            file: Uploaded zip archive
+        
+        Returns:
+            List of uploads named after the entries' base names
+        """
+        try:
+            archive = zipfile.ZipFile(file.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail=f"Invalid zip archive: {file.filename}")
+        
+        max_bytes = settings.VOICE_INGEST_MAX_ARCHIVE_BYTES
+        max_ratio = settings.VOICE_INGEST_MAX_COMPRESSION_RATIO
+        budget = {"remaining": max_bytes}
+        
+        entries = []
+        declared = 0
+        for info in archive.infolist():
+            name = Path(info.filename).name
+            if info.is_dir() or name.startswith('.') or info.filename.startswith('__MACOSX/'):
+                continue
+            if not self.is_allowed_file(name):
+                continue
+            
+            # Reject what the headers already give away; the readers catch the rest
+            declared += info.file_size
+            if declared > max_bytes or info.file_size > max(info.compress_size, 1) * max_ratio:
+                raise HTTPException(status_code=413, detail=f"Archive exceeds expansion limits: {file.filename}")
+            
+            reader = _ArchiveEntryReader(archive.open(info), info.compress_size, budget, max_ratio)
+            entries.append(UploadFile(reader, size=info.file_size, filename=name))
+        
+        return entries
+    
+    def _blob_name(self, file_hash: str) -> str:
+        """
+        File name of a blob
+        
+        Keyed so that file names do not reveal the content hash, which would
+        let anyone with directory access confirm whether a known recording
+        is stored, encrypted or not.
+        """
+        return hmac.new(settings.SECRET_KEY.encode(), file_hash.encode(), hashlib.sha256).hexdigest()
+    
+    def _blob_path(self, file_hash: str, extension: str) -> Path:
+        """Location of a blob, fanned out by name prefix"""
+        name = self._blob_name(file_hash)
+        suffix = '.encrypted' if self.encryption else ''
+        return self.blob_folder / name[:2] / f"{name}{extension}{suffix}"
+    
+    def _store_blob(self, temp_path: Path, file_hash: str, extension: str, size: int) -> Tuple[str, bool]:
+        """
+        Move a finished upload into the blob store, or drop it if the content
+        is already stored
+        
+        Returns:
+            Tuple of (blob path, whether the content was already stored)
+        """
+        existing = self.blobs.get(file_hash)
+        if existing and Path(existing["path"]).exists():
+            temp_path.unlink(missing_ok=True)
+            return self.blobs.add_reference(file_hash, existing["path"], size)["path"], True
+        
+        # Move the file into place before publishing the row, so a blob entry
+        # never points at a file that is not there yet
+        candidate = self._blob_path(file_hash, extension)
+        candidate.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, candidate)
+        
+        blob = self.blobs.add_reference(file_hash, str(candidate), size)
+        if blob["path"] == str(candidate):
+            return str(candidate), blob["ref_count"] > 1
+        
+        if Path(blob["path"]).exists():
+            # Lost a race with a concurrent upload of the same content
+            candidate.unlink(missing_ok=True)
+            return blob["path"], True
+        
+        # The recorded copy is gone; this upload becomes the stored copy
+        self.blobs.relocate(file_hash, str(candidate))
+        return str(candidate), True
+    
+    def release_blob(self, file_hash: str) -> bool:
+        """Drop one reference to stored content, deleting it with the last one"""
+        path = self.blobs.release(file_hash)
+        if path is None:
+            return self.blobs.get(file_hash) is not None
+        
+        Path(path).unlink(missing_ok=True)
+        self.artifacts.remove([path])
+        logger.info(f"Blob released: {file_hash}")
+        return True
+    
+    def _is_blob_name(self, filename: str) -> bool:
+        """Whether a file name is a blob name issued by save_upload_file"""
+        name = filename.split('.', 1)[0]
+        return len(name) == 64 and all(c in "0123456789abcdef" for c in name)
+    
+    def _find_blob(self, filename: str) -> Optional[Dict[str, Any]]:
+        """Blob entry for a blob file name, with or without the .encrypted suffix"""
+        path = str(self.get_file_path(filename.removesuffix('.encrypted')))
+        return self.blobs.find_by_path(path) or self.blobs.find_by_path(path + '.encrypted')
+    
     def get_file_path(self, filename: str, subfolder: Optional[str] = None) -> Path:
-        """Get full path for a file"""
+        """Get full path for a file; stored blobs resolve regardless of subfolder"""
+        if self._is_blob_name(filename):
+            return self.blob_folder / filename[:2] / filename
+        
         base_dir = self.upload_folder
         if subfolder:
             base_dir = base_dir / subfolder
@@ -159,8 +352,12 @@ class FileHandlerService:
         return file_path.exists() or Path(str(file_path) + '.encrypted').exists()
     
     def delete_file(self, filename: str, subfolder: Optional[str] = None) -> bool:
-        """Delete a file"""
+        """Delete a file, or drop one reference if it is a stored blob"""
         try:
+            if self._is_blob_name(filename):
+                blob = self._find_blob(filename)
+                return self.release_blob(blob["hash"]) if blob else False
+            
             file_path = self.get_file_path(filename, subfolder)
             
             # Try to delete both encrypted and unencrypted versions
@@ -175,6 +372,8 @@ class FileHandlerService:
                 encrypted_path.unlink()
                 deleted = True
             
+            self.artifacts.remove([str(file_path), str(encrypted_path)])
+            
             if deleted:
                 logger.info(f"File deleted: {filename}")
             
@@ -184,41 +383,6 @@ class FileHandlerService:
             logger.error(f"File deletion failed: {e}")
             return False
     
-    def cleanup_old_files(self, max_age_hours: int = 24) -> int:
-        """Clean up old files"""
-        try:
-            cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-            deleted_count = 0
-            
-            # Clean upload folder
-            for file_path in self.upload_folder.rglob('*'):
-                if file_path.is_file():
-                    file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if file_mtime < cutoff_time:
-                        try:
-                            file_path.unlink()
-                            deleted_count += 1
-                        except Exception as e:
-                            logger.warning(f"Failed to delete old file {file_path}: {e}")
-            
-            # Clean audio output folder
-            for file_path in self.audio_output_folder.rglob('*'):
-                if file_path.is_file():
-                    file_mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if file_mtime < cutoff_time:
-                        try:
-                            file_path.unlink()
-                            deleted_count += 1
-                        except Exception as e:
-                            logger.warning(f"Failed to delete old file {file_path}: {e}")
-            
-            logger.info(f"Cleaned up {deleted_count} old files")
-            return deleted_count
-            
-        except Exception as e:
-            logger.error(f"File cleanup failed: {e}")
-            return 0
-    
     def get_file_info(self, filename: str, subfolder: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """Get information about a file"""
         try:
@@ -276,6 +440,46 @@ class FileHandlerService:
             logger.error(f"Failed to list files: {e}")
             return []
     
+    def get_output_file_info(self, filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Locate a generated audio file in the output folder
+        
+        Returns:
+            Dictionary with the stored path, plaintext size, modification time
+            and whether the file is encrypted, or None if it does not exist
+        """
+        # Only plain file names are served from the output folder
+        if not filename or Path(filename).name != filename:
+            return None
+        
+        file_path = self.audio_output_folder / filename
+        encrypted_path = Path(str(file_path) + '.encrypted')
+        
+        if encrypted_path.exists() and self.encryption:
+            actual_path = encrypted_path
+            size = self.encryption.plaintext_size(str(encrypted_path))
+        elif file_path.exists():
+            actual_path = file_path
+            size = file_path.stat().st_size
+        else:
+            return None
+        
+        self.artifacts.touch(str(actual_path))
+        
+        return {
+            "filename": filename,
+            "file_path": str(actual_path),
+            "size": size,
+            "modified_time": actual_path.stat().st_mtime,
+            "encrypted": actual_path is encrypted_path
+        }
+    
+    def open_output_file(self, file_info: Dict[str, Any]) -> BinaryIO:
+        """Open a file found by get_output_file_info as seekable plaintext"""
+        if file_info["encrypted"]:
+            return self.encryption.open_decrypted(file_info["file_path"])
+        return open(file_info["file_path"], 'rb')
+    
     def get_file_content(self, filename: str, subfolder: Optional[str] = None) -> Optional[bytes]:
         """Get file content (decrypted if necessary)"""
         try:
@@ -285,15 +489,9 @@ class FileHandlerService:
             encrypted_path = Path(str(file_path) + '.encrypted')
             
             if encrypted_path.exists() and self.encryption:
-                # Decrypt and return content
-                temp_path = str(file_path) + '_temp'
-                self.encryption.decrypt_file(str(encrypted_path), temp_path)
-                
-                with open(temp_path, 'rb') as f:
-                    content = f.read()
-                
-                Path(temp_path).unlink()  # Clean up temp file
-                return content
+                # Decrypt in memory
+                with self.encryption.open_decrypted(str(encrypted_path)) as f:
+                    return f.read()
                 
             elif file_path.exists():
                 # Return unencrypted content
@@ -0,0 +1,321 @@
+import asyncio
+import os
+import socket
+import uuid
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Callable, Set
+from loguru import logger
+
+from ..core.config import settings
+from ..database import get_job_store, get_database, JobStore, JobStatus
+from .speech_to_text import get_stt_service
+from .file_handler import get_file_handler
+from .voice_cloning import get_voice_cloning_service
+
+
+# A handler receives the job payload and a progress callback (0.0 - 1.0)
+# and returns a JSON-serializable result. Handlers run in a worker thread.
+JobHandler = Callable[[Dict[str, Any], Callable[[float], None]], Dict[str, Any]]
+
+# A cleanup receives the payload of a job that failed for good or was
+# cancelled, and releases whatever the job held (e.g. its upload).
+JobCleanup = Callable[[Dict[str, Any]], None]
+
+
+class JobQueue:
+    """
+    Background job runner backed by the persistent job store
+
+    Worker tasks claim queued jobs (highest priority first) and run their
+    handlers in a thread pool, so at most JOB_WORKERS jobs run at once.
+    Progress and state changes are fanned out to in-process subscribers
+    for the polling, SSE and WebSocket endpoints.
+
+    Claimed jobs are leased to this process: a heartbeat task renews the
+    lease while they run and re-queues jobs whose owner stopped renewing
+    theirs, so jobs running in other live processes are left alone. A job
+    whose lease expired on its last attempt is failed and cleaned up.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: int = settings.JOB_WORKERS):
+        self.store = store or get_job_store()
+        self.workers = workers
+        self.handlers: Dict[str, JobHandler] = {}
+        self.cleanups: Dict[str, JobCleanup] = {}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+        logger.info(f"JobQueue initialized with {workers} workers")
+
+    def register(self, job_type: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None):
+        """Register the handler that runs jobs of the given type, and its cleanup"""
+        self.handlers[job_type] = handler
+        if cleanup:
+            self.cleanups[job_type] = cleanup
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Re-queue jobs with expired leases and start the worker tasks"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        await self._reclaim_stale_jobs()
+
+        self._tasks = [
+            asyncio.create_task(self._worker(index)) for index in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        logger.info(f"Started {self.workers} job workers as {self.worker_id}")
+
+    async def stop(self):
+        """Stop the worker tasks and return their running jobs to the queue"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(self.store.requeue_worker_jobs, self.worker_id)
+        logger.info("Job workers stopped")
+
+    async def submit(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        priority: int = 0,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Persist a new job and wake an idle worker"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job = await asyncio.to_thread(self.store.create_job, job_type, payload, priority, user_id)
+        if self._wakeup:
+            self._wakeup.set()
+        return job.to_dict()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get the current state of a job"""
+        job = await asyncio.to_thread(self.store.get_job, job_id)
+        return job.to_dict() if job else None
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job"""
+        cancelled = await asyncio.to_thread(self.store.cancel_job, job_id)
+        if cancelled:
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+            await self._cleanup(job)
+            await self._publish_state(job_id)
+        return cancelled
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Receive state and progress events for a job"""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        """Stop receiving events for a job"""
+        subscribers = self._subscribers.get(job_id)
+        if subscribers:
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+    def _publish(self, job_id: str, event: Dict[str, Any]):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    async def _publish_state(self, job_id: str):
+        job = await self.get(job_id)
+        if job:
+            self._publish(job_id, job)
+
+    async def _cleanup(self, job):
+        """Release what a job that will not run again was holding"""
+        cleanup = self.cleanups.get(job.job_type)
+        if cleanup is None:
+            return
+        try:
+            await asyncio.to_thread(cleanup, job.payload or {})
+        except Exception as e:
+            logger.error(f"Cleanup of job {job.id} failed: {e}")
+
+    async def _reclaim_stale_jobs(self) -> int:
+        """Fail or re-queue jobs whose owner stopped renewing its lease"""
+        failed = await asyncio.to_thread(
+            self.store.fail_stale_jobs, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS
+        )
+        for job in failed:
+            await self._cleanup(job)
+            await self._publish_state(job.id)
+
+        return await asyncio.to_thread(
+            self.store.requeue_stale_jobs, settings.JOB_LEASE_SECONDS, settings.JOB_MAX_ATTEMPTS
+        )
+
+    async def _heartbeat(self):
+        """Renew this process's leases and reclaim jobs of dead processes"""
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_INTERVAL)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, self.worker_id)
+                if await self._reclaim_stale_jobs():
+                    self._wakeup.set()
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {e}")
+
+    async def _worker(self, index: int):
+        """Claim and run jobs until cancelled"""
+        job_types = list(self.handlers)
+
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next_job, job_types, self.worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job worker {index} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                # Sleep until a submit or the poll interval (for jobs added by other processes)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _run_job(self, job):
+        handler = self.handlers[job.job_type]
+        self._publish(job.id, job.to_dict())
+
+        def report_progress(progress: float):
+            self.store.update_progress(job.id, progress)
+            self._loop.call_soon_threadsafe(
+                self._publish, job.id,
+                {"job_id": job.id, "status": JobStatus.RUNNING, "progress": progress}
+            )
+
+        try:
+            result = await asyncio.to_thread(handler, job.payload or {}, report_progress)
+            if await asyncio.to_thread(self.store.complete_job, job.id, self.worker_id, result):
+                logger.info(f"Job {job.id} completed")
+            else:
+                logger.warning(f"Job {job.id} finished after losing its lease; result discarded")
+
+        except asyncio.CancelledError:
+            # Shutdown: stop() returns the job to the queue
+            raise
+        except Exception as e:
+            retry = job.attempts < settings.JOB_MAX_ATTEMPTS
+            logger.error(f"Job {job.id} failed (attempt {job.attempts}): {e}")
+            failed = await asyncio.to_thread(self.store.fail_job, job.id, self.worker_id, str(e), retry)
+            # A job reclaimed by another worker is no longer ours to clean up
+            if failed and not retry:
+                await self._cleanup(job)
+
+        await self._publish_state(job.id)
+
+
+def run_transcription_job(payload: Dict[str, Any], report_progress: Callable[[float], None]) -> Dict[str, Any]:
+    """Transcribe an uploaded file of any length and record the session"""
+    stt_service = get_stt_service()
+    db = get_database()
+
+    session = db.get_audio_session(payload["session_id"])
+    if session is None:
+        raise ValueError(f"Session not found: {payload['session_id']}")
+
+    language = payload.get("language")
+    task = payload.get("task", "transcribe")
+    content_hash = payload.get("file_hash")
+    params = stt_service.result_params(language=language, task=task, long_form=True)
+
+    result = None
+    if content_hash:
+        result = stt_service.get_cached_result(content_hash, "transcription", params)
+
+    if result is None:
+        audio_array = stt_service.preprocess_audio(payload["file_path"])
+        features = []
+        result = stt_service.transcribe_long(
+            audio_array,
+            language=language,
+            task=task,
+            progress_callback=report_progress,
+            features=features,
+            content_hash=content_hash
+        )
+        if content_hash:
+            stt_service.cache_result(content_hash, "transcription", params, result)
+            stt_service.index_audio_features(content_hash, features, result, {"session_id": session.id})
+
+    session.transcription = result["transcription"]
+    session.duration_seconds = result["audio_duration"]
+    db.update_audio_session(session)
+
+    release_transcription_upload(payload)
+
+    return {
+        "transcription": result["transcription"],
+        "language": result["language"],
+        "confidence": result["confidence"],
+        "duration_seconds": result["audio_duration"],
+        "model": result["model"],
+        "session_id": session.id
+    }
+
+
+def release_transcription_upload(payload: Dict[str, Any]):
+    """Drop a transcription job's reference to the stored upload"""
+    get_file_handler().delete_file(Path(payload["file_path"]).name.removesuffix('.encrypted'))
+
+
+def run_voice_clone_job(payload: Dict[str, Any], report_progress: Callable[[float], None]) -> Dict[str, Any]:
+    """Create a voice clone from a stored sample under its reserved ID"""
+    voice_service = get_voice_cloning_service()
+
+    # A retried job may find the clone already written by its previous attempt
+    existing = voice_service.get_created_clone(payload["clone_id"])
+    if existing is not None:
+        return existing
+
+    return voice_service.create_voice_clone(
+        name=payload["name"],
+        sample_audio_path=payload["sample_path"],
+        user_id=payload.get("user_id"),
+        content_hash=payload.get("file_hash"),
+        language=payload.get("language"),
+        tags=payload.get("tags"),
+        clone_id=payload["clone_id"],
+        progress_callback=report_progress
+    )
+
+
+def release_voice_clone_sample(payload: Dict[str, Any]):
+    """Drop a voice clone job's reference to its sample unless a clone kept it"""
+    if get_voice_cloning_service().get_voice_clone(payload["clone_id"]) is None:
+        get_file_handler().delete_file(Path(payload["sample_path"]).name)
+
+
+# Global job queue instance
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Get or create global job queue instance"""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue()
+        _job_queue.register("transcribe", run_transcription_job, release_transcription_upload)
+        _job_queue.register("voice_clone", run_voice_clone_job, release_voice_clone_sample)
+    return _job_queue
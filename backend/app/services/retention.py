@@ -0,0 +1,157 @@
+import asyncio
+from pathlib import Path
+from typing import Optional, Dict, List
+from loguru import logger
+
+from ..core.config import settings
+from ..database import get_artifact_index, get_blob_store, ArtifactIndex, BlobStore
+
+# Upload subfolder of voice clone samples stored before the blob store
+LEGACY_SAMPLE_FOLDER = "voice_samples"
+
+
+class RetentionService:
+    """
+    Periodic cleanup of stored files driven by the artifact index
+
+    Each tick deletes at most RETENTION_BATCH_SIZE expired files, then evicts
+    least-recently-used files while the indexed total exceeds
+    STORAGE_QUOTA_BYTES. All lookups go through indexes, so the cost of a
+    tick depends on the batch size, not on how many files are stored.
+    Uploads whose blob is still referenced are in use and never deleted;
+    their expiry is pushed back by UPLOAD_TTL_HOURS each time they are
+    found, so they expire normally once the last reference is gone.
+    Cached results are kept apart from the audio they came from and expire
+    after RESULT_TTL_HOURS, oldest first beyond RESULT_MAX_ROWS.
+
+    Files stored before the index existed are found by a one-time scan of
+    the upload and output folders when retention first starts.
+    """
+
+    def __init__(
+        self,
+        index: Optional[ArtifactIndex] = None,
+        batch_size: int = settings.RETENTION_BATCH_SIZE,
+        quota_bytes: int = settings.STORAGE_QUOTA_BYTES,
+        blobs: Optional[BlobStore] = None,
+        result_ttl_seconds: float = settings.RESULT_TTL_HOURS * 3600,
+        max_results: int = settings.RESULT_MAX_ROWS,
+        hold_seconds: float = settings.UPLOAD_TTL_HOURS * 3600,
+        upload_folder: str = settings.UPLOAD_FOLDER,
+        output_folder: str = settings.AUDIO_OUTPUT_FOLDER
+    ):
+        self.index = index or get_artifact_index()
+        self.blobs = blobs or get_blob_store()
+        self.batch_size = batch_size
+        self.quota_bytes = quota_bytes
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_results = max_results
+        self.hold_seconds = hold_seconds
+        self.upload_folder = Path(upload_folder)
+        self.output_folder = Path(output_folder)
+        self._task: Optional[asyncio.Task] = None
+
+    def register_untracked(self) -> int:
+        """Index files stored before the artifact index existed; runs once per database"""
+        if self.index.scanned():
+            return 0
+
+        folders = (
+            (self.upload_folder, "upload", settings.UPLOAD_TTL_HOURS * 3600),
+            (self.output_folder, "output", settings.OUTPUT_TTL_HOURS * 3600)
+        )
+        entries = []
+        for folder, kind, ttl_seconds in folders:
+            for path in folder.rglob("*"):
+                # Samples saved before uploads were content-addressed back
+                # existing voice clones, not the blob store, so they are left out
+                if not path.is_file() or LEGACY_SAMPLE_FOLDER in path.relative_to(folder).parts:
+                    continue
+                stat = path.stat()
+                entries.append({
+                    "path": str(path), "size": stat.st_size, "kind": kind,
+                    "mtime": stat.st_mtime, "ttl_seconds": ttl_seconds
+                })
+
+        registered = self.index.register_existing(entries)
+        self.index.mark_scanned()
+        logger.info(f"Registered {registered} files stored before the artifact index")
+        return registered
+
+    def _deletable(self, entries: List[Dict]) -> List[Dict]:
+        """Leave out files of referenced blobs, pinning them so the next passes skip them"""
+        in_use = self.blobs.referenced_paths([entry["path"] for entry in entries])
+        if in_use:
+            self.index.pin(list(in_use), self.hold_seconds)
+        return [entry for entry in entries if entry["path"] not in in_use]
+    
+    def _delete(self, entries: List[Dict]) -> int:
+        """Delete files and drop them from the index"""
+        for entry in entries:
+            try:
+                Path(entry["path"]).unlink(missing_ok=True)
+            except Exception as e:
+                logger.warning(f"Failed to delete {entry['path']}: {e}")
+        paths = [entry["path"] for entry in entries]
+        self.index.remove(paths)
+        self.blobs.discard_paths(paths)
+        return len(entries)
+
+    def run_once(self) -> Dict[str, int]:
+        """Run one retention pass"""
+        expired = self._delete(self._deletable(self.index.expired(self.batch_size)))
+
+        evicted = 0
+        excess = self.index.stats()["total_size"] - self.quota_bytes
+        if excess > 0:
+            # Evict just enough of the oldest-used files to get under quota
+            victims = []
+            for entry in self._deletable(self.index.least_recently_used(self.batch_size)):
+                if excess <= 0:
+                    break
+                victims.append(entry)
+                excess -= entry["size"]
+            evicted = self._delete(victims)
+
+        results = self.blobs.prune_results(self.result_ttl_seconds, self.max_results)
+
+        if expired or evicted or results:
+            logger.info(
+                f"Retention removed {expired} expired and {evicted} evicted files, {results} cached results"
+            )
+        return {"expired": expired, "evicted": evicted, "results": results}
+
+    async def _run(self, interval: float):
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Retention pass failed: {e}")
+            await asyncio.sleep(interval)
+
+    async def start(self, interval: float = settings.RETENTION_INTERVAL_SECONDS):
+        """Start the periodic retention task"""
+        if self._task is None:
+            await asyncio.to_thread(self.register_untracked)
+            self._task = asyncio.create_task(self._run(interval))
+            logger.info(f"Retention task started (every {interval}s)")
+
+    async def stop(self):
+        """Stop the periodic retention task"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Global retention service instance
+_retention_service: Optional[RetentionService] = None
+
+def get_retention_service() -> RetentionService:
+    """Get or create global retention service instance"""
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
@@ -0,0 +1,133 @@
+import torch
+import numpy as np
+from typing import Optional, List, Tuple
+from transformers import AutoFeatureExtractor, WavLMForXVector
+from loguru import logger
+
+from ..core.config import settings
+
+
+class SpeakerEncoder:
+    """
+    Speaker embeddings from a pretrained x-vector model
+
+    Long samples are cut into at most SPEAKER_MAX_SEGMENTS evenly spaced
+    crops of SPEAKER_SEGMENT_SECONDS, so the cost per sample is bounded no
+    matter how long it is. Crops from many samples are run through the model
+    together in batches, and each sample's embedding is the normalized mean
+    of its crop embeddings.
+    """
+
+    sample_rate = 16000
+
+    def __init__(
+        self,
+        model_name: str = settings.SPEAKER_ENCODER_MODEL,
+        segment_seconds: float = settings.SPEAKER_SEGMENT_SECONDS,
+        max_segments: int = settings.SPEAKER_MAX_SEGMENTS,
+        batch_size: int = settings.SPEAKER_BATCH_SIZE
+    ):
+        self.model_name = model_name
+        self.segment_length = int(segment_seconds * self.sample_rate)
+        self.max_segments = max_segments
+        self.batch_size = batch_size
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.feature_extractor = None
+        self.model: Optional[WavLMForXVector] = None
+
+    def load_model(self):
+        """Load the x-vector model from MODELS_CACHE_DIR"""
+        if self.model is None:
+            try:
+                logger.info(f"Loading speaker encoder: {self.model_name}")
+                self.feature_extractor = AutoFeatureExtractor.from_pretrained(
+                    self.model_name,
+                    cache_dir=settings.MODELS_CACHE_DIR
+                )
+                self.model = WavLMForXVector.from_pretrained(
+                    self.model_name,
+                    cache_dir=settings.MODELS_CACHE_DIR
+                ).to(self.device).eval()
+
+                logger.info(f"Speaker encoder loaded on {self.device}")
+
+            except Exception as e:
+                logger.error(f"Error loading speaker encoder: {e}")
+                raise
+
+    def crop(self, audio: np.ndarray) -> List[np.ndarray]:
+        """Split 16 kHz audio into a bounded number of fixed-length crops"""
+        if len(audio) <= self.segment_length:
+            return [audio]
+
+        count = min(self.max_segments, len(audio) // self.segment_length)
+        starts = np.linspace(0, len(audio) - self.segment_length, count).astype(int)
+        return [audio[start:start + self.segment_length] for start in starts]
+
+    def _embed_segments(self, segments: List[np.ndarray]) -> np.ndarray:
+        """Run one batch of crops through the model"""
+        inputs = self.feature_extractor(
+            segments,
+            sampling_rate=self.sample_rate,
+            padding=True,
+            return_attention_mask=True,
+            return_tensors="pt"
+        ).to(self.device)
+
+        with torch.no_grad():
+            embeddings = self.model(**inputs).embeddings
+
+        return embeddings.float().cpu().numpy()
+
+    def embed_batch(self, audios: List[np.ndarray]) -> np.ndarray:
+        """
+        Embed many 16 kHz mono samples at once
+
+        Returns:
+            float32 array of shape (len(audios), embedding_dim), L2-normalized
+        """
+        if any(len(audio) == 0 for audio in audios):
+            raise ValueError("Voice sample contains no audio")
+
+        if self.model is None:
+            self.load_model()
+
+        crops: List[Tuple[int, np.ndarray]] = [
+            (owner, segment)
+            for owner, audio in enumerate(audios)
+            for segment in self.crop(audio)
+        ]
+
+        # Similar lengths batch together, so little of each batch is padding
+        crops.sort(key=lambda item: len(item[1]))
+
+        sums: Optional[np.ndarray] = None
+        counts = np.zeros(len(audios), dtype=np.float32)
+        for start in range(0, len(crops), self.batch_size):
+            batch = crops[start:start + self.batch_size]
+            embeddings = self._embed_segments([segment for _, segment in batch])
+            embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-8
+
+            if sums is None:
+                sums = np.zeros((len(audios), embeddings.shape[1]), dtype=np.float32)
+            owners = np.array([owner for owner, _ in batch])
+            np.add.at(sums, owners, embeddings)
+            np.add.at(counts, owners, 1.0)
+
+        means = sums / counts[:, None]
+        return (means / (np.linalg.norm(means, axis=1, keepdims=True) + 1e-8)).astype(np.float32)
+
+    def embed(self, audio: np.ndarray) -> np.ndarray:
+        """Embed a single 16 kHz mono sample"""
+        return self.embed_batch([audio])[0]
+
+
+# Global speaker encoder instance
+_speaker_encoder: Optional[SpeakerEncoder] = None
+
+def get_speaker_encoder() -> SpeakerEncoder:
+    """Get or create global speaker encoder instance"""
+    global _speaker_encoder
+    if _speaker_encoder is None:
+        _speaker_encoder = SpeakerEncoder()
+    return _speaker_encoder
@@ -2,13 +2,30 @@ import torch
 import torchaudio
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union, BinaryIO, Callable, Tuple
 from transformers import WhisperForConditionalGeneration, WhisperProcessor
-import librosa
+from transformers.modeling_outputs import BaseModelOutput
+import json
 from loguru import logger
 
 from ..core.config import settings
+from ..core.cache import LRUCache
+from ..database import get_blob_store, get_vector_store
 from ..security import get_encryption
+from .audio_io import load_audio
+
+
+# Generation options shared by every decode; part of the result cache key
+DECODING_OPTIONS = {"max_new_tokens": 450, "do_sample": False, "use_cache": True}
+
+# Audio samples per Whisper encoder frame (20 ms at 16 kHz)
+ENCODER_FRAME_SAMPLES = 320
+
+# Audio samples in one Whisper input window (30 s at 16 kHz); longer input is truncated
+WINDOW_SAMPLES = 30 * 16000
+
+# Mean-pooled encoder states of one window and the number of frames pooled
+PooledFeatures = Tuple[np.ndarray, int]
 
 
 class WhisperSTTService:
@@ -19,8 +36,45 @@ class WhisperSTTService:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.encryption = get_encryption() if settings.ENCRYPT_AUDIO_FILES else None
         
+        # Results by audio content hash: in-memory LRU in front of the blob store
+        self.results = get_blob_store()
+        self._result_cache = LRUCache(maxsize=settings.TRANSCRIPTION_CACHE_SIZE)
+        
+        # Encoder outputs by (content hash, window), so decoding the same audio
+        # with other options, timestamps or language detection skips the encoder
+        self._encoder_cache = LRUCache(
+            maxsize=settings.ENCODER_CACHE_SIZE,
+            maxbytes=settings.ENCODER_CACHE_BYTES,
+            sizeof=lambda states: states.numel() * states.element_size()
+        )
+        
+        # Pooled encoder states of transcribed recordings, for similar-recording search
+        self.vector_store = get_vector_store() if settings.AUDIO_FEATURE_INDEX else None
+        
         logger.info(f"WhisperSTTService initialized with device: {self.device}")
     
+    def result_params(self, **options) -> str:
+        """Serialize everything besides the audio that determines a result"""
+        return json.dumps({"model": self.model_name, **DECODING_OPTIONS, **options}, sort_keys=True)
+    
+    def get_cached_result(self, content_hash: str, kind: str, params: str) -> Optional[Dict[str, Any]]:
+        """Look up a result for audio content, memory first, then SQLite"""
+        key = (content_hash, kind, params)
+        result = self._result_cache.get(key)
+        if result is None:
+            result = self.results.get_result(content_hash, kind, params)
+            if result is None:
+                return None
+            self._result_cache.put(key, result)
+        
+        logger.info(f"Reusing {kind} result for content {content_hash[:12]}")
+        return dict(result)
+    
+    def cache_result(self, content_hash: str, kind: str, params: str, result: Dict[str, Any]):
+        """Record a result for audio content in memory and SQLite"""
+        self._result_cache.put((content_hash, kind, params), dict(result))
+        self.results.put_result(content_hash, kind, result, params)
+    
     def load_model(self):
         """Load Whisper Large V3 Turbo model"""
         if self.processor is None or self.model is None:
@@ -42,23 +96,15 @@ class WhisperSTTService:
                 logger.error(f"Error loading Whisper model: {e}")
                 raise
     
-    def preprocess_audio(self, audio_path: str, target_sr: int = 16000) -> np.ndarray:
-        """Preprocess audio file to required format"""
+    def preprocess_audio(self, audio_path: Union[str, BinaryIO], target_sr: int = 16000) -> np.ndarray:
+        """Preprocess audio file (path or seekable file object) to required format"""
         try:
-            # Decrypt if needed
-            if self.encryption and audio_path.endswith('.encrypted'):
-                temp_path = audio_path.replace('.encrypted', '_temp')
-                audio_path = self.encryption.decrypt_file(audio_path, temp_path)
-            
-            # Load audio with librosa for better compatibility
-            audio, sr = librosa.load(audio_path, sr=target_sr, mono=True)
-            
-            # Normalize audio
-            audio = audio.astype(np.float32)
-            
-            # Clean up temporary decrypted file
-            if self.encryption and '_temp' in audio_path:
-                Path(audio_path).unlink(missing_ok=True)
+            # Decode straight to mono float32 at the model rate, decrypting in memory if needed
+            if self.encryption and isinstance(audio_path, str) and audio_path.endswith('.encrypted'):
+                with self.encryption.open_decrypted(audio_path) as source:
+                    audio = load_audio(source, target_sr)
+            else:
+                audio = load_audio(audio_path, target_sr)
             
             logger.debug(f"Audio preprocessed: {len(audio)} samples at {target_sr}Hz")
             return audio
@@ -71,7 +117,8 @@ class WhisperSTTService:
         self, 
         audio_path: str, 
         language: Optional[str] = None,
-        task: str = "transcribe"
+        task: str = "transcribe",
+        content_hash: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Transcribe audio file using Whisper
@@ -80,6 +127,59 @@ class WhisperSTTService:
             audio_path: Path to audio file
             language: Source language (None for auto-detection)
             task: 'transcribe' or 'translate'
+            content_hash: SHA-256 of the audio; when given, a cached result for
+                the same content and options is returned without decoding
+        
+        Returns:
+            Dictionary with transcription and metadata
+        """
+        try:
+            if content_hash:
+                params = self.result_params(language=language, task=task)
+                cached = self.get_cached_result(content_hash, "transcription", params)
+                if cached is not None:
+                    return cached
+            
+            # Preprocess audio
+            audio_array = self.preprocess_audio(audio_path)
+            features: List[PooledFeatures] = []
+            result = self.transcribe_array(
+                audio_array,
+                language=language,
+                task=task,
+                features=features,
+                content_hash=content_hash
+            )
+            
+            if content_hash:
+                self.cache_result(content_hash, "transcription", params, result)
+                self.index_audio_features(content_hash, features, result)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Transcription failed for {audio_path}: {e}")
+            raise
+    
+    def transcribe_array(
+        self,
+        audio_array: np.ndarray,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        features: Optional[List[PooledFeatures]] = None,
+        content_hash: Optional[str] = None,
+        offset: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Transcribe 16 kHz mono float32 audio already held in memory
+        
+        Args:
+            audio_array: Audio samples at 16 kHz
+            language: Source language (None for auto-detection)
+            task: 'transcribe' or 'translate'
+            features: When given, the pooled encoder states of the audio are appended
+            content_hash: SHA-256 of the recording the audio belongs to; when
+                given, its encoder output is cached for later decodes
+            offset: First sample of this audio within the recording
         
         Returns:
             Dictionary with transcription and metadata
@@ -88,15 +188,14 @@ class WhisperSTTService:
             self.load_model()
         
         try:
-            # Preprocess audio
-            audio_array = self.preprocess_audio(audio_path)
+            encoder_outputs = self._encode(audio_array, content_hash, offset)
+            if features is not None:
+                features.append(self._pool(encoder_outputs, len(audio_array)))
             
-            # Prepare inputs
-            inputs = self.processor(
-                audio_array, 
-                sampling_rate=16000, 
-                return_tensors="pt"
-            ).to(self.device)
+            # Without a requested language, detect it from the same encoder
+            # states and decode in that language
+            if language is None:
+                language = self._detect_language(encoder_outputs)
             
             # Set generation parameters
             forced_decoder_ids = None
@@ -107,24 +206,7 @@ class WhisperSTTService:
                 )
             
             # Generate transcription
-            with torch.no_grad():
-                if torch.cuda.is_available():
-                    with torch.cuda.amp.autocast():
-                        generated_ids = self.model.generate(
-                            inputs.input_features,
-                            forced_decoder_ids=forced_decoder_ids,
-                            max_new_tokens=450,
-                            do_sample=False,
-                            use_cache=True
-                        )
-                else:
-                    generated_ids = self.model.generate(
-                        inputs.input_features,
-                        forced_decoder_ids=forced_decoder_ids,
-                        max_new_tokens=450,
-                        do_sample=False,
-                        use_cache=True
-                    )
+            generated_ids = self._generate(encoder_outputs, forced_decoder_ids)
             
             # Decode transcription
             transcription = self.processor.batch_decode(
@@ -132,15 +214,9 @@ class WhisperSTTService:
                 skip_special_tokens=True
             )[0]
             
-            # Extract additional info if available
-            detected_language = None
-            if language is None:
-                # Language detection from tokens (simplified)
-                detected_language = "en"  # Default, could be enhanced
-            
             result = {
                 "transcription": transcription.strip(),
-                "language": language or detected_language,
+                "language": language,
                 "task": task,
                 "model": self.model_name,
                 "audio_duration": len(audio_array) / 16000,  # seconds
@@ -151,28 +227,227 @@ class WhisperSTTService:
             return result
             
         except Exception as e:
-            logger.error(f"Transcription failed for {audio_path}: {e}")
+            logger.error(f"Transcription failed: {e}")
             raise
     
+    def _encode(
+        self,
+        audio_array: np.ndarray,
+        content_hash: Optional[str] = None,
+        offset: int = 0
+    ) -> BaseModelOutput:
+        """
+        Run the Whisper encoder over one window of at most 30 seconds
+        
+        With the recording's content hash, the output is kept in a byte-bounded
+        LRU cache and reused by any later decode of the same window.
+        """
+        key = (content_hash, offset, min(len(audio_array), WINDOW_SAMPLES)) if content_hash else None
+        if key is not None:
+            states = self._encoder_cache.get(key)
+            if states is not None:
+                logger.debug(f"Reusing encoder output for content {content_hash[:12]} at sample {offset}")
+                return BaseModelOutput(last_hidden_state=states)
+        
+        input_features = self.processor(
+            audio_array, 
+            sampling_rate=16000, 
+            return_tensors="pt"
+        ).input_features.to(self.device)
+        
+        encoder = self.model.get_encoder()
+        with torch.no_grad():
+            if torch.cuda.is_available():
+                with torch.cuda.amp.autocast():
+                    encoder_outputs = encoder(input_features)
+            else:
+                encoder_outputs = encoder(input_features)
+        
+        if key is not None:
+            self._encoder_cache.put(key, encoder_outputs.last_hidden_state)
+        return encoder_outputs
+    
+    def _detect_language(self, encoder_outputs: BaseModelOutput) -> str:
+        """Run a single decoder step over encoder states to pick the spoken language"""
+        with torch.no_grad():
+            language_ids = self.model.detect_language(encoder_outputs=encoder_outputs)
+        
+        # Language tokens look like "<|en|>"
+        languages = {token_id: token for token, token_id in self.model.generation_config.lang_to_id.items()}
+        return languages[int(language_ids[0])].strip("<|>")
+    
+    def _generate(self, encoder_outputs: BaseModelOutput, forced_decoder_ids, **options) -> torch.Tensor:
+        """Run the decoder on encoder states computed by _encode"""
+        with torch.no_grad():
+            if torch.cuda.is_available():
+                with torch.cuda.amp.autocast():
+                    return self.model.generate(
+                        encoder_outputs=encoder_outputs,
+                        forced_decoder_ids=forced_decoder_ids,
+                        **DECODING_OPTIONS,
+                        **options
+                    )
+            return self.model.generate(
+                encoder_outputs=encoder_outputs,
+                forced_decoder_ids=forced_decoder_ids,
+                **DECODING_OPTIONS,
+                **options
+            )
+    
+    @staticmethod
+    def _pool(encoder_outputs: BaseModelOutput, num_samples: int) -> PooledFeatures:
+        """Mean of the encoder states over the frames holding audio rather than padding"""
+        states = encoder_outputs.last_hidden_state[0]
+        frames = max(1, min(states.shape[0], -(-num_samples // ENCODER_FRAME_SAMPLES)))
+        return states[:frames].float().mean(dim=0).cpu().numpy(), frames
+    
+    @staticmethod
+    def _combine(features: List[PooledFeatures]) -> np.ndarray:
+        """Average the pooled windows of a recording, weighted by their length"""
+        vectors = np.stack([vector for vector, _ in features])
+        weights = np.array([frames for _, frames in features], dtype=np.float32)
+        return (weights[:, None] * vectors).sum(axis=0) / weights.sum()
+    
+    def index_audio_features(
+        self,
+        content_hash: str,
+        features: List[PooledFeatures],
+        result: Dict[str, Any],
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Store one embedding per recording in the audio features index
+        
+        Recordings of any duration get a vector of the encoder width. The
+        vector is keyed by content hash; indexing the same audio again
+        replaces it.
+        """
+        if self.vector_store is None or not features:
+            return
+        
+        try:
+            self.vector_store.store_audio_features(
+                content_hash,
+                self._combine(features).tolist(),
+                {
+                    "language": result.get("language"),
+                    "duration_seconds": result.get("audio_duration", result.get("duration")),
+                    "model": self.model_name,
+                    **(metadata or {})
+                }
+            )
+        except Exception as e:
+            # The transcript is already produced; a missing index entry is not fatal
+            logger.warning(f"Failed to index audio features for {content_hash[:12]}: {e}")
+    
+    def find_similar_recordings(
+        self,
+        audio_path: str,
+        content_hash: Optional[str] = None,
+        n_results: int = 10
+    ) -> Dict[str, Any]:
+        """
+        Find indexed recordings whose pooled encoder states are closest to a file's
+        
+        A recording that is already indexed is searched with its stored
+        vector; other audio runs the encoder only, never the decoder.
+        
+        Returns:
+            Dictionary with ids (content hashes), distances and metadatas
+        """
+        if self.vector_store is None:
+            raise ValueError("Audio feature index is disabled")
+        
+        embedding = self.vector_store.get_audio_features(content_hash) if content_hash else None
+        if embedding is None:
+            if self.processor is None or self.model is None:
+                self.load_model()
+            
+            audio_array = self.preprocess_audio(audio_path)
+            features = []
+            for start in range(0, max(1, len(audio_array)), WINDOW_SAMPLES):
+                chunk = audio_array[start:start + WINDOW_SAMPLES]
+                features.append(self._pool(self._encode(chunk, content_hash, start), len(chunk)))
+            embedding = self._combine(features).tolist()
+        
+        exclude_ids = [content_hash] if content_hash else None
+        return self.vector_store.search_audio_by_features(embedding, n_results, exclude_ids=exclude_ids)
+    
+    def transcribe_long(
+        self,
+        audio_array: np.ndarray,
+        language: Optional[str] = None,
+        task: str = "transcribe",
+        window_seconds: int = 30,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        features: Optional[List[PooledFeatures]] = None,
+        content_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe audio of any length in consecutive Whisper windows
+
+        Args:
+            audio_array: Audio samples at 16 kHz
+            language: Source language (None for auto-detection)
+            task: 'transcribe' or 'translate'
+            window_seconds: Window length fed to the model per pass
+            progress_callback: Called with the completed fraction after each window
+            features: When given, the pooled encoder states of each window are appended
+            content_hash: SHA-256 of the audio, used to cache each window's encoder output
+
+        Returns:
+            Dictionary with transcription and metadata
+        """
+        window = window_seconds * 16000
+        total_windows = max(1, -(-len(audio_array) // window))
+        texts = []
+        result: Dict[str, Any] = {}
+
+        for index in range(total_windows):
+            result = self.transcribe_array(
+                audio_array[index * window:(index + 1) * window],
+                language=language,
+                task=task,
+                features=features,
+                content_hash=content_hash,
+                offset=index * window
+            )
+            if result["transcription"]:
+                texts.append(result["transcription"])
+
+            # Keep the first detected language for the following windows
+            language = language or result["language"]
+            if progress_callback:
+                progress_callback((index + 1) / total_windows)
+
+        result["transcription"] = " ".join(texts)
+        result["audio_duration"] = len(audio_array) / 16000
+        return result
+
     def transcribe_with_timestamps(
         self, 
         audio_path: str, 
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        content_hash: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Transcribe audio with word-level timestamps using Whisper's timestamp feature
+        
+        When the SHA-256 of the audio is given, a cached result for the same
+        content and options is returned without loading or running the model.
         """
+        if content_hash:
+            params = self.result_params(language=language, task="transcribe")
+            cached = self.get_cached_result(content_hash, "timestamped_transcription", params)
+            if cached is not None:
+                return cached
+        
         if self.processor is None or self.model is None:
             self.load_model()
         
         try:
             audio_array = self.preprocess_audio(audio_path)
-            
-            inputs = self.processor(
-                audio_array, 
-                sampling_rate=16000, 
-                return_tensors="pt"
-            ).to(self.device)
+            encoder_outputs = self._encode(audio_array, content_hash)
             
             # Generate with timestamps
             forced_decoder_ids = None
@@ -182,27 +457,12 @@ class WhisperSTTService:
                     task="transcribe"
                 )
             
-            with torch.no_grad():
-                # Generate with special timestamp tokens
-                if torch.cuda.is_available():
-                    with torch.cuda.amp.autocast():
-                        generated_ids = self.model.generate(
-                            inputs.input_features,
-                            forced_decoder_ids=forced_decoder_ids,
-                            max_new_tokens=450,
-                            do_sample=False,
-                            use_cache=True,
-                            return_timestamps=True if hasattr(self.model.config, 'return_timestamps') else False
-                        )
-                else:
-                    generated_ids = self.model.generate(
-                        inputs.input_features,
-                        forced_decoder_ids=forced_decoder_ids,
-                        max_new_tokens=450,
-                        do_sample=False,
-                        use_cache=True,
-                        return_timestamps=True if hasattr(self.model.config, 'return_timestamps') else False
-                    )
+            # Generate with special timestamp tokens
+            generated_ids = self._generate(
+                encoder_outputs,
+                forced_decoder_ids,
+                return_timestamps=True if hasattr(self.model.config, 'return_timestamps') else False
+            )
             
             # Decode with timestamp information
             transcription = self.processor.batch_decode(
@@ -221,6 +481,10 @@ class WhisperSTTService:
                 "duration": len(audio_array) / 16000
             }
             
+            if content_hash:
+                self.cache_result(content_hash, "timestamped_transcription", params, result)
+                self.index_audio_features(content_hash, [self._pool(encoder_outputs, len(audio_array))], result)
+            
             logger.info(f"Transcription with timestamps completed: {len(segments)} segments")
             return result
             
@@ -282,11 +546,20 @@ class WhisperSTTService:
                 "words": []
             }]
     
-    def detect_language(self, audio_path: str) -> str:
-        """Detect the language of the audio file"""
+    def detect_language(self, audio_path: str, content_hash: Optional[str] = None) -> str:
+        """
+        Detect the language of the audio file
+        
+        Runs a single decoder step over the first window. With the content
+        hash, the encoder output is shared with transcriptions of the same audio.
+        """
         try:
-            result = self.transcribe_audio(audio_path, language=None, task="transcribe")
-            return result.get("language", "unknown")
+            if self.processor is None or self.model is None:
+                self.load_model()
+            
+            audio_array = self.preprocess_audio(audio_path)
+            encoder_outputs = self._encode(audio_array, content_hash)
+            return self._detect_language(encoder_outputs)
             
         except Exception as e:
             logger.error(f"Language detection failed: {e}")
@@ -0,0 +1,178 @@
+import time
+import numpy as np
+from typing import Optional, Dict, Any, List, Iterator
+from loguru import logger
+
+from ..database import get_database, AudioProcessingSession
+from .speech_to_text import get_stt_service
+from .text_to_speech import get_tts_service
+from .translation import get_translation_service, split_sentences
+
+
+class SpeechTranslationPipeline:
+    """
+    In-process speech-to-speech translation: Whisper -> translation -> TTS
+
+    Audio and text are handed between stages as NumPy arrays and strings;
+    only the final synthesized audio is written to disk, and the whole run
+    is recorded as a single audio processing session.
+    """
+
+    def __init__(self):
+        self.stt_service = get_stt_service()
+        self.translation_service = get_translation_service()
+        self.tts_service = get_tts_service()
+        self.db = get_database()
+
+        logger.info("SpeechTranslationPipeline initialized")
+
+    def iter_events(
+        self,
+        audio_array: np.ndarray,
+        target_language: str,
+        source_language: Optional[str] = None,
+        model_type: str = "nllb",
+        voice_style: str = "neutral",
+        emotion: str = "neutral",
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        original_filename: str = "pipeline_input",
+        file_size: int = 0
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run the pipeline, yielding results as soon as each stage produces them
+
+        Args:
+            audio_array: 16 kHz mono float32 input audio
+            target_language: Language to translate and speak in
+            source_language: Spoken language (None for auto-detection)
+            model_type: Translation model to use (nllb, aya, m2m)
+            voice_style: TTS voice style
+            emotion: TTS emotion
+            speed: TTS speed multiplier
+            pitch: TTS pitch multiplier
+            original_filename: Uploaded filename recorded on the session
+            file_size: Uploaded size in bytes recorded on the session
+
+        Yields:
+            Event dictionaries of type 'transcription', 'segment' (one per
+            sentence, with its synthesized audio) and finally 'complete'
+        """
+        timings: Dict[str, float] = {}
+
+        session = AudioProcessingSession(
+            original_filename=original_filename,
+            file_path="",
+            file_size=file_size,
+            target_language=target_language
+        )
+        session_id = self.db.create_audio_session(session)
+
+        # Speech-to-text on the in-memory array
+        start = time.perf_counter()
+        transcription = self.stt_service.transcribe_array(audio_array, language=source_language)
+        timings["transcription"] = time.perf_counter() - start
+
+        source_language = source_language or transcription["language"]
+        yield {
+            "type": "transcription",
+            "session_id": session_id,
+            "text": transcription["transcription"],
+            "language": source_language,
+            "duration_seconds": transcription["audio_duration"]
+        }
+
+        # Translate all sentences in one batched call, then synthesize per sentence
+        sentences = split_sentences(transcription["transcription"])
+        start = time.perf_counter()
+        translations = self.translation_service.translate_texts(
+            sentences, source_language, target_language, model_type
+        ) if sentences else []
+        timings["translation"] = time.perf_counter() - start
+
+        audio_parts: List[np.ndarray] = []
+        start = time.perf_counter()
+        for index, (sentence, translation) in enumerate(zip(sentences, translations)):
+            audio = self.tts_service.synthesize_array(
+                translation["translated_text"],
+                language=translation["target_language"],
+                voice_style=voice_style,
+                emotion=emotion,
+                speed=speed,
+                pitch=pitch
+            )
+            audio_parts.append(audio)
+
+            yield {
+                "type": "segment",
+                "index": index,
+                "source_text": sentence,
+                "translated_text": translation["translated_text"],
+                "audio": audio,
+                "sample_rate": self.tts_service.sample_rate
+            }
+        timings["synthesis"] = time.perf_counter() - start
+
+        # Write the complete translated audio once
+        translated_text = " ".join(t["translated_text"] for t in translations)
+        full_audio = np.concatenate(audio_parts) if audio_parts else np.zeros(0, dtype=np.float32)
+        saved = self.tts_service.save_audio(full_audio, translated_text)
+
+        session.transcription = transcription["transcription"]
+        session.translation = translated_text
+        session.duration_seconds = transcription["audio_duration"]
+        session.synthesized_audio_path = saved["audio_path"]
+        session.metadata = {
+            "pipeline": "speech_to_speech",
+            "source_language": source_language,
+            "model_type": model_type,
+            "segments": len(sentences),
+            "timings": {stage: round(seconds, 3) for stage, seconds in timings.items()}
+        }
+        self.db.update_audio_session(session)
+
+        logger.info(
+            f"Speech translation completed for session {session_id}: "
+            f"{source_language} -> {target_language}, {len(sentences)} segments"
+        )
+
+        yield {
+            "type": "complete",
+            "session_id": session_id,
+            "transcription": transcription["transcription"],
+            "translation": translated_text,
+            "source_language": source_language,
+            "target_language": target_language,
+            "audio_filename": saved["filename"],
+            "audio_duration_seconds": saved["duration_seconds"],
+            "timings": session.metadata["timings"]
+        }
+
+    def run(self, audio_array: np.ndarray, target_language: str, **kwargs) -> Dict[str, Any]:
+        """Run the pipeline to completion and return the final result with per-sentence text"""
+        segments = []
+        result: Dict[str, Any] = {}
+
+        for event in self.iter_events(audio_array, target_language, **kwargs):
+            if event["type"] == "segment":
+                segments.append({
+                    "index": event["index"],
+                    "source_text": event["source_text"],
+                    "translated_text": event["translated_text"]
+                })
+            elif event["type"] == "complete":
+                result = event
+
+        result["segments"] = segments
+        return result
+
+
+# Global speech translation pipeline instance
+_speech_translation_pipeline: Optional[SpeechTranslationPipeline] = None
+
+def get_speech_translation_pipeline() -> SpeechTranslationPipeline:
+    """Get or create global speech translation pipeline instance"""
+    global _speech_translation_pipeline
+    if _speech_translation_pipeline is None:
+        _speech_translation_pipeline = SpeechTranslationPipeline()
+    return _speech_translation_pipeline
@@ -7,10 +7,12 @@ from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 import soundfile as sf
 from loguru import logger
 import hashlib
+import io
 import uuid
 
 from ..core.config import settings
 from ..security import get_encryption
+from ..database import get_artifact_index
 
 
 class DiaTTSService:
@@ -117,57 +119,84 @@ class DiaTTSService:
         Returns:
             Dictionary with audio file path and metadata
         """
-        if self.model is None:
-            self.load_model()
-        
         try:
-            # Generate unique filename
-            text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
-            filename = f"tts_{text_hash}_{uuid.uuid4().hex[:8]}.wav"
-            output_path = Path(settings.AUDIO_OUTPUT_FOLDER) / filename
-            
-            if hasattr(self, 'is_fallback') and self.is_fallback:
-                audio_data = self._synthesize_with_fallback(text, language)
-            else:
-                audio_data = self._synthesize_with_dia(
-                    text, language, voice_style, emotion, speed, pitch
-                )
-            
-            # Apply speed and pitch modifications if needed
-            if speed != 1.0 or pitch != 1.0:
-                audio_data = self._modify_audio_properties(audio_data, speed, pitch)
-            
-            # Save audio file
-            sf.write(str(output_path), audio_data, self.sample_rate)
-            
-            # Encrypt if required
-            final_path = str(output_path)
-            if self.encryption:
-                encrypted_path = str(output_path) + '.encrypted'
-                self.encryption.encrypt_file(str(output_path), encrypted_path)
-                output_path.unlink()  # Remove unencrypted file
-                final_path = encrypted_path
+            audio_data = self.synthesize_array(
+                text, language, voice_style, emotion, speed, pitch
+            )
+            result = self.save_audio(audio_data, text)
             
-            result = {
-                "audio_path": final_path,
-                "filename": Path(final_path).name,
+            result.update({
                 "text": text,
                 "language": language,
                 "voice_style": voice_style,
-                "emotion": emotion,
-                "duration_seconds": len(audio_data) / self.sample_rate,
-                "sample_rate": self.sample_rate,
-                "model": self.model_name,
-                "encrypted": self.encryption is not None
-            }
+                "emotion": emotion
+            })
             
-            logger.info(f"Speech synthesized: {len(text)} chars -> {final_path}")
+            logger.info(f"Speech synthesized: {len(text)} chars -> {result['audio_path']}")
             return result
             
         except Exception as e:
             logger.error(f"Speech synthesis failed: {e}")
             raise
     
+    def synthesize_array(
+        self,
+        text: str,
+        language: str = "en",
+        voice_style: str = "neutral",
+        emotion: str = "neutral",
+        speed: float = 1.0,
+        pitch: float = 1.0
+    ) -> np.ndarray:
+        """Synthesize speech to an in-memory float32 waveform at self.sample_rate"""
+        if self.model is None:
+            self.load_model()
+        
+        if hasattr(self, 'is_fallback') and self.is_fallback:
+            audio_data = self._synthesize_with_fallback(text, language)
+        else:
+            audio_data = self._synthesize_with_dia(
+                text, language, voice_style, emotion, speed, pitch
+            )
+        
+        # Apply speed and pitch modifications if needed
+        if speed != 1.0 or pitch != 1.0:
+            audio_data = self._modify_audio_properties(audio_data, speed, pitch)
+        
+        return audio_data
+    
+    def save_audio(self, audio_data: np.ndarray, text: str) -> Dict[str, Any]:
+        """Write a synthesized waveform to the output folder, encrypting if required"""
+        # Generate unique filename
+        text_hash = hashlib.md5(text.encode()).hexdigest()[:8]
+        filename = f"tts_{text_hash}_{uuid.uuid4().hex[:8]}.wav"
+        output_path = Path(settings.AUDIO_OUTPUT_FOLDER) / filename
+        
+        # Save audio file, encrypting in memory if required
+        final_path = str(output_path)
+        if self.encryption:
+            buffer = io.BytesIO()
+            sf.write(buffer, audio_data, self.sample_rate, format="WAV")
+            final_path = self.encryption.write_encrypted(str(output_path) + '.encrypted', buffer.getvalue())
+        else:
+            sf.write(str(output_path), audio_data, self.sample_rate)
+        
+        get_artifact_index().register(
+            final_path,
+            Path(final_path).stat().st_size,
+            kind="tts_output",
+            ttl_seconds=settings.OUTPUT_TTL_HOURS * 3600
+        )
+        
+        return {
+            "audio_path": final_path,
+            "filename": Path(final_path).name,
+            "duration_seconds": len(audio_data) / self.sample_rate,
+            "sample_rate": self.sample_rate,
+            "model": self.model_name,
+            "encrypted": self.encryption is not None
+        }
+    
     def _synthesize_with_dia(
         self, 
         text: str, 
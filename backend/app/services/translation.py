@@ -1,9 +1,236 @@
+import re
+import threading
 import torch
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
 from loguru import logger
 
 from ..core.config import settings
+from ..core.cache import LRUCache
+
+
+# Language names accepted from clients, mapped to ISO 639-1
+LANGUAGE_NAMES = {
+    "english": "en",
+    "spanish": "es",
+    "french": "fr",
+    "german": "de",
+    "italian": "it",
+    "portuguese": "pt",
+    "russian": "ru",
+    "chinese": "zh",
+    "japanese": "ja",
+    "korean": "ko",
+    "arabic": "ar",
+    "hindi": "hi",
+    "dutch": "nl",
+    "polish": "pl",
+    "turkish": "tr",
+    "swedish": "sv",
+    "danish": "da",
+    "norwegian": "no",
+    "finnish": "fi",
+    "thai": "th",
+    "vietnamese": "vi",
+    "indonesian": "id",
+    "malay": "ms",
+    "ukrainian": "uk",
+    "czech": "cs",
+    "greek": "el",
+    "hebrew": "he",
+    "romanian": "ro",
+    "hungarian": "hu",
+    "bengali": "bn",
+    "urdu": "ur",
+    "persian": "fa"
+}
+
+# ISO 639-1 -> (ISO 639-3, FLORES-200 code used by NLLB)
+ISO_LANGUAGE_CODES = {
+    "en": ("eng", "eng_Latn"),
+    "es": ("spa", "spa_Latn"),
+    "fr": ("fra", "fra_Latn"),
+    "de": ("deu", "deu_Latn"),
+    "it": ("ita", "ita_Latn"),
+    "pt": ("por", "por_Latn"),
+    "ru": ("rus", "rus_Cyrl"),
+    "zh": ("zho", "zho_Hans"),
+    "ja": ("jpn", "jpn_Jpan"),
+    "ko": ("kor", "kor_Hang"),
+    "ar": ("ara", "arb_Arab"),
+    "hi": ("hin", "hin_Deva"),
+    "nl": ("nld", "nld_Latn"),
+    "pl": ("pol", "pol_Latn"),
+    "tr": ("tur", "tur_Latn"),
+    "sv": ("swe", "swe_Latn"),
+    "da": ("dan", "dan_Latn"),
+    "no": ("nor", "nob_Latn"),
+    "fi": ("fin", "fin_Latn"),
+    "th": ("tha", "tha_Thai"),
+    "vi": ("vie", "vie_Latn"),
+    "id": ("ind", "ind_Latn"),
+    "ms": ("msa", "zsm_Latn"),
+    "uk": ("ukr", "ukr_Cyrl"),
+    "cs": ("ces", "ces_Latn"),
+    "el": ("ell", "ell_Grek"),
+    "he": ("heb", "heb_Hebr"),
+    "ro": ("ron", "ron_Latn"),
+    "hu": ("hun", "hun_Latn"),
+    "bn": ("ben", "ben_Beng"),
+    "ur": ("urd", "urd_Arab"),
+    "fa": ("fas", "pes_Arab")
+}
+
+# Languages assumed per model until its tokenizer has been loaded
+DEFAULT_SUPPORTED_LANGUAGES = {
+    "nllb": [
+        "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko",
+        "ar", "hi", "nl", "pl", "tr", "sv", "da", "no", "fi"
+    ],
+    "m2m": [
+        "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko",
+        "ar", "hi", "nl", "pl", "tr"
+    ],
+    "aya": [
+        "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko",
+        "ar", "hi", "nl", "pl", "tr", "th", "vi", "id", "ms"
+    ]
+}
+
+
+# Sentence boundaries used to split long inputs (Latin and CJK punctuation)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[\u3002\uff01\uff1f])")
+
+# Words and individual punctuation marks, as a rough proxy for subword tokens
+_TOKEN_PIECE_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def _is_cjk(char: str) -> bool:
+    """Check whether a character belongs to a script tokenized roughly per character"""
+    code = ord(char)
+    return (
+        0x3040 <= code <= 0x30ff or  # Hiragana, Katakana
+        0x3400 <= code <= 0x9fff or  # CJK ideographs
+        0xac00 <= code <= 0xd7af     # Hangul syllables
+    )
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences on Latin and CJK terminal punctuation"""
+    return [sentence for sentence in _SENTENCE_BOUNDARY.split(text.strip()) if sentence]
+
+
+class UnsupportedLanguageError(ValueError):
+    """Raised when a language or language pair is not supported by a model"""
+
+
+class LanguageRegistry:
+    """
+    Precomputed language lookup tables shared by all translation requests.
+    
+    Aliases (names, ISO 639-1/3 and FLORES codes) are resolved once at
+    construction; per-model code and forced-BOS tables are filled in from
+    the tokenizer when a model is loaded.
+    """
+    
+    def __init__(self):
+        self._aliases: Dict[str, str] = {}
+        self._flores_codes: Dict[str, str] = {}
+        
+        for iso1, (iso3, flores) in ISO_LANGUAGE_CODES.items():
+            self._aliases[iso1] = iso1
+            self._aliases[iso3] = iso1
+            self._aliases[flores.lower()] = iso1
+            self._flores_codes[iso1] = flores
+        
+        for name, iso1 in LANGUAGE_NAMES.items():
+            self._aliases[name] = iso1
+        
+        self._supported: Dict[str, frozenset] = {
+            model_type: frozenset(codes)
+            for model_type, codes in DEFAULT_SUPPORTED_LANGUAGES.items()
+        }
+        self._model_codes: Dict[str, Dict[str, str]] = {}
+        self._bos_ids: Dict[str, Dict[str, int]] = {}
+    
+    def normalize(self, language: str) -> str:
+        """Resolve a language name or code to its canonical ISO 639-1 code"""
+        key = language.lower().strip().replace("-", "_")
+        code = self._aliases.get(key)
+        if code is None:
+            # Accept regional variants such as en_US or pt_BR
+            code = self._aliases.get(key.split("_", 1)[0])
+        if code is None:
+            raise UnsupportedLanguageError(f"Unknown language: {language}")
+        return code
+    
+    def register_tokenizer(self, model_type: str, tokenizer: Any):
+        """Build code and forced-BOS tables for a freshly loaded tokenizer"""
+        model_codes: Dict[str, str] = {}
+        bos_ids: Dict[str, int] = {}
+        
+        if model_type == "nllb":
+            vocab_ids = getattr(tokenizer, "lang_code_to_id", None) or {}
+            for iso1, flores in self._flores_codes.items():
+                token_id = vocab_ids.get(flores)
+                if token_id is None:
+                    token_id = tokenizer.convert_tokens_to_ids(flores)
+                if token_id is None or token_id == tokenizer.unk_token_id:
+                    continue
+                model_codes[iso1] = flores
+                bos_ids[iso1] = token_id
+        
+        elif model_type == "m2m":
+            for iso1 in getattr(tokenizer, "lang_code_to_id", None) or {}:
+                if iso1 in self._aliases:
+                    model_codes[iso1] = iso1
+                    bos_ids[iso1] = tokenizer.get_lang_id(iso1)
+        
+        if model_codes:
+            self._model_codes[model_type] = model_codes
+            self._bos_ids[model_type] = bos_ids
+            self._supported[model_type] = frozenset(model_codes)
+        
+        logger.info(
+            f"Language registry for {model_type}: "
+            f"{len(self._supported.get(model_type, ()))} languages"
+        )
+    
+    def validate_pair(self, model_type: str, source_language: str, target_language: str) -> Tuple[str, str]:
+        """Normalize a language pair and reject it if the model cannot serve it"""
+        supported = self._supported.get(model_type)
+        if supported is None:
+            raise ValueError(f"Unknown model type: {model_type}")
+        
+        src = self.normalize(source_language)
+        tgt = self.normalize(target_language)
+        
+        for language, code in ((source_language, src), (target_language, tgt)):
+            if code not in supported:
+                raise UnsupportedLanguageError(
+                    f"Language '{language}' is not supported by model '{model_type}'"
+                )
+        return src, tgt
+    
+    def model_code(self, model_type: str, language: str) -> str:
+        """Get the model-specific language code for a canonical code"""
+        codes = self._model_codes.get(model_type)
+        if codes is not None and language in codes:
+            return codes[language]
+        if model_type == "nllb":
+            return self._flores_codes.get(language, f"{language}_Latn")
+        return language
+    
+    def forced_bos_token_id(self, model_type: str, language: str) -> Optional[int]:
+        """Get the forced-BOS token id for a target language, if known"""
+        return self._bos_ids.get(model_type, {}).get(language)
+    
+    def supported_languages(self) -> Dict[str, List[str]]:
+        """Get sorted supported language codes for each model"""
+        return {
+            model_type: sorted(codes)
+            for model_type, codes in self._supported.items()
+        }
 
 
 class TranslationService:
@@ -24,24 +251,13 @@ class TranslationService:
         self.model: Optional[AutoModelForSeq2SeqLM] = None
         self.current_model_name = None
         
-        # Language mappings for different models
-        self.language_codes = {
-            "english": "en",
-            "spanish": "es", 
-            "french": "fr",
-            "german": "de",
-            "italian": "it",
-            "portuguese": "pt",
-            "russian": "ru",
-            "chinese": "zh",
-            "japanese": "ja",
-            "korean": "ko",
-            "arabic": "ar",
-            "hindi": "hi",
-            "dutch": "nl",
-            "polish": "pl",
-            "turkish": "tr"
-        }
+        # Language lookup tables, refined per model as tokenizers load
+        self.languages = LanguageRegistry()
+        
+        # (model, source language, text) -> input ids
+        self._token_cache = LRUCache(maxsize=settings.TRANSLATION_TOKEN_CACHE_SIZE)
+        # The tokenizer's source language is shared state; hold while encoding
+        self._tokenizer_lock = threading.Lock()
         
         logger.info(f"TranslationService initialized with device: {self.device}")
     
@@ -74,6 +290,7 @@ class TranslationService:
             
             self.model.eval()
             self.current_model_name = model_name
+            self.languages.register_tokenizer(model_type, self.tokenizer)
             
             logger.info(f"Translation model loaded successfully: {model_name}")
             
@@ -81,6 +298,22 @@ class TranslationService:
             logger.error(f"Error loading translation model {model_name}: {e}")
             raise
     
+    def _prepare(self, model_type: str, source_language: str, target_language: str) -> Tuple[str, str]:
+        """Validate a language pair and make sure the requested model is loaded"""
+        # Reject unsupported pairs before any model or tensor work
+        src_lang, tgt_lang = self.languages.validate_pair(
+            model_type, source_language, target_language
+        )
+        
+        if self.model is None or self.current_model_name != self.models[model_type]:
+            self.load_model(model_type)
+            # The loaded tokenizer may support fewer languages than assumed
+            src_lang, tgt_lang = self.languages.validate_pair(
+                model_type, source_language, target_language
+            )
+        
+        return src_lang, tgt_lang
+    
     def translate_text(
         self,
         text: str,
@@ -91,6 +324,9 @@ class TranslationService:
         """
         Translate text from source to target language
         
+        Inputs longer than the model's context are split on sentence
+        boundaries and translated as one batch.
+        
         Args:
             text: Text to translate
             source_language: Source language code or name
@@ -100,106 +336,191 @@ class TranslationService:
         Returns:
             Dictionary with translation and metadata
         """
-        if self.model is None or self.current_model_name != self.models[model_type]:
-            self.load_model(model_type)
+        return self.translate_texts(
+            [text], source_language, target_language, model_type
+        )[0]
+    
+    def translate_texts(
+        self,
+        texts: List[str],
+        source_language: str,
+        target_language: str,
+        model_type: str = "nllb"
+    ) -> List[Dict[str, Any]]:
+        """
+        Translate several texts, batching model calls by estimated cost
+        
+        Args:
+            texts: Texts to translate
+            source_language: Source language code or name
+            target_language: Target language code or name
+            model_type: Model to use (nllb, aya, m2m)
+        
+        Returns:
+            List of translation dictionaries in the same order as texts
+        """
+        src_lang, tgt_lang = self._prepare(model_type, source_language, target_language)
         
         try:
-            # Normalize language codes
-            src_lang = self._normalize_language_code(source_language)
-            tgt_lang = self._normalize_language_code(target_language)
+            # Split long inputs, then order chunks by cost so each batch pads little
+            chunks = []
+            for index, text in enumerate(texts):
+                for chunk in self.split_text(text, settings.TRANSLATION_MAX_INPUT_TOKENS, src_lang):
+                    chunks.append((index, len(chunks), chunk))
+            chunks.sort(key=lambda item: self.estimate_tokens(item[2], src_lang))
             
-            # Prepare input based on model type
-            if model_type == "nllb":
-                translation_result = self._translate_with_nllb(text, src_lang, tgt_lang)
-            elif model_type == "m2m":
-                translation_result = self._translate_with_m2m(text, src_lang, tgt_lang)
-            else:  # aya or other models
-                translation_result = self._translate_with_generic(text, src_lang, tgt_lang)
+            translated_chunks: Dict[int, str] = {}
+            batch_size = max(1, settings.TRANSLATION_BATCH_SIZE)
+            for start in range(0, len(chunks), batch_size):
+                batch = chunks[start:start + batch_size]
+                batch_texts = [chunk for _, _, chunk in batch]
+                
+                if model_type in ("nllb", "m2m"):
+                    outputs = self._translate_seq2seq(model_type, batch_texts, src_lang, tgt_lang)
+                else:  # aya or other models
+                    outputs = [
+                        self._translate_with_generic(chunk, src_lang, tgt_lang)
+                        for chunk in batch_texts
+                    ]
+                
+                for (_, position, _), output in zip(batch, outputs):
+                    translated_chunks[position] = output
             
-            result = {
-                "translated_text": translation_result,
-                "source_language": src_lang,
-                "target_language": tgt_lang,
-                "original_text": text,
-                "model": self.current_model_name,
-                "confidence": 1.0  # Most models don't provide confidence scores
-            }
+            pieces: List[List[str]] = [[] for _ in texts]
+            for index, position, _ in sorted(chunks, key=lambda item: item[1]):
+                pieces[index].append(translated_chunks[position])
+            
+            results = [
+                {
+                    "translated_text": " ".join(parts).strip(),
+                    "source_language": src_lang,
+                    "target_language": tgt_lang,
+                    "original_text": text,
+                    "model": self.current_model_name,
+                    "confidence": 1.0  # Most models don't provide confidence scores
+                }
+                for text, parts in zip(texts, pieces)
+            ]
             
-            logger.info(f"Translation completed: {src_lang} -> {tgt_lang}")
-            return result
+            logger.info(f"Translation completed: {src_lang} -> {tgt_lang} ({len(texts)} texts, {len(chunks)} chunks)")
+            return results
             
         except Exception as e:
             logger.error(f"Translation failed: {e}")
             raise
     
-    def _translate_with_nllb(self, text: str, src_lang: str, tgt_lang: str) -> str:
-        """Translate using NLLB model"""
-        try:
-            # NLLB uses specific language codes
-            nllb_src = self._get_nllb_lang_code(src_lang)
-            nllb_tgt = self._get_nllb_lang_code(tgt_lang)
-            
-            self.tokenizer.src_lang = nllb_src
-            
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=512
-            ).to(self.device)
-            
-            with torch.no_grad():
-                generated_tokens = self.model.generate(
-                    **inputs,
-                    forced_bos_token_id=self.tokenizer.lang_code_to_id[nllb_tgt],
-                    max_length=512,
-                    num_beams=4,
-                    early_stopping=True
-                )
-            
-            translation = self.tokenizer.batch_decode(
-                generated_tokens, 
-                skip_special_tokens=True
-            )[0]
-            
-            return translation.strip()
+    def estimate_tokens(self, text: str, src_lang: Optional[str] = None) -> int:
+        """
+        Cheaply estimate the number of tokens a text will encode to
+        
+        Uses the exact count when the text is already in the tokenization
+        cache for src_lang, otherwise a word/script heuristic that errs on
+        the high side.
+        """
+        if self.current_model_name is not None:
+            key = (self.current_model_name, src_lang, text)
+            input_ids = self._token_cache.peek(key)
+            if input_ids is not None:
+                return len(input_ids)
+        
+        count = 2  # language tag and end-of-sequence tokens
+        for piece in _TOKEN_PIECE_PATTERN.findall(text):
+            if _is_cjk(piece[0]):
+                count += len(piece)
+            else:
+                count += 1 + len(piece) // 6
+        return count
+    
+    def split_text(self, text: str, max_tokens: int, src_lang: Optional[str] = None) -> List[str]:
+        """Split text on sentence boundaries into chunks of at most max_tokens (estimated)"""
+        if self.estimate_tokens(text, src_lang) <= max_tokens:
+            return [text]
+        
+        chunks: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        
+        for sentence in split_sentences(text):
+            # Sentences that are too long on their own are split on whitespace
+            parts = [sentence]
+            if self.estimate_tokens(sentence, src_lang) > max_tokens:
+                parts = sentence.split()
             
-        except Exception as e:
-            logger.error(f"NLLB translation failed: {e}")
-            raise
+            for part in parts:
+                part_tokens = self.estimate_tokens(part, src_lang) - 2
+                if current and current_tokens + part_tokens > max_tokens - 2:
+                    chunks.append(" ".join(current))
+                    current, current_tokens = [], 0
+                current.append(part)
+                current_tokens += part_tokens
+        
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
     
-    def _translate_with_m2m(self, text: str, src_lang: str, tgt_lang: str) -> str:
-        """Translate using M2M100 model"""
+    def _encode(self, model_type: str, text: str, src_lang: Optional[str]) -> Tuple[int, ...]:
+        """Tokenize text to input ids, reusing cached encodings"""
+        key = (self.current_model_name, src_lang, text)
+        input_ids = self._token_cache.get(key)
+        if input_ids is None:
+            with self._tokenizer_lock:
+                if model_type in ("nllb", "m2m"):
+                    self.tokenizer.src_lang = self.languages.model_code(model_type, src_lang)
+                input_ids = tuple(self.tokenizer(
+                    text,
+                    truncation=True,
+                    max_length=512
+                )["input_ids"])
+            self._token_cache.put(key, input_ids)
+        return input_ids
+    
+    def _collate(self, batch_ids: List[Tuple[int, ...]]) -> Dict[str, torch.Tensor]:
+        """Right-pad cached input ids into model input tensors"""
+        pad_id = self.tokenizer.pad_token_id or 0
+        max_len = max(len(ids) for ids in batch_ids)
+        
+        input_ids = torch.full((len(batch_ids), max_len), pad_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch_ids), max_len), dtype=torch.long)
+        for row, ids in enumerate(batch_ids):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        
+        return {
+            "input_ids": input_ids.to(self.device),
+            "attention_mask": attention_mask.to(self.device)
+        }
+    
+    def _translate_seq2seq(
+        self,
+        model_type: str,
+        texts: List[str],
+        src_lang: str,
+        tgt_lang: str
+    ) -> List[str]:
+        """Translate a batch with NLLB or M2M100 using forced target-language BOS"""
         try:
-            self.tokenizer.src_lang = src_lang
-            
-            inputs = self.tokenizer(
-                text,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=512
-            ).to(self.device)
+            inputs = self._collate([
+                self._encode(model_type, text, src_lang) for text in texts
+            ])
             
             with torch.no_grad():
                 generated_tokens = self.model.generate(
                     **inputs,
-                    forced_bos_token_id=self.tokenizer.get_lang_id(tgt_lang),
+                    forced_bos_token_id=self.languages.forced_bos_token_id(model_type, tgt_lang),
                     max_length=512,
                     num_beams=4,
                     early_stopping=True
                 )
             
-            translation = self.tokenizer.batch_decode(
+            translations = self.tokenizer.batch_decode(
                 generated_tokens, 
                 skip_special_tokens=True
-            )[0]
+            )
             
-            return translation.strip()
+            return [translation.strip() for translation in translations]
             
         except Exception as e:
-            logger.error(f"M2M translation failed: {e}")
+            logger.error(f"{model_type.upper()} translation failed: {e}")
             raise
     
     def _translate_with_generic(self, text: str, src_lang: str, tgt_lang: str) -> str:
@@ -208,13 +529,7 @@ class TranslationService:
             # For models like Aya, use a more generic approach
             prompt = f"Translate the following text from {src_lang} to {tgt_lang}: {text}"
             
-            inputs = self.tokenizer(
-                prompt,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=512
-            ).to(self.device)
+            inputs = self._collate([self._encode("aya", prompt, None)])
             
             with torch.no_grad():
                 generated_tokens = self.model.generate(
@@ -241,54 +556,9 @@ class TranslationService:
             logger.error(f"Generic translation failed: {e}")
             raise
     
-    def _normalize_language_code(self, language: str) -> str:
-        """Normalize language input to standard code"""
-        language = language.lower().strip()
-        
-        # If it's already a code, return as-is
-        if len(language) == 2:
-            return language
-        
-        # Map from full name to code
-        return self.language_codes.get(language, language)
-    
-    def _get_nllb_lang_code(self, lang: str) -> str:
-        """Get NLLB-specific language codes"""
-        nllb_codes = {
-            "en": "eng_Latn",
-            "es": "spa_Latn", 
-            "fr": "fra_Latn",
-            "de": "deu_Latn",
-            "it": "ita_Latn",
-            "pt": "por_Latn",
-            "ru": "rus_Cyrl",
-            "zh": "zho_Hans",
-            "ja": "jpn_Jpan",
-            "ko": "kor_Hang",
-            "ar": "ara_Arab",
-            "hi": "hin_Deva",
-            "nl": "nld_Latn",
-            "pl": "pol_Latn",
-            "tr": "tur_Latn"
-        }
-        return nllb_codes.get(lang, f"{lang}_Latn")
-    
     def get_supported_languages(self) -> Dict[str, List[str]]:
         """Get list of supported languages for each model"""
-        return {
-            "nllb": [
-                "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko", 
-                "ar", "hi", "nl", "pl", "tr", "sv", "da", "no", "fi"
-            ],
-            "m2m": [
-                "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko",
-                "ar", "hi", "nl", "pl", "tr"
-            ],
-            "aya": [
-                "en", "es", "fr", "de", "it", "pt", "ru", "zh", "ja", "ko",
-                "ar", "hi", "nl", "pl", "tr", "th", "vi", "id", "ms"
-            ]
-        }
+        return self.languages.supported_languages()
     
     def detect_language(self, text: str) -> str:
         """
@@ -2,15 +2,24 @@ import torch
 import torchaudio
 import numpy as np
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, Callable
+import io
 import uuid
 import hashlib
+import threading
 from datetime import datetime
 from loguru import logger
 
 from ..core.config import settings
-from ..database import get_vector_store, get_database, VoiceClone
+from ..core.cache import LRUCache
+from ..database import (
+    get_vector_store, get_database, get_artifact_index, get_blob_store, VoiceClone,
+    voice_filter, voice_metadata
+)
 from ..security import get_encryption
+from .audio_io import load_audio
+from .file_handler import get_file_handler
+from .speaker_encoder import get_speaker_encoder
 
 
 class VoiceCloningService:
@@ -20,102 +29,93 @@ class VoiceCloningService:
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.vector_store = get_vector_store()
         self.db = get_database()
+        self.blobs = get_blob_store()
+        self.file_handler = get_file_handler()
         self.encryption = get_encryption() if settings.ENCRYPT_AUDIO_FILES else None
         
-        # Model configuration (to be implemented with actual models)
-        self.embedding_model = None
+        # Speaker encoder shared with other services; synthesis model still to be implemented
+        self.encoder = get_speaker_encoder()
         self.cloning_model = None
         self.sample_rate = 22050
         
+        # Speaker conditioning tensors of recently used clones, already on the device
+        self._speaker_cache = LRUCache(maxsize=settings.SPEAKER_CACHE_SIZE)
+        self._speaker_lock = threading.Lock()
+        
         logger.info(f"VoiceCloningService initialized on {self.device}")
     
-    def extract_voice_embedding(self, audio_path: str) -> np.ndarray:
+    def _load_sample(self, audio_path: str) -> np.ndarray:
+        """Decode a voice sample at the encoder rate, decrypting in memory if needed"""
+        if self.encryption and audio_path.endswith('.encrypted'):
+            with self.encryption.open_decrypted(audio_path) as source:
+                return load_audio(source, self.encoder.sample_rate)
+        return load_audio(audio_path, self.encoder.sample_rate)
+    
+    def extract_voice_embedding(self, audio_path: str, content_hash: Optional[str] = None) -> np.ndarray:
         """
-        Extract voice embedding from audio sample
-        This would use models like Silero or similar for voice characterization
+        Extract a speaker embedding from an audio sample
+        
+        When the SHA-256 of the audio is given, an embedding already computed
+        for the same content is reused instead of reprocessing the audio.
         """
-        try:
-            # Decrypt if needed
-            if self.encryption and audio_path.endswith('.encrypted'):
-                temp_path = audio_path.replace('.encrypted', '_temp')
-                audio_path = self.encryption.decrypt_file(audio_path, temp_path)
-            
-            # Load audio
-            waveform, sr = torchaudio.load(audio_path)
-            
-            # Resample if needed
-            if sr != self.sample_rate:
-                resampler = torchaudio.transforms.Resample(sr, self.sample_rate)
-                waveform = resampler(waveform)
-            
-            # Convert to mono if stereo
-            if waveform.shape[0] > 1:
-                waveform = torch.mean(waveform, dim=0, keepdim=True)
-            
-            # Extract features using a voice embedding model
-            embedding = self._extract_features_with_model(waveform)
-            
-            # Clean up temp file
-            if self.encryption and '_temp' in audio_path:
-                Path(audio_path).unlink(missing_ok=True)
-            
-            logger.info(f"Voice embedding extracted: {embedding.shape}")
-            return embedding
-            
-        except Exception as e:
-            logger.error(f"Voice embedding extraction failed: {e}")
-            raise
+        return self.extract_voice_embeddings([audio_path], [content_hash])[0]
     
-    def _extract_features_with_model(self, waveform: torch.Tensor) -> np.ndarray:
+    def extract_voice_embeddings(
+        self,
+        audio_paths: List[str],
+        content_hashes: Optional[List[Optional[str]]] = None
+    ) -> List[np.ndarray]:
         """
-        Extract voice features using embedding model
-        Placeholder for actual implementation with Silero or similar
+        Extract speaker embeddings for many samples in batched encoder passes
+        
+        Args:
+            audio_paths: Paths to the audio samples
+            content_hashes: Optional SHA-256 per sample, used to reuse embeddings
+        
+        Returns:
+            One L2-normalized embedding per sample, in input order
         """
         try:
-            # This is a placeholder implementation
-            # In practice, would use:
-            # - Silero voice embeddings: torch.hub.load('snakers4/silero-models', 'silero_te')
-            # - Or Coqui TTS voice encoder
-            # - Or WaveRNN/WaveNet based encoders
-            
-            # For now, create a mock embedding using audio statistics
-            waveform_np = waveform.squeeze().numpy()
-            
-            # Extract basic audio features as placeholder
-            features = []
-            
-            # Spectral features
-            fft = np.fft.fft(waveform_np)
-            spectral_centroid = np.mean(np.abs(fft))
-            features.append(spectral_centroid)
-            
-            # Statistical features
-            features.extend([
-                np.mean(waveform_np),
-                np.std(waveform_np),
-                np.max(waveform_np),
-                np.min(waveform_np),
-                np.median(waveform_np)
-            ])
-            
-            # Pad or truncate to standard embedding size (e.g., 512 dimensions)
-            embedding_size = 512
-            if len(features) < embedding_size:
-                features.extend([0.0] * (embedding_size - len(features)))
-            else:
-                features = features[:embedding_size]
-            
-            return np.array(features, dtype=np.float32)
+            content_hashes = content_hashes or [None] * len(audio_paths)
+            params = f"model={self.encoder.model_name}"
+            embeddings: List[Optional[np.ndarray]] = [None] * len(audio_paths)
+            
+            for index, content_hash in enumerate(content_hashes):
+                if content_hash:
+                    cached = self.blobs.get_result(content_hash, "voice_embedding", params)
+                    if cached is not None:
+                        embeddings[index] = np.array(cached, dtype=np.float32)
+            
+            pending = [index for index, embedding in enumerate(embeddings) if embedding is None]
+            if pending:
+                computed = self.encoder.embed_batch([self._load_sample(audio_paths[i]) for i in pending])
+                for index, embedding in zip(pending, computed):
+                    embeddings[index] = embedding
+                    if content_hashes[index]:
+                        self.blobs.put_result(
+                            content_hashes[index], "voice_embedding", embedding.tolist(), params
+                        )
+            
+            logger.info(
+                f"Voice embeddings extracted: {len(pending)} computed, "
+                f"{len(audio_paths) - len(pending)} reused"
+            )
+            return embeddings
             
         except Exception as e:
-            logger.error(f"Feature extraction failed: {e}")
+            logger.error(f"Voice embedding extraction failed: {e}")
             raise
     
     def create_voice_clone(
         self,
         name: str,
         sample_audio_path: str,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        clone_id: Optional[str] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
     ) -> Dict[str, Any]:
         """
         Create a new voice clone from audio sample
@@ -124,65 +124,59 @@ class VoiceCloningService:
             name: Name for the voice clone
             sample_audio_path: Path to the audio sample
             user_id: Optional user identifier
+            content_hash: Optional SHA-256 of the sample, used to reuse its embedding
+            language: Optional language of the sample, filterable in similarity search
+            tags: Optional labels, filterable in similarity search
+            clone_id: Optional ID reserved for the clone by the caller
+            progress_callback: Called with the completed fraction after each step
         
         Returns:
             Dictionary with clone information
         """
         try:
             # Generate unique ID
-            clone_id = str(uuid.uuid4())
+            clone_id = clone_id or str(uuid.uuid4())
             
             # Extract voice embedding
-            embedding = self.extract_voice_embedding(sample_audio_path)
+            embedding = self.extract_voice_embedding(sample_audio_path, content_hash)
+            if progress_callback:
+                progress_callback(0.7)
             
             # Save embedding to vector store
-            embedding_metadata = {
-                "clone_id": clone_id,
-                "name": name,
-                "user_id": user_id,
-                "sample_path": sample_audio_path,
-                "created_at": datetime.now().isoformat()
-            }
+            embedding_metadata = voice_metadata(
+                language=language,
+                tags=tags,
+                clone_id=clone_id,
+                name=name,
+                user_id=user_id,
+                sample_path=sample_audio_path,
+                created_at=datetime.now().isoformat()
+            )
             
             self.vector_store.store_voice_embedding(
                 voice_id=clone_id,
                 embedding=embedding.tolist(),
                 metadata=embedding_metadata
             )
+            if progress_callback:
+                progress_callback(0.9)
             
-            # Save embedding file
-            embedding_dir = Path("voice_embeddings")
-            embedding_dir.mkdir(exist_ok=True)
-            embedding_path = embedding_dir / f"{clone_id}.npy"
-            np.save(embedding_path, embedding)
-            
-            # Encrypt embedding if needed
-            if self.encryption:
-                encrypted_embedding_path = str(embedding_path) + '.encrypted'
-                self.encryption.encrypt_file(str(embedding_path), encrypted_embedding_path)
-                embedding_path.unlink()  # Remove unencrypted
-                embedding_path = Path(encrypted_embedding_path)
+            # The vector store holds the only copy of the embedding
+            embedding_path = self.vector_store.embedding_ref(clone_id)
             
             # Create database record
             voice_clone = VoiceClone(
                 id=clone_id,
                 name=name,
                 sample_audio_path=sample_audio_path,
-                voice_embedding_path=str(embedding_path),
+                voice_embedding_path=embedding_path,
                 created_at=datetime.now(),
-                metadata=embedding_metadata
+                metadata=embedding_metadata,
+                user_id=user_id
             )
+            self.db.create_voice_clone(voice_clone)
             
-            # Note: Database creation would need to be implemented in the database models
-            
-            result = {
-                "clone_id": clone_id,
-                "name": name,
-                "status": "created",
-                "embedding_path": str(embedding_path),
-                "embedding_dimensions": len(embedding),
-                "sample_path": sample_audio_path
-            }
+            result = self._created_result(clone_id, name, len(embedding), sample_audio_path)
             
             logger.info(f"Voice clone created: {name} ({clone_id})")
             return result
@@ -191,6 +185,155 @@ class VoiceCloningService:
             logger.error(f"Voice clone creation failed: {e}")
             raise
     
+    def _created_result(
+        self,
+        clone_id: str,
+        name: str,
+        embedding_dimensions: int,
+        sample_path: str
+    ) -> Dict[str, Any]:
+        """Result describing a newly created clone"""
+        return {
+            "clone_id": clone_id,
+            "name": name,
+            "status": "created",
+            "embedding_path": self.vector_store.embedding_ref(clone_id),
+            "embedding_dimensions": embedding_dimensions,
+            "sample_path": sample_path
+        }
+    
+    def get_created_clone(self, clone_id: str) -> Optional[Dict[str, Any]]:
+        """Creation result of an existing clone, in the shape create_voice_clone returns"""
+        clone = self.db.get_voice_clone(clone_id)
+        if clone is None:
+            return None
+        embedding = self.vector_store.get_voice_embedding(clone_id)
+        return self._created_result(clone.id, clone.name, len(embedding or []), clone.sample_audio_path)
+    
+    def _embed_sample_batch(
+        self,
+        samples: List[Dict[str, Any]],
+        failed: List[Dict[str, Any]]
+    ) -> List[Optional[np.ndarray]]:
+        """Embed a batch of samples, isolating the ones that cannot be decoded"""
+        try:
+            return self.extract_voice_embeddings(
+                [sample["sample_path"] for sample in samples],
+                [sample.get("content_hash") for sample in samples]
+            )
+        except Exception:
+            # Retry one by one so a single bad sample does not fail its batch
+            embeddings: List[Optional[np.ndarray]] = []
+            for sample in samples:
+                try:
+                    embeddings.append(self.extract_voice_embedding(sample["sample_path"], sample.get("content_hash")))
+                except Exception as e:
+                    failed.append({"name": sample["name"], "sample_path": sample["sample_path"], "error": str(e)})
+                    embeddings.append(None)
+            return embeddings
+    
+    def create_voice_clones(
+        self,
+        samples: List[Dict[str, Any]],
+        user_id: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Create many voice clones in one pass
+        
+        Samples are decoded and embedded VOICE_INGEST_BATCH_SIZE at a time,
+        and all embeddings are written to the vector store with one batched
+        add. Samples that cannot be decoded are reported under "failed"
+        without stopping the rest.
+        
+        Args:
+            samples: Dictionaries with name, sample_path and optional content_hash
+            user_id: Optional user identifier applied to every clone
+            language: Optional language applied to every clone
+            tags: Optional labels applied to every clone
+        
+        Returns:
+            Dictionary with the created clones and the failed samples
+        """
+        try:
+            failed: List[Dict[str, Any]] = []
+            embedded = []
+            batch_size = settings.VOICE_INGEST_BATCH_SIZE
+            for start in range(0, len(samples), batch_size):
+                batch = samples[start:start + batch_size]
+                for sample, embedding in zip(batch, self._embed_sample_batch(batch, failed)):
+                    if embedding is not None:
+                        embedded.append((str(uuid.uuid4()), sample, embedding))
+            
+            created_at = datetime.now().isoformat()
+            metadatas = [
+                voice_metadata(
+                    language=language,
+                    tags=tags,
+                    clone_id=clone_id,
+                    name=sample["name"],
+                    user_id=user_id,
+                    sample_path=sample["sample_path"],
+                    created_at=created_at
+                )
+                for clone_id, sample, _ in embedded
+            ]
+            
+            if embedded:
+                self.vector_store.store_voice_embeddings(
+                    voice_ids=[clone_id for clone_id, _, _ in embedded],
+                    embeddings=[embedding.tolist() for _, _, embedding in embedded],
+                    metadatas=metadatas
+                )
+            
+            self.db.create_voice_clones([
+                VoiceClone(
+                    id=clone_id,
+                    name=sample["name"],
+                    sample_audio_path=sample["sample_path"],
+                    voice_embedding_path=self.vector_store.embedding_ref(clone_id),
+                    created_at=datetime.fromisoformat(created_at),
+                    metadata=metadata,
+                    user_id=user_id
+                )
+                for (clone_id, sample, _), metadata in zip(embedded, metadatas)
+            ])
+            
+            created = []
+            for clone_id, sample, embedding in embedded:
+                created.append(self._created_result(clone_id, sample["name"], len(embedding), sample["sample_path"]))
+            
+            logger.info(f"Bulk voice clone creation: {len(created)} created, {len(failed)} failed")
+            return {"created": created, "failed": failed}
+            
+        except Exception as e:
+            logger.error(f"Bulk voice clone creation failed: {e}")
+            raise
+    
+    def get_speaker_conditioning(self, clone_id: str) -> torch.Tensor:
+        """
+        Get a clone's speaker embedding as a (1, dim) float32 tensor on the device
+        
+        Tensors of the SPEAKER_CACHE_SIZE most recently used clones are kept,
+        so repeated synthesis with a popular voice skips the vector store and
+        the host-to-device copy. delete_voice_clone evicts the clone.
+        """
+        speaker = self._speaker_cache.get(clone_id)
+        if speaker is not None:
+            return speaker
+        
+        # Held across the lookup so a concurrent delete cannot be undone by
+        # caching an embedding read just before it
+        with self._speaker_lock:
+            embedding = self.vector_store.get_voice_embedding(clone_id)
+            if embedding is None:
+                raise ValueError(f"Voice clone not found: {clone_id}")
+            
+            speaker = torch.tensor(embedding, dtype=torch.float32, device=self.device).unsqueeze(0)
+            self._speaker_cache.put(clone_id, speaker)
+            return speaker
+    
     def synthesize_with_cloned_voice(
         self,
         text: str,
@@ -209,14 +352,12 @@ class VoiceCloningService:
             Dictionary with synthesized audio information
         """
         try:
-            # Retrieve voice embedding
-            embedding = self.vector_store.get_voice_embedding(clone_id)
-            if embedding is None:
-                raise ValueError(f"Voice clone not found: {clone_id}")
+            # Retrieve speaker conditioning, from the cache for recently used voices
+            speaker = self.get_speaker_conditioning(clone_id)
             
             # Synthesize using the cloned voice
             # This would use the actual voice cloning model (Silero, Coqui, etc.)
-            audio_data = self._synthesize_with_embedding(text, embedding, language)
+            audio_data = self._synthesize_with_embedding(text, speaker, language)
             
             # Save synthesized audio
             output_dir = Path(settings.AUDIO_OUTPUT_FOLDER)
@@ -225,20 +366,30 @@ class VoiceCloningService:
             filename = f"cloned_{clone_id[:8]}_{hashlib.md5(text.encode()).hexdigest()[:8]}.wav"
             output_path = output_dir / filename
             
-            # Save audio
-            torchaudio.save(
-                str(output_path), 
-                torch.from_numpy(audio_data).unsqueeze(0), 
-                self.sample_rate
-            )
-            
-            # Encrypt if needed
+            # Save audio, encrypting in memory if needed
             final_path = str(output_path)
             if self.encryption:
-                encrypted_path = str(output_path) + '.encrypted'
-                self.encryption.encrypt_file(str(output_path), encrypted_path)
-                output_path.unlink()
-                final_path = encrypted_path
+                buffer = io.BytesIO()
+                torchaudio.save(
+                    buffer, 
+                    torch.from_numpy(audio_data).unsqueeze(0), 
+                    self.sample_rate,
+                    format="wav"
+                )
+                final_path = self.encryption.write_encrypted(str(output_path) + '.encrypted', buffer.getvalue())
+            else:
+                torchaudio.save(
+                    str(output_path), 
+                    torch.from_numpy(audio_data).unsqueeze(0), 
+                    self.sample_rate
+                )
+            
+            get_artifact_index().register(
+                final_path,
+                Path(final_path).stat().st_size,
+                kind="cloned_output",
+                ttl_seconds=settings.OUTPUT_TTL_HOURS * 3600
+            )
             
             result = {
                 "audio_path": final_path,
@@ -259,7 +410,7 @@ class VoiceCloningService:
     def _synthesize_with_embedding(
         self, 
         text: str, 
-        voice_embedding: List[float], 
+        speaker: torch.Tensor, 
         language: str
     ) -> np.ndarray:
         """
@@ -282,7 +433,7 @@ class VoiceCloningService:
             t = np.linspace(0, duration, samples)
             
             # Use embedding to influence synthesis parameters
-            embedding_array = np.array(voice_embedding)
+            embedding_array = speaker[0].cpu().numpy()
             base_freq = 200 + np.mean(embedding_array[:10]) * 100  # Vary fundamental frequency
             formant_shift = np.mean(embedding_array[10:20])  # Formant characteristics
             
@@ -305,69 +456,93 @@ class VoiceCloningService:
             logger.error(f"Embedding-based synthesis failed: {e}")
             raise
     
-    def find_similar_voices(self, clone_id: str, n_results: int = 5) -> Dict[str, Any]:
-        """Find voices similar to the given clone"""
-        try:
-            # Get the embedding for the query voice
-            query_embedding = self.vector_store.get_voice_embedding(clone_id)
-            if query_embedding is None:
-                raise ValueError(f"Voice clone not found: {clone_id}")
-            
-            # Search for similar voices
-            results = self.vector_store.find_similar_voices(
-                query_embedding=query_embedding,
-                n_results=n_results + 1  # +1 to exclude the query voice itself
-            )
-            
-            # Filter out the query voice from results
-            filtered_results = {
-                'ids': [id for id in results['ids'] if id != clone_id],
-                'distances': [d for i, d in enumerate(results['distances']) 
-                            if results['ids'][i] != clone_id],
-                'metadatas': [m for i, m in enumerate(results['metadatas']) 
-                            if results['ids'][i] != clone_id]
-            }
-            
-            return filtered_results[:n_results]
-            
-        except Exception as e:
-            logger.error(f"Similar voice search failed: {e}")
-            return {'ids': [], 'distances': [], 'metadatas': []}
+    def find_similar_voices(
+        self,
+        clone_id: str,
+        n_results: int = 5,
+        user_id: Optional[str] = None,
+        language: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Find voices similar to the given clone
+        
+        The user, language and tag filters are applied by the vector index
+        before ranking, so only matching voices are scored and n_results
+        matches are returned even when most of the index belongs to others.
+        
+        Raises:
+            ValueError: If the clone has no stored embedding
+        """
+        # Get the embedding for the query voice
+        query_embedding = self.vector_store.get_voice_embedding(clone_id)
+        if query_embedding is None:
+            raise ValueError(f"Voice clone not found: {clone_id}")
+        
+        return self.vector_store.find_similar_voices(
+            query_embedding=query_embedding,
+            n_results=n_results,
+            where=voice_filter(user_id=user_id, language=language, tags=tags),
+            exclude_ids=[clone_id]
+        )
     
-    def list_voice_clones(self, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """List available voice clones"""
-        try:
-            # This would query the database for voice clones
-            # Placeholder implementation
-            clones = []
-            
-            # In practice, would query database:
-            # clones = self.db.get_voice_clones(user_id=user_id)
-            
-            logger.info(f"Retrieved {len(clones)} voice clones")
-            return clones
-            
-        except Exception as e:
-            logger.error(f"Voice clone listing failed: {e}")
-            return []
+    @staticmethod
+    def _clone_info(clone: VoiceClone) -> Dict[str, Any]:
+        return {
+            "clone_id": clone.id,
+            "name": clone.name,
+            "user_id": clone.user_id,
+            "sample_path": clone.sample_audio_path,
+            "embedding_path": clone.voice_embedding_path,
+            "created_at": clone.created_at.isoformat(),
+            "metadata": clone.metadata or {}
+        }
+    
+    def list_voice_clones(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        List voice clones newest first, one page at a time
+        
+        Args:
+            user_id: Only list this user's clones; None lists all clones
+            limit: Maximum clones per page
+            cursor: next_cursor of the previous page
+        
+        Returns:
+            Dictionary with the page of voice_clones and next_cursor
+        """
+        clones, next_cursor = self.db.list_voice_clones(user_id=user_id, limit=limit, cursor=cursor)
+        logger.info(f"Retrieved {len(clones)} voice clones")
+        return {
+            "voice_clones": [self._clone_info(clone) for clone in clones],
+            "next_cursor": next_cursor
+        }
+    
+    def get_voice_clone(self, clone_id: str) -> Optional[Dict[str, Any]]:
+        """Get a voice clone's information"""
+        clone = self.db.get_voice_clone(clone_id)
+        return self._clone_info(clone) if clone else None
     
     def delete_voice_clone(self, clone_id: str) -> bool:
-        """Delete a voice clone"""
+        """Delete a voice clone and release its voice sample"""
         try:
-            # Delete from vector store
-            self.vector_store.delete_voice_embedding(clone_id)
-            
-            # Delete embedding file
-            embedding_path = Path(f"voice_embeddings/{clone_id}.npy")
-            if embedding_path.exists():
-                embedding_path.unlink()
-            
-            encrypted_path = Path(f"voice_embeddings/{clone_id}.npy.encrypted")
-            if encrypted_path.exists():
-                encrypted_path.unlink()
-            
-            # Delete from database (would be implemented)
-            # self.db.delete_voice_clone(clone_id)
+            clone = self.db.get_voice_clone(clone_id)
+            if not clone or not self.db.delete_voice_clone(clone_id):
+                logger.warning(f"Voice clone not found: {clone_id}")
+                return False
+            
+            # Delete from vector store, then stop serving the cached tensor
+            with self._speaker_lock:
+                self.vector_store.delete_voice_embedding(clone_id)
+                self._speaker_cache.pop(clone_id)
+            
+            # The sample is a shared blob; this drops the clone's reference
+            if clone.sample_audio_path:
+                self.file_handler.delete_file(Path(clone.sample_audio_path).name)
             
             logger.info(f"Voice clone deleted: {clone_id}")
             return True
@@ -17,6 +17,7 @@ import torch
 import torchaudio
 from unittest.mock import Mock, MagicMock, AsyncMock, patch
 import uuid
+import hashlib
 from datetime import datetime
 
 # Import app components
@@ -215,12 +216,22 @@ def mock_voice_cloning_service():
         'duration': 3.0,
         'sample_rate': 22050
     })
-    service.list_voice_clones = Mock(return_value=[{
+    service.list_voice_clones = Mock(return_value={
+        'voice_clones': [{
+            'clone_id': 'test_clone_123',
+            'name': 'Test Voice Clone',
+            'created_at': datetime.now().isoformat(),
+            'status': 'completed'
+        }],
+        'next_cursor': None
+    })
+    service.get_voice_clone = Mock(return_value={
         'clone_id': 'test_clone_123',
         'name': 'Test Voice Clone',
-        'created_at': datetime.now(),
+        'user_id': 'test_user_123',
+        'created_at': datetime.now().isoformat(),
         'status': 'completed'
-    }])
+    })
     service.delete_voice_clone = Mock(return_value=True)
     service.extract_voice_embedding = Mock(return_value=np.random.rand(512))
     service.find_similar_voices = Mock(return_value={
@@ -240,15 +251,41 @@ def mock_file_handler():
         'file_path': '/test/uploads/test_upload.wav',
         'original_filename': 'original.wav',
         'file_size': 1024,
+        'file_hash': hashlib.sha256(b'mock_audio_content').hexdigest(),
         'content_type': 'audio/wav'
     })
     handler.delete_file = Mock(return_value=True)
     handler.get_file_content = Mock(return_value=b'mock_audio_content')
-    handler.cleanup_old_files = Mock(return_value=5)
     handler.audio_output_folder = Path('/test/audio_output')
     return handler
 
 
+@pytest.fixture
+def current_user():
+    """Authenticated regular user for routes that require login"""
+    from app.database.user_models import UserRole
+    from app.security.auth import get_current_active_user
+
+    user = Mock(id='test_user_id', role=UserRole.USER)
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(get_current_active_user, None)
+
+
+@pytest.fixture
+def mock_job_queue():
+    """Mock job queue"""
+    job_queue = Mock()
+    job_queue.submit = AsyncMock(return_value={
+        'job_id': 'test_job_id',
+        'job_type': 'voice_clone',
+        'status': 'queued',
+        'priority': 0,
+        'progress': 0.0
+    })
+    return job_queue
+
+
 @pytest.fixture
 def mock_encryption():
     """Mock encryption service"""
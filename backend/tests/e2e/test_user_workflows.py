@@ -271,6 +271,7 @@ class TestCompleteVoiceCloningWorkflow:
         async_test_client: AsyncClient,
         sample_audio_file: str,
         mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -289,13 +290,18 @@ class TestCompleteVoiceCloningWorkflow:
             'sample_path': f'/samples/{clone_id}.wav'
         }
         
-        mock_voice_cloning_service.list_voice_clones.return_value = [{
+        clone_info = {
             'clone_id': clone_id,
             'name': 'My Personal Voice Clone',
             'created_at': '2023-01-01T12:00:00Z',
             'status': 'completed',
             'user_id': user_id
-        }]
+        }
+        mock_voice_cloning_service.list_voice_clones.return_value = {
+            'voice_clones': [clone_info],
+            'next_cursor': None
+        }
+        mock_voice_cloning_service.get_voice_clone.return_value = clone_info
         
         mock_voice_cloning_service.synthesize_with_cloned_voice.return_value = {
             'audio_path': f'/cloned_audio/{clone_id}_output.wav',
@@ -317,6 +323,7 @@ class TestCompleteVoiceCloningWorkflow:
         }
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -331,14 +338,12 @@ class TestCompleteVoiceCloningWorkflow:
                     data=data
                 )
             
-            assert create_response.status_code == 200
+            assert create_response.status_code == 202
             create_data = create_response.json()
             
             created_clone_id = create_data["clone_id"]
-            assert created_clone_id == clone_id
             assert create_data["name"] == "My Personal Voice Clone"
-            assert create_data["status"] == "completed"
-            assert create_data["embedding_dimensions"] == 512
+            assert create_data["status"] == "queued"
             
             # Step 2: User lists their voice clones
             list_response = await async_test_client.get(
@@ -417,6 +422,7 @@ class TestCrossServiceWorkflows:
         sample_audio_file: str,
         mock_stt_service,
         mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -445,7 +451,9 @@ class TestCrossServiceWorkflows:
         with patch('app.api.routes.stt.get_stt_service', return_value=mock_stt_service), \
              patch('app.api.routes.stt.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.stt.get_database', return_value=mock_database), \
-             patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
+             patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
+             patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler):
             
             # Step 1: User transcribes audio to verify quality
             with open(sample_audio_file, 'rb') as audio_file:
@@ -476,12 +484,11 @@ class TestCrossServiceWorkflows:
                     data=data
                 )
             
-            assert clone_response.status_code == 200
+            assert clone_response.status_code == 202
             clone_data = clone_response.json()
             
-            assert clone_data["clone_id"] == clone_id
             assert clone_data["name"] == "Voice from Transcribed Audio"
-            assert clone_data["status"] == "completed"
+            assert clone_data["status"] == "queued"
 
     @pytest.mark.asyncio
     async def test_voice_cloning_to_tts_synthesis_workflow(
@@ -490,6 +497,7 @@ class TestCrossServiceWorkflows:
         sample_audio_file: str,
         mock_voice_cloning_service,
         mock_tts_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -531,6 +539,7 @@ class TestCrossServiceWorkflows:
         }
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database), \
              patch('app.api.routes.tts.get_tts_service', return_value=mock_tts_service):
@@ -546,7 +555,7 @@ class TestCrossServiceWorkflows:
                     data=data
                 )
             
-            assert clone_response.status_code == 200
+            assert clone_response.status_code == 202
             clone_data = clone_response.json()
             created_clone_id = clone_data["clone_id"]
             
@@ -662,6 +671,7 @@ class TestErrorRecoveryWorkflows:
         async_test_client: AsyncClient,
         sample_audio_file: str,
         mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -670,13 +680,12 @@ class TestErrorRecoveryWorkflows:
         failed_clone_id = "failed_voice_clone_789"
         
         # Mock creation failure, then successful deletion
-        mock_voice_cloning_service.create_voice_clone.side_effect = [
-            Exception("Voice clone creation failed"),
-        ]
+        mock_job_queue.submit.side_effect = Exception("Voice clone creation failed")
         mock_voice_cloning_service.delete_voice_clone.return_value = True
-        mock_voice_cloning_service.list_voice_clones.return_value = []
+        mock_voice_cloning_service.list_voice_clones.return_value = {'voice_clones': [], 'next_cursor': None}
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
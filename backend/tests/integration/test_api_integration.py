@@ -352,6 +352,7 @@ class TestVoiceCloningIntegration:
         async_test_client: AsyncClient,
         sample_audio_file: str,
         mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -378,12 +379,17 @@ class TestVoiceCloningIntegration:
             'sample_rate': 22050
         }
         
-        mock_voice_cloning_service.list_voice_clones.return_value = [{
+        clone_info = {
             'clone_id': clone_id,
             'name': 'Integration Test Voice',
             'created_at': '2023-01-01T00:00:00',
             'status': 'completed'
-        }]
+        }
+        mock_voice_cloning_service.list_voice_clones.return_value = {
+            'voice_clones': [clone_info],
+            'next_cursor': None
+        }
+        mock_voice_cloning_service.get_voice_clone.return_value = clone_info
         
         mock_voice_cloning_service.find_similar_voices.return_value = {
             'ids': ['similar_1', 'similar_2'],
@@ -395,6 +401,7 @@ class TestVoiceCloningIntegration:
         }
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -409,13 +416,12 @@ class TestVoiceCloningIntegration:
                     data=data
                 )
             
-            assert create_response.status_code == 200
+            assert create_response.status_code == 202
             create_data = create_response.json()
             
             created_clone_id = create_data["clone_id"]
-            assert created_clone_id == clone_id
             assert create_data["name"] == "Integration Test Voice"
-            assert create_data["status"] == "completed"
+            assert create_data["status"] == "queued"
             
             # Step 2: List voice clones
             list_response = await async_test_client.get("/api/v1/voice/list")
@@ -592,6 +598,7 @@ class TestCrossServiceIntegration:
         async_test_client: AsyncClient,
         sample_audio_file: str,
         mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -620,6 +627,7 @@ class TestCrossServiceIntegration:
         }
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+             patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -634,7 +642,7 @@ class TestCrossServiceIntegration:
                     data=data
                 )
             
-            assert create_response.status_code == 200
+            assert create_response.status_code == 202
             create_data = create_response.json()
             created_clone_id = create_data["clone_id"]
             
@@ -693,4 +693,66 @@ class TestEndToEndPerformance:
         result = benchmark(asyncio.run, api_health_check())
         
         assert result["status"] == "healthy"
-        assert result["response_time"] < 1.0
\ No newline at end of file
+        assert result["response_time"] < 1.0
+
+@pytest.mark.performance
+@pytest.mark.audio
+class TestAudioDecodingPerformance:
+    """Benchmarks for the audio decoding layer against librosa.load"""
+
+    SAMPLE_RATE = 44100
+    DURATION = 30.0
+
+    @pytest.fixture(params=["wav", "flac", "ogg", "mp3"])
+    def encoded_audio(self, request):
+        """30 seconds of 44.1 kHz stereo audio encoded in memory"""
+        import io
+        import soundfile as sf
+
+        t = np.arange(int(self.SAMPLE_RATE * self.DURATION)) / self.SAMPLE_RATE
+        tone = np.sin(2 * np.pi * 440 * t).astype(np.float32)
+        buffer = io.BytesIO()
+        try:
+            sf.write(buffer, np.stack([tone, tone], axis=1), self.SAMPLE_RATE, format=request.param.upper())
+        except Exception as e:
+            pytest.skip(f"{request.param} encoding unavailable: {e}")
+        return request.param, buffer.getvalue()
+
+    @pytest.mark.benchmark
+    def test_load_audio_speed(self, benchmark, encoded_audio):
+        """Benchmark decoding to 16 kHz mono with load_audio"""
+        import io
+        from app.services.audio_io import load_audio
+
+        audio_format, data = encoded_audio
+        benchmark.group = f"decode-{audio_format}"
+
+        audio = benchmark(lambda: load_audio(io.BytesIO(data), 16000))
+
+        assert audio.dtype == np.float32
+        assert abs(len(audio) - 16000 * self.DURATION) <= 16000 * 0.1
+
+    @pytest.mark.benchmark
+    def test_librosa_load_speed(self, benchmark, encoded_audio):
+        """Baseline: decoding to 16 kHz mono with librosa.load"""
+        import io
+        import librosa
+
+        audio_format, data = encoded_audio
+        benchmark.group = f"decode-{audio_format}"
+
+        audio, _ = benchmark(lambda: librosa.load(io.BytesIO(data), sr=16000, mono=True))
+
+        assert abs(len(audio) - 16000 * self.DURATION) <= 16000 * 0.1
+
+    @pytest.mark.benchmark
+    def test_cached_resampler_speed(self, benchmark):
+        """Benchmark 48 kHz -> 16 kHz resampling with the shared polyphase filter"""
+        from app.services.audio_io import get_resampler
+
+        audio = np.random.default_rng(0).standard_normal(48000 * 10).astype(np.float32)
+
+        resampled = benchmark(lambda: get_resampler(48000, 16000)(audio))
+
+        assert len(resampled) == 16000 * 10
+        assert get_resampler(48000, 16000) is get_resampler(48000, 16000)
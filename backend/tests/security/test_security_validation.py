@@ -329,6 +329,135 @@ class TestEncryption:
         with pytest.raises(Exception):  # Should raise decryption error
             encryption.decrypt_file(str(fake_encrypted), str(temp_dir / "output.wav"))
 
+    def test_chunked_range_decryption(self, temp_dir):
+        """Test byte ranges decrypt without reading the whole file"""
+
+        encryption = FileEncryption()
+        encryption.chunk_size = 1024
+
+        test_file = temp_dir / "ranged.wav"
+        test_content = bytes(range(256)) * 40
+        test_file.write_bytes(test_content)
+        encrypted_path = encryption.encrypt_file(str(test_file))
+
+        assert encryption.plaintext_size(encrypted_path) == len(test_content)
+        assert encryption.decrypt_range(encrypted_path, 1000, 3100) == test_content[1000:3100]
+        assert encryption.decrypt_range(encrypted_path, 10000) == test_content[10000:]
+
+        # Stored size is plaintext plus a small header and one tag per chunk
+        assert Path(encrypted_path).stat().st_size < len(test_content) * 1.05
+
+    def test_chunked_tampering_detected(self, temp_dir):
+        """Test modified or truncated containers fail authentication"""
+
+        encryption = FileEncryption()
+        encryption.chunk_size = 1024
+
+        test_file = temp_dir / "tamper.wav"
+        test_file.write_bytes(b"A" * 4096)
+        encrypted_path = Path(encryption.encrypt_file(str(test_file)))
+        encrypted_content = encrypted_path.read_bytes()
+
+        # Drop the final chunk: the new last chunk is not marked final
+        truncated = temp_dir / "truncated.encrypted"
+        truncated.write_bytes(encrypted_content[:-(1024 + 16)])
+        with pytest.raises(Exception):
+            encryption.decrypt_file(str(truncated), str(temp_dir / "out.wav"))
+
+        flipped = bytearray(encrypted_content)
+        flipped[100] ^= 1
+        modified = temp_dir / "modified.encrypted"
+        modified.write_bytes(bytes(flipped))
+        with pytest.raises(Exception):
+            encryption.decrypt_file(str(modified), str(temp_dir / "out.wav"))
+
+    def test_chunk_size_outside_writer_range_rejected(self, temp_dir):
+        """Test a header declaring a chunk size no writer produces is refused before any read"""
+
+        encryption = FileEncryption()
+        encryption.chunk_size = 1024
+
+        test_file = temp_dir / "forged.wav"
+        test_file.write_bytes(b"A" * 4096)
+        encrypted_content = Path(encryption.encrypt_file(str(test_file))).read_bytes()
+
+        # The chunk size is the big-endian uint32 after the magic and version byte
+        for chunk_size in (0, 16, 0xFFFFFFFF):
+            forged = temp_dir / "forged.encrypted"
+            forged.write_bytes(encrypted_content[:5] + chunk_size.to_bytes(4, "big") + encrypted_content[9:])
+            with pytest.raises(ValueError, match="invalid chunk size"):
+                encryption.plaintext_size(str(forged))
+
+        encryption.chunk_size = 0
+        with pytest.raises(ValueError):
+            encryption.encrypt_file(str(test_file))
+
+    def test_open_decrypted_is_seekable(self, temp_dir):
+        """Test decrypted file objects support random access without temp files"""
+
+        encryption = FileEncryption()
+        encryption.chunk_size = 1024
+
+        test_file = temp_dir / "seekable.wav"
+        test_content = bytes(range(256)) * 20
+        test_file.write_bytes(test_content)
+        encrypted_path = encryption.encrypt_file(str(test_file))
+        test_file.unlink()
+
+        with encryption.open_decrypted(encrypted_path) as decrypted:
+            decrypted.seek(3000)
+            assert decrypted.read(500) == test_content[3000:3500]
+            decrypted.seek(-100, 2)
+            assert decrypted.read() == test_content[-100:]
+            decrypted.seek(0)
+            assert decrypted.read() == test_content
+
+        assert sorted(p.name for p in temp_dir.iterdir()) == ["seekable.wav.encrypted"]
+
+    def test_derived_key_cached_across_instances(self, temp_dir, monkeypatch):
+        """Test PBKDF2 runs once per key and the cache file is private"""
+
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+        monkeypatch.chdir(temp_dir)
+
+        with patch('app.security.encryption.PBKDF2HMAC', wraps=PBKDF2HMAC) as kdf:
+            first = FileEncryption("cached-key" * 4)
+            second = FileEncryption("cached-key" * 4)
+
+        assert kdf.call_count == 1
+        assert first.key == second.key
+        assert (temp_dir / "encryption_keys.cache").stat().st_mode & 0o777 == 0o600
+
+    def test_rotated_keys_still_decrypt(self, temp_dir, monkeypatch):
+        """Test files written with a retired key decrypt after rotation"""
+
+        monkeypatch.chdir(temp_dir)
+
+        old = FileEncryption("old-key" * 5)
+        test_file = temp_dir / "rotated.wav"
+        test_file.write_bytes(b"audio written before rotation")
+        encrypted_path = old.encrypt_file(str(test_file))
+
+        rotated = FileEncryption("new-key" * 5, previous_keys=["old-key" * 5])
+        assert rotated.decrypt_range(encrypted_path, 0) == b"audio written before rotation"
+
+        with pytest.raises(ValueError):
+            FileEncryption("new-key" * 5).decrypt_range(encrypted_path, 0)
+
+    def test_legacy_fernet_files_readable(self, temp_dir):
+        """Test files written in the previous whole-file Fernet format still decrypt"""
+
+        encryption = FileEncryption()
+        test_content = b"legacy encrypted audio"
+
+        legacy_file = temp_dir / "legacy.wav.encrypted"
+        legacy_file.write_bytes(encryption.cipher.encrypt(test_content))
+
+        decrypted_path = encryption.decrypt_file(str(legacy_file), str(temp_dir / "legacy.wav"))
+        assert Path(decrypted_path).read_bytes() == test_content
+        assert encryption.decrypt_range(str(legacy_file), 7, 16) == test_content[7:16]
+
 
 @pytest.mark.security
 class TestAuthenticationSecurity:
@@ -0,0 +1,188 @@
+"""
+Unit tests for the background job endpoints
+Tests job submission, polling, cancellation and progress streaming
+"""
+
+import pytest
+from unittest.mock import patch, Mock, AsyncMock
+from fastapi import status
+from httpx import AsyncClient
+import json
+
+from app.database.user_models import UserRole
+
+
+def _job(status="queued", **overrides):
+    job = {
+        "job_id": "test_job_id",
+        "job_type": "transcribe",
+        "status": status,
+        "priority": 0,
+        "progress": 0.0,
+        "result": None,
+        "error": None,
+        "attempts": 0,
+        "user_id": "test_user_id",
+        "created_at": "2024-01-01T00:00:00",
+        "started_at": None,
+        "finished_at": None
+    }
+    job.update(overrides)
+    return job
+
+
+@pytest.fixture
+def mock_job_queue():
+    """Mock job queue"""
+    job_queue = Mock()
+    job_queue.submit = AsyncMock(return_value=_job())
+    job_queue.get = AsyncMock(return_value=_job())
+    job_queue.cancel = AsyncMock(return_value=True)
+    return job_queue
+
+
+class TestJobEndpoints:
+    """Test job submission and status endpoints"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_submit_transcription_job(
+        self,
+        async_test_client: AsyncClient, current_user,
+        sample_audio_file: str,
+        mock_job_queue,
+        mock_file_handler,
+        mock_database
+    ):
+        """Test submission returns a job id immediately"""
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue), \
+             patch('app.api.routes.jobs.get_file_handler', return_value=mock_file_handler), \
+             patch('app.api.routes.jobs.get_database', return_value=mock_database):
+
+            with open(sample_audio_file, 'rb') as audio_file:
+                files = {"file": ("test_audio.wav", audio_file, "audio/wav")}
+                response = await async_test_client.post(
+                    "/api/v1/jobs/transcribe?language=en&priority=100",
+                    files=files
+                )
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json()["job_id"] == "test_job_id"
+        assert response.json()["status"] == "queued"
+
+        job_type, payload = mock_job_queue.submit.call_args[0]
+        assert job_type == "transcribe"
+        assert payload["language"] == "en"
+        assert payload["session_id"] == "test_session_id"
+        # Clients cannot choose their own priority
+        assert "priority" not in mock_job_queue.submit.call_args[1]
+        assert mock_job_queue.submit.call_args[1]["user_id"] == "test_user_id"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_submit_invalid_task(self, async_test_client: AsyncClient, current_user, sample_audio_file: str, mock_job_queue):
+        """Test unsupported tasks are rejected"""
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            with open(sample_audio_file, 'rb') as audio_file:
+                files = {"file": ("test_audio.wav", audio_file, "audio/wav")}
+                response = await async_test_client.post(
+                    "/api/v1/jobs/transcribe?task=summarize",
+                    files=files
+                )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_job_queue.submit.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_job(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test polling returns the job result once completed"""
+        mock_job_queue.get.return_value = _job(
+            "completed", progress=1.0, result={"transcription": "Hello world"}
+        )
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            response = await async_test_client.get("/api/v1/jobs/test_job_id")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["result"]["transcription"] == "Hello world"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_job_not_found(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test unknown jobs return 404"""
+        mock_job_queue.get.return_value = None
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            response = await async_test_client.get("/api/v1/jobs/missing")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_other_users_job_not_found(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test jobs of other users are hidden and cannot be cancelled"""
+        mock_job_queue.get.return_value = _job("completed", user_id="other_user_id", result={"sample_path": "x"})
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            get_response = await async_test_client.get("/api/v1/jobs/test_job_id")
+            delete_response = await async_test_client.delete("/api/v1/jobs/test_job_id")
+            events_response = await async_test_client.get("/api/v1/jobs/test_job_id/events")
+
+        assert get_response.status_code == status.HTTP_404_NOT_FOUND
+        assert delete_response.status_code == status.HTTP_404_NOT_FOUND
+        assert events_response.status_code == status.HTTP_404_NOT_FOUND
+        mock_job_queue.cancel.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_admin_sees_any_job(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test admins can read jobs of other users"""
+        current_user.role = UserRole.ADMIN
+        mock_job_queue.get.return_value = _job("queued", user_id="other_user_id")
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            response = await async_test_client.get("/api/v1/jobs/test_job_id")
+
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cancel_running_job_conflict(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test running jobs cannot be cancelled"""
+        mock_job_queue.get.return_value = _job("running")
+        mock_job_queue.cancel.return_value = False
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            response = await async_test_client.delete("/api/v1/jobs/test_job_id")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_job_events_stream(self, async_test_client: AsyncClient, current_user, mock_job_queue):
+        """Test SSE streams progress until the job completes"""
+        import asyncio
+
+        events = asyncio.Queue()
+        events.put_nowait({"job_id": "test_job_id", "status": "running", "progress": 0.5})
+        events.put_nowait(_job("completed", progress=1.0, result={"transcription": "Hi"}))
+        mock_job_queue.get.return_value = _job("running")
+        mock_job_queue.subscribe = Mock(return_value=events)
+        mock_job_queue.unsubscribe = Mock()
+
+        with patch('app.api.routes.jobs.get_job_queue', return_value=mock_job_queue):
+            response = await async_test_client.get("/api/v1/jobs/test_job_id/events")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        data = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines() if line.startswith("data: ")
+        ]
+        assert [event["status"] for event in data] == ["running", "running", "completed"]
+        assert data[1]["progress"] == 0.5
+        mock_job_queue.unsubscribe.assert_called_once()
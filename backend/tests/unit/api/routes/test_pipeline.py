@@ -0,0 +1,150 @@
+"""
+Unit tests for the speech-to-speech translation pipeline endpoints
+Tests request validation, single-response mode and NDJSON streaming
+"""
+
+import pytest
+from unittest.mock import patch, Mock
+from fastapi import status
+from httpx import AsyncClient
+import json
+import numpy as np
+
+
+def _pipeline_events(*args, **kwargs):
+    """Fake pipeline run emitting one sentence"""
+    yield {
+        "type": "transcription",
+        "session_id": "test_session_id",
+        "text": "Hello world.",
+        "language": "en",
+        "duration_seconds": 2.0
+    }
+    yield {
+        "type": "segment",
+        "index": 0,
+        "source_text": "Hello world.",
+        "translated_text": "Hola mundo.",
+        "audio": np.zeros(2205, dtype=np.float32),
+        "sample_rate": 22050
+    }
+    yield {
+        "type": "complete",
+        "session_id": "test_session_id",
+        "transcription": "Hello world.",
+        "translation": "Hola mundo.",
+        "source_language": "en",
+        "target_language": "es",
+        "audio_filename": "tts_test.wav",
+        "audio_duration_seconds": 0.1,
+        "timings": {"transcription": 0.5, "translation": 0.1, "synthesis": 0.3}
+    }
+
+
+@pytest.fixture
+def mock_pipeline():
+    """Mock speech translation pipeline"""
+    pipeline = Mock()
+    pipeline.stt_service.preprocess_audio = Mock(return_value=np.zeros(32000, dtype=np.float32))
+    pipeline.iter_events = Mock(side_effect=_pipeline_events)
+    pipeline.run = Mock(return_value={
+        **list(_pipeline_events())[-1],
+        "segments": [{"index": 0, "source_text": "Hello world.", "translated_text": "Hola mundo."}]
+    })
+    return pipeline
+
+
+class TestSpeechToSpeech:
+    """Test the speech-to-speech pipeline endpoints"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_speech_to_speech_success(
+        self,
+        async_test_client: AsyncClient,
+        sample_audio_file: str,
+        mock_pipeline
+    ):
+        """Test a full pipeline run returns one session and the final audio"""
+
+        with patch('app.api.routes.pipeline.get_speech_translation_pipeline', return_value=mock_pipeline):
+            with open(sample_audio_file, 'rb') as audio_file:
+                files = {"file": ("test_audio.wav", audio_file, "audio/wav")}
+                response = await async_test_client.post(
+                    "/api/v1/pipeline/speech-to-speech?target_language=es&source_language=en",
+                    files=files
+                )
+
+        assert response.status_code == status.HTTP_200_OK
+        response_data = response.json()
+
+        assert response_data["session_id"] == "test_session_id"
+        assert response_data["translation"] == "Hola mundo."
+        assert response_data["audio_filename"] == "tts_test.wav"
+        assert len(response_data["segments"]) == 1
+        mock_pipeline.run.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_speech_to_speech_stream(
+        self,
+        async_test_client: AsyncClient,
+        sample_audio_file: str,
+        mock_pipeline
+    ):
+        """Test streamed results arrive per sentence with audio attached"""
+
+        with patch('app.api.routes.pipeline.get_speech_translation_pipeline', return_value=mock_pipeline):
+            with open(sample_audio_file, 'rb') as audio_file:
+                files = {"file": ("test_audio.wav", audio_file, "audio/wav")}
+                response = await async_test_client.post(
+                    "/api/v1/pipeline/speech-to-speech/stream?target_language=es&source_language=en",
+                    files=files
+                )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        events = [json.loads(line) for line in response.text.splitlines() if line]
+        assert [event["type"] for event in events] == ["transcription", "segment", "complete"]
+        assert events[1]["translated_text"] == "Hola mundo."
+        assert events[1]["audio_base64"]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_speech_to_speech_unsupported_language(
+        self,
+        async_test_client: AsyncClient,
+        sample_audio_file: str,
+        mock_pipeline
+    ):
+        """Test unsupported target languages are rejected before decoding"""
+
+        with patch('app.api.routes.pipeline.get_speech_translation_pipeline', return_value=mock_pipeline):
+            with open(sample_audio_file, 'rb') as audio_file:
+                files = {"file": ("test_audio.wav", audio_file, "audio/wav")}
+                response = await async_test_client.post(
+                    "/api/v1/pipeline/speech-to-speech?target_language=klingon",
+                    files=files
+                )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_pipeline.stt_service.preprocess_audio.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_speech_to_speech_invalid_file_type(
+        self,
+        async_test_client: AsyncClient,
+        mock_pipeline
+    ):
+        """Test non-audio uploads are rejected"""
+
+        with patch('app.api.routes.pipeline.get_speech_translation_pipeline', return_value=mock_pipeline):
+            files = {"file": ("notes.txt", b"not audio", "text/plain")}
+            response = await async_test_client.post(
+                "/api/v1/pipeline/speech-to-speech?target_language=es",
+                files=files
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
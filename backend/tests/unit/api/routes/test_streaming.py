@@ -65,6 +65,7 @@ class TestStreamingStatus:
             assert response_data["model_loaded"] is True
             assert response_data["test_status"] == "OK"
             assert "websocket_endpoint" in response_data
+            assert response_data["translation_websocket_endpoint"] == "/api/v1/stream/ws/translate/{client_id}"
 
     @pytest.mark.unit
     @pytest.mark.streaming
@@ -740,4 +741,88 @@ class TestStreamingEdgeCases:
                 call_args_list = mock_manager.send_message.call_args_list
                 transcription_calls = [call for call in call_args_list 
                                      if call[0][1]["type"] == "transcription"]
-                assert len(transcription_calls) >= 1
\ No newline at end of file
+                assert len(transcription_calls) >= 1
+
+class TestLiveTranslation:
+    """Test live speech translation over WebSocket"""
+
+    @pytest.mark.unit
+    @pytest.mark.streaming
+    @pytest.mark.asyncio
+    async def test_batcher_groups_concurrent_segments(self):
+        """Test segments from several connections share one translation call"""
+
+        from app.api.routes.streaming import TranslationBatcher
+
+        mock_translation_service = Mock()
+        mock_translation_service.translate_texts = Mock(side_effect=lambda texts, src, tgt, model: [
+            {"translated_text": text.upper(), "source_language": src, "target_language": tgt}
+            for text in texts
+        ])
+
+        batcher = TranslationBatcher(max_batch_size=8, max_delay=0.05)
+
+        with patch('app.api.routes.streaming.get_translation_service', return_value=mock_translation_service):
+            results = await asyncio.gather(
+                batcher.translate("hello.", "en", "es"),
+                batcher.translate("good morning.", "en", "es"),
+                batcher.translate("bonjour.", "fr", "es")
+            )
+
+        assert [r["translated_text"] for r in results] == ["HELLO.", "GOOD MORNING.", "BONJOUR."]
+        # One call per language pair, not one per segment
+        assert mock_translation_service.translate_texts.call_count == 2
+
+    @pytest.mark.unit
+    @pytest.mark.streaming
+    @pytest.mark.websocket
+    @pytest.mark.asyncio
+    async def test_websocket_translate_emits_transcription_and_translation(self):
+        """Test a completed sentence is transcribed and then translated"""
+
+        chunk_size = 16000 * 2
+        mock_websocket = Mock()
+        mock_websocket.accept = AsyncMock()
+
+        async def receive_bytes():
+            if not hasattr(receive_bytes, "sent"):
+                receive_bytes.sent = True
+                return bytes(chunk_size)
+            # Give the translation task time to finish before disconnecting
+            await asyncio.sleep(0.2)
+            raise WebSocketDisconnect()
+
+        mock_websocket.receive_bytes = receive_bytes
+
+        mock_stt_service = Mock()
+        mock_stt_service.processor = Mock()
+        mock_stt_service.model = Mock()
+
+        mock_batcher = Mock()
+        mock_batcher.translate = AsyncMock(return_value={
+            "translated_text": "Hola mundo.",
+            "source_language": "en",
+            "target_language": "es"
+        })
+
+        from app.api.routes.streaming import websocket_translate
+
+        with patch('app.api.routes.streaming.get_stt_service', return_value=mock_stt_service), \
+             patch('app.api.routes.streaming.translation_batcher', mock_batcher), \
+             patch('app.api.routes.streaming._transcribe_chunk', return_value={
+                 "transcription": "Hello world.", "confidence": 0.95
+             }), \
+             patch('app.api.routes.streaming.manager') as mock_manager:
+            mock_manager.connect = AsyncMock()
+            mock_manager.disconnect = Mock()
+            mock_manager.send_message = AsyncMock()
+            mock_manager.send_bytes = AsyncMock()
+
+            await websocket_translate(mock_websocket, "test_client", target_language="es")
+
+        messages = [call[0][1] for call in mock_manager.send_message.call_args_list]
+        assert [m["type"] for m in messages] == ["transcription", "translation"]
+        assert messages[1]["text"] == "Hola mundo."
+        assert messages[1]["segment"] == 0
+        mock_batcher.translate.assert_awaited_once_with("Hello world.", "en", "es", "nllb")
+        mock_manager.send_bytes.assert_not_called()
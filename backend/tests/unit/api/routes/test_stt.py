@@ -13,7 +13,11 @@ from pathlib import Path
 
 from app.api.routes.stt import router
 from app.services import get_stt_service, get_file_handler
+from app.services.file_handler import FileHandlerService
+from app.services.speech_to_text import WhisperSTTService
 from app.database import get_database
+from app.database.artifact_index import ArtifactIndex
+from app.database.blob_store import BlobStore
 
 
 class TestSTTTranscription:
@@ -209,6 +213,60 @@ class TestSTTTranscription:
             assert response_data["transcription"] == "Test transcription"
 
 
+class TestTranscriptionResultReuse:
+    """Test repeated uploads of the same audio reuse the stored transcript"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_same_audio_transcribed_once(
+        self,
+        async_test_client: AsyncClient,
+        sample_audio_file: str,
+        mock_database,
+        temp_dir,
+        monkeypatch
+    ):
+        """Test the second upload is answered from SQLite after the first was released"""
+        monkeypatch.chdir(temp_dir)
+        blobs = BlobStore(db_path=f"{temp_dir}/app.db")
+
+        file_handler = FileHandlerService()
+        file_handler.artifacts = ArtifactIndex(db_path=f"{temp_dir}/app.db")
+        file_handler.blobs = blobs
+        file_handler.encryption = None
+
+        stt_service = WhisperSTTService()
+        stt_service.results = blobs
+        stt_service.transcribe_array = Mock(return_value={
+            "transcription": "hello world",
+            "language": "en",
+            "task": "transcribe",
+            "model": stt_service.model_name,
+            "audio_duration": 2.0,
+            "confidence": 1.0
+        })
+
+        with patch('app.api.routes.stt.get_stt_service', return_value=stt_service), \
+             patch('app.api.routes.stt.get_file_handler', return_value=file_handler), \
+             patch('app.api.routes.stt.get_database', return_value=mock_database):
+
+            responses = []
+            for _ in range(2):
+                with open(sample_audio_file, 'rb') as audio_file:
+                    responses.append(await async_test_client.post(
+                        "/api/v1/stt/transcribe",
+                        files={"file": ("test_audio.wav", audio_file, "audio/wav")}
+                    ))
+                # Only SQLite survives, as after a restart or on another worker
+                stt_service._result_cache.clear()
+
+        assert [r.status_code for r in responses] == [status.HTTP_200_OK] * 2
+        assert responses[1].json()["transcription"] == "hello world"
+        assert stt_service.transcribe_array.call_count == 1
+        # The upload itself was released after each request
+        assert not [p for p in file_handler.blob_folder.rglob("*") if p.is_file()]
+
+
 class TestSTTErrorHandling:
     """Test STT error handling scenarios"""
 
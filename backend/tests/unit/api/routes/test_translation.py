@@ -0,0 +1,111 @@
+"""
+Unit tests for the text translation endpoints
+Tests batch translation, per-item errors and language validation
+"""
+
+import pytest
+from unittest.mock import patch, Mock
+from fastapi import status
+from httpx import AsyncClient
+
+from app.services.translation import LanguageRegistry, UnsupportedLanguageError
+
+
+def _translation(text, source_language, target_language, model_type):
+    return {
+        "translated_text": f"[{target_language}] {text}",
+        "original_text": text,
+        "source_language": source_language,
+        "target_language": target_language,
+        "model": model_type,
+        "confidence": 1.0
+    }
+
+
+@pytest.fixture
+def mock_translation_service():
+    """Translation service with the real language tables and stubbed models"""
+    service = Mock()
+    service.languages = LanguageRegistry()
+    service.estimate_tokens = Mock(side_effect=lambda text, src_lang=None: len(text.split()))
+    service.translate_texts = Mock(side_effect=lambda texts, source_language, target_language, model_type: [
+        _translation(text, source_language, target_language, model_type) for text in texts
+    ])
+    service.translate_text = Mock(side_effect=_translation)
+    return service
+
+
+class TestBatchTranslation:
+    """Test the batch translation endpoint"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_batch_success(self, async_test_client: AsyncClient, mock_translation_service):
+        """Test accepted texts are translated in one call and empty texts reported per item"""
+
+        with patch('app.api.routes.translation.get_translation_service', return_value=mock_translation_service):
+            response = await async_test_client.post(
+                "/api/v1/translate/translate-batch",
+                json={"texts": ["Hello", " ", "Good morning"], "source_language": "en", "target_language": "es"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["batch_results"]
+        assert [item["status"] for item in results] == ["success", "error", "success"]
+        assert results[2]["result"]["translated_text"] == "[es] Good morning"
+        mock_translation_service.translate_texts.assert_called_once()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_batch_unsupported_language(self, async_test_client: AsyncClient, mock_translation_service):
+        """Test an unsupported language pair is rejected instead of failing every item"""
+
+        with patch('app.api.routes.translation.get_translation_service', return_value=mock_translation_service):
+            response = await async_test_client.post(
+                "/api/v1/translate/translate-batch",
+                json={"texts": ["Hello", "Goodbye"], "source_language": "en", "target_language": "klingon"}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "klingon" in response.json()["detail"]
+        mock_translation_service.translate_texts.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_batch_value_error_not_retried_per_item(self, async_test_client: AsyncClient, mock_translation_service):
+        """Test a rejected batch returns 400 without translating texts one by one"""
+        mock_translation_service.translate_texts.side_effect = UnsupportedLanguageError(
+            "Language 'es' is not supported by model 'nllb'"
+        )
+
+        with patch('app.api.routes.translation.get_translation_service', return_value=mock_translation_service):
+            response = await async_test_client.post(
+                "/api/v1/translate/translate-batch",
+                json={"texts": ["Hello", "Goodbye"], "source_language": "en", "target_language": "es"}
+            )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_translation_service.translate_text.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_batch_failure_isolated_per_item(self, async_test_client: AsyncClient, mock_translation_service):
+        """Test a failing batch is retried text by text so one bad input only fails itself"""
+        def translate_one(text, **kwargs):
+            if text == "Broken":
+                raise RuntimeError("bad input")
+            return _translation(text, **kwargs)
+
+        mock_translation_service.translate_texts.side_effect = RuntimeError("CUDA out of memory")
+        mock_translation_service.translate_text.side_effect = translate_one
+
+        with patch('app.api.routes.translation.get_translation_service', return_value=mock_translation_service):
+            response = await async_test_client.post(
+                "/api/v1/translate/translate-batch",
+                json={"texts": ["Hello", "Broken"], "source_language": "en", "target_language": "es"}
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["batch_results"]
+        assert [item["status"] for item in results] == ["success", "error"]
+        assert results[1]["error"] == "bad input"
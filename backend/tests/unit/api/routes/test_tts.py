@@ -8,6 +8,7 @@ from unittest.mock import patch, Mock, AsyncMock
 from fastapi import status
 from httpx import AsyncClient
 import asyncio
+import io
 from pathlib import Path
 
 from app.api.routes.tts import router
@@ -267,82 +268,180 @@ class TestTTSSynthesis:
 class TestTTSAudioServing:
     """Test TTS audio file serving"""
 
+    @pytest.fixture
+    def audio_file_info(self, temp_dir):
+        """Plain audio file in the output folder"""
+        audio_file = temp_dir / "test_audio.wav"
+        audio_file.write_bytes(b"fake_audio_content")
+        return {
+            "filename": "test_audio.wav",
+            "file_path": str(audio_file),
+            "size": audio_file.stat().st_size,
+            "modified_time": audio_file.stat().st_mtime,
+            "encrypted": False
+        }
+
+    @pytest.fixture
+    def encrypted_file_info(self, audio_file_info):
+        """Encrypted audio file whose plaintext is decrypted_audio_content"""
+        return {
+            **audio_file_info,
+            "file_path": audio_file_info["file_path"] + ".encrypted",
+            "size": len(b"decrypted_audio_content"),
+            "encrypted": True
+        }
+
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_serve_unencrypted_audio_file(
         self,
         async_test_client: AsyncClient,
-        temp_dir,
-        mock_file_handler
+        mock_file_handler,
+        audio_file_info
     ):
         """Test serving unencrypted audio file"""
         
-        # Create test audio file
-        audio_file = temp_dir / "test_audio.wav"
-        audio_file.write_bytes(b"fake_audio_content")
-        
-        mock_file_handler.audio_output_folder = temp_dir
+        mock_file_handler.get_output_file_info = Mock(return_value=audio_file_info)
         
         with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
-            
-            # Mock Path.exists to return True for audio file
-            with patch('pathlib.Path.exists', return_value=True):
-                response = await async_test_client.get("/api/v1/tts/audio/test_audio.wav")
-                
-                # Should attempt to serve the file
-                assert response.status_code in [status.HTTP_200_OK, status.HTTP_404_NOT_FOUND]
+            response = await async_test_client.get("/api/v1/tts/audio/test_audio.wav")
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.content == b"fake_audio_content"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["etag"]
 
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_serve_encrypted_audio_file(
         self,
         async_test_client: AsyncClient,
-        temp_dir,
-        mock_file_handler
+        mock_file_handler,
+        encrypted_file_info
     ):
         """Test serving encrypted audio file"""
         
-        # Create encrypted test file
-        encrypted_file = temp_dir / "test_audio.wav.encrypted"
-        encrypted_file.write_bytes(b"encrypted_audio_content")
-        
-        mock_file_handler.audio_output_folder = temp_dir
-        mock_file_handler.get_file_content.return_value = b"decrypted_audio_content"
+        mock_file_handler.get_output_file_info = Mock(return_value=encrypted_file_info)
+        mock_file_handler.open_output_file = Mock(return_value=io.BytesIO(b"decrypted_audio_content"))
         
         with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
-            
-            # Mock encrypted file exists but regular doesn't
-            def mock_exists(self):
-                return str(self).endswith('.encrypted')
-            
-            with patch('pathlib.Path.exists', side_effect=mock_exists):
-                response = await async_test_client.get("/api/v1/tts/audio/test_audio.wav")
-                
-                # Should return decrypted content
-                assert response.status_code == status.HTTP_200_OK
-                assert response.headers["content-type"] == "audio/wav"
+            response = await async_test_client.get("/api/v1/tts/audio/test_audio.wav")
+        
+        # Should return decrypted content
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"] == "audio/wav"
+        assert response.content == b"decrypted_audio_content"
 
     @pytest.mark.unit
     @pytest.mark.asyncio
     async def test_serve_nonexistent_audio_file(
         self,
         async_test_client: AsyncClient,
-        temp_dir,
         mock_file_handler
     ):
         """Test serving non-existent audio file"""
         
-        mock_file_handler.audio_output_folder = temp_dir
+        mock_file_handler.get_output_file_info = Mock(return_value=None)
         
         with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
-            
-            # Mock file doesn't exist
-            with patch('pathlib.Path.exists', return_value=False):
-                response = await async_test_client.get("/api/v1/tts/audio/nonexistent.wav")
-                
-                assert response.status_code == status.HTTP_404_NOT_FOUND
-                response_data = response.json()
-                assert response_data["detail"] == "Audio file not found"
+            response = await async_test_client.get("/api/v1/tts/audio/nonexistent.wav")
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        response_data = response.json()
+        assert response_data["detail"] == "Audio file not found"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_serve_audio_byte_range(
+        self,
+        async_test_client: AsyncClient,
+        mock_file_handler,
+        audio_file_info
+    ):
+        """Test a byte range returns 206 with only the requested bytes"""
+        
+        mock_file_handler.get_output_file_info = Mock(return_value=audio_file_info)
+        mock_file_handler.open_output_file = Mock(
+            side_effect=lambda info: open(info["file_path"], 'rb')
+        )
+        
+        with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
+            response = await async_test_client.get(
+                "/api/v1/tts/audio/test_audio.wav",
+                headers={"Range": "bytes=5-9"}
+            )
+        
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == b"audio"
+        assert response.headers["content-range"] == f"bytes 5-9/{audio_file_info['size']}"
+        assert response.headers["content-length"] == "5"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_serve_encrypted_audio_suffix_range(
+        self,
+        async_test_client: AsyncClient,
+        mock_file_handler,
+        encrypted_file_info
+    ):
+        """Test suffix ranges on encrypted files decrypt only the tail"""
+        
+        mock_file_handler.get_output_file_info = Mock(return_value=encrypted_file_info)
+        mock_file_handler.open_output_file = Mock(return_value=io.BytesIO(b"decrypted_audio_content"))
+        
+        with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
+            response = await async_test_client.get(
+                "/api/v1/tts/audio/test_audio.wav",
+                headers={"Range": "bytes=-7"}
+            )
+        
+        assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+        assert response.content == b"content"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_serve_audio_range_not_satisfiable(
+        self,
+        async_test_client: AsyncClient,
+        mock_file_handler,
+        audio_file_info
+    ):
+        """Test ranges starting past the end of the file are rejected"""
+        
+        mock_file_handler.get_output_file_info = Mock(return_value=audio_file_info)
+        
+        with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
+            response = await async_test_client.get(
+                "/api/v1/tts/audio/test_audio.wav",
+                headers={"Range": "bytes=1000-"}
+            )
+        
+        assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+        assert response.headers["content-range"] == f"bytes */{audio_file_info['size']}"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_serve_audio_not_modified(
+        self,
+        async_test_client: AsyncClient,
+        mock_file_handler,
+        encrypted_file_info
+    ):
+        """Test a matching ETag returns 304 without opening the file"""
+        
+        mock_file_handler.get_output_file_info = Mock(return_value=encrypted_file_info)
+        mock_file_handler.open_output_file = Mock(return_value=io.BytesIO(b"decrypted_audio_content"))
+        
+        with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
+            first = await async_test_client.get("/api/v1/tts/audio/test_audio.wav", headers={"Range": "bytes=0-0"})
+            response = await async_test_client.get(
+                "/api/v1/tts/audio/test_audio.wav",
+                headers={"If-None-Match": first.headers["etag"]}
+            )
+        
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response.content == b""
+        assert mock_file_handler.open_output_file.call_count == 1
 
 
 class TestTTSErrorHandling:
@@ -629,17 +728,14 @@ class TestTTSErrorHandling:
         """Test audio serving when file handler fails"""
         
         mock_file_handler = Mock()
-        mock_file_handler.audio_output_folder = Mock()
-        mock_file_handler.get_file_content.side_effect = Exception("File handler error")
+        mock_file_handler.get_output_file_info.side_effect = Exception("File handler error")
         
         with patch('app.api.routes.tts.get_file_handler', return_value=mock_file_handler):
-            with patch('pathlib.Path.exists', return_value=True):
-                
-                response = await async_test_client.get("/api/v1/tts/audio/test.wav")
-                
-                assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
-                response_data = response.json()
-                assert "Failed to serve audio file" in response_data["detail"]
+            response = await async_test_client.get("/api/v1/tts/audio/test.wav")
+            
+            assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+            response_data = response.json()
+            assert "Failed to serve audio file" in response_data["detail"]
 
 
 class TestTTSEdgeCases:
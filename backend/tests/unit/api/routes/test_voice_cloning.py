@@ -23,13 +23,13 @@ class TestVoiceCloneCreation:
         self,
         async_test_client: AsyncClient,
         sample_audio_file: str,
-        mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
-        """Test successful voice clone creation"""
+        """Test that voice clone creation is queued as a job"""
         
-        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+        with patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -43,20 +43,18 @@ class TestVoiceCloneCreation:
                     data=data
                 )
             
-            assert response.status_code == status.HTTP_200_OK
+            assert response.status_code == status.HTTP_202_ACCEPTED
             response_data = response.json()
             
-            assert "clone_id" in response_data
-            assert "name" in response_data
-            assert "status" in response_data
-            assert "embedding_path" in response_data
-            assert "embedding_dimensions" in response_data
-            assert "sample_path" in response_data
-            
+            assert response_data["job_id"] == "test_job_id"
             assert response_data["name"] == "Test Voice Clone"
-            assert response_data["status"] == "completed"
-            assert response_data["clone_id"] == "test_clone_123"
-            assert response_data["embedding_dimensions"] == 512
+            assert response_data["status"] == "queued"
+            
+            job_type, payload = mock_job_queue.submit.call_args[0]
+            assert job_type == "voice_clone"
+            assert payload["clone_id"] == response_data["clone_id"]
+            assert payload["name"] == "Test Voice Clone"
+            assert "sample_path" in payload
 
     @pytest.mark.unit
     @pytest.mark.voice_cloning
@@ -65,13 +63,13 @@ class TestVoiceCloneCreation:
         self,
         async_test_client: AsyncClient,
         sample_audio_file: str,
-        mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
         """Test voice clone creation without user ID"""
         
-        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+        with patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -85,7 +83,7 @@ class TestVoiceCloneCreation:
                     data=data
                 )
             
-            assert response.status_code == status.HTTP_200_OK
+            assert response.status_code == status.HTTP_202_ACCEPTED
             response_data = response.json()
             assert response_data["name"] == "Anonymous Voice Clone"
 
@@ -343,7 +341,8 @@ class TestVoiceCloneManagement:
             assert response.status_code == status.HTTP_200_OK
             
             # Verify service was called with user filter
-            mock_voice_cloning_service.list_voice_clones.assert_called_with(user_id="test_user_123")
+            call = mock_voice_cloning_service.list_voice_clones.call_args
+            assert call.kwargs["user_id"] == "test_user_123"
 
     @pytest.mark.unit
     @pytest.mark.voice_cloning
@@ -356,12 +355,13 @@ class TestVoiceCloneManagement:
         """Test getting voice clone information"""
         
         # Mock the service to return clone info
-        mock_voice_cloning_service.list_voice_clones.return_value = [{
+        mock_voice_cloning_service.get_voice_clone.return_value = {
             'clone_id': 'test_clone_123',
             'name': 'Test Voice Clone',
+            'user_id': 'test_user_123',
             'status': 'completed',
             'created_at': '2023-01-01T00:00:00'
-        }]
+        }
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
             
@@ -382,8 +382,8 @@ class TestVoiceCloneManagement:
     ):
         """Test getting non-existent voice clone info"""
         
-        # Mock empty list (no clones found)
-        mock_voice_cloning_service.list_voice_clones.return_value = []
+        # Mock missing clone
+        mock_voice_cloning_service.get_voice_clone.return_value = None
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
             
@@ -399,10 +399,15 @@ class TestVoiceCloneManagement:
     async def test_delete_voice_clone_success(
         self,
         async_test_client: AsyncClient,
-        mock_voice_cloning_service
+        mock_voice_cloning_service,
+        current_user
     ):
-        """Test successful voice clone deletion"""
+        """Test successful voice clone deletion by its owner"""
         
+        mock_voice_cloning_service.get_voice_clone.return_value = {
+            'clone_id': 'test_clone_123',
+            'user_id': current_user.id
+        }
         mock_voice_cloning_service.delete_voice_clone.return_value = True
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
@@ -412,6 +417,7 @@ class TestVoiceCloneManagement:
             assert response.status_code == status.HTTP_200_OK
             response_data = response.json()
             assert "deleted successfully" in response_data["message"]
+            mock_voice_cloning_service.delete_voice_clone.assert_called_once_with("test_clone_123")
 
     @pytest.mark.unit
     @pytest.mark.voice_cloning
@@ -419,11 +425,12 @@ class TestVoiceCloneManagement:
     async def test_delete_voice_clone_not_found(
         self,
         async_test_client: AsyncClient,
-        mock_voice_cloning_service
+        mock_voice_cloning_service,
+        current_user
     ):
         """Test deleting non-existent voice clone"""
         
-        mock_voice_cloning_service.delete_voice_clone.return_value = False
+        mock_voice_cloning_service.get_voice_clone.return_value = None
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
             
@@ -432,11 +439,43 @@ class TestVoiceCloneManagement:
             assert response.status_code == status.HTTP_404_NOT_FOUND
             response_data = response.json()
             assert response_data["detail"] == "Voice clone not found"
+            mock_voice_cloning_service.delete_voice_clone.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.voice_cloning
+    @pytest.mark.asyncio
+    async def test_delete_other_users_voice_clone(
+        self,
+        async_test_client: AsyncClient,
+        mock_voice_cloning_service,
+        current_user
+    ):
+        """Test another user's clone is reported as missing and kept"""
+        
+        mock_voice_cloning_service.get_voice_clone.return_value = {
+            'clone_id': 'test_clone_123',
+            'user_id': 'someone_else'
+        }
+        
+        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
+            
+            response = await async_test_client.delete("/api/v1/voice/test_clone_123")
+            
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            mock_voice_cloning_service.delete_voice_clone.assert_not_called()
 
 
 class TestVoiceSimilarity:
     """Test voice similarity search functionality"""
 
+    @pytest.fixture(autouse=True)
+    def owned_clone(self, mock_voice_cloning_service, current_user):
+        """Query clone belonging to the signed-in user"""
+        mock_voice_cloning_service.get_voice_clone.return_value = {
+            'clone_id': 'test_clone_123',
+            'user_id': current_user.id
+        }
+
     @pytest.mark.unit
     @pytest.mark.voice_cloning
     @pytest.mark.asyncio
@@ -481,10 +520,9 @@ class TestVoiceSimilarity:
             assert response.status_code == status.HTTP_200_OK
             
             # Verify service was called with custom limit
-            mock_voice_cloning_service.find_similar_voices.assert_called_with(
-                clone_id="test_clone_123",
-                n_results=8
-            )
+            call = mock_voice_cloning_service.find_similar_voices.call_args
+            assert call.kwargs["clone_id"] == "test_clone_123"
+            assert call.kwargs["n_results"] == 8
 
     @pytest.mark.unit
     @pytest.mark.voice_cloning
@@ -503,10 +541,68 @@ class TestVoiceSimilarity:
             assert response.status_code == status.HTTP_200_OK
             
             # Verify service was called with capped limit
-            mock_voice_cloning_service.find_similar_voices.assert_called_with(
-                clone_id="test_clone_123",
-                n_results=10  # Should be capped at 10
-            )
+            call = mock_voice_cloning_service.find_similar_voices.call_args
+            assert call.kwargs["clone_id"] == "test_clone_123"
+            assert call.kwargs["n_results"] == 10  # Should be capped at 10
+
+    @pytest.mark.unit
+    @pytest.mark.voice_cloning
+    @pytest.mark.asyncio
+    async def test_find_similar_voices_unknown_clone(
+        self,
+        async_test_client: AsyncClient,
+        mock_voice_cloning_service
+    ):
+        """Test searching from a missing clone is a 404, not an empty result"""
+        
+        mock_voice_cloning_service.get_voice_clone.return_value = None
+        
+        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
+            
+            response = await async_test_client.get("/api/v1/voice/similar/nonexistent")
+            
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            mock_voice_cloning_service.find_similar_voices.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.voice_cloning
+    @pytest.mark.asyncio
+    async def test_find_similar_voices_other_users_clone(
+        self,
+        async_test_client: AsyncClient,
+        mock_voice_cloning_service
+    ):
+        """Test another user's clone cannot be used as the query voice"""
+        
+        mock_voice_cloning_service.get_voice_clone.return_value = {
+            'clone_id': 'test_clone_123',
+            'user_id': 'someone_else'
+        }
+        
+        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
+            
+            response = await async_test_client.get("/api/v1/voice/similar/test_clone_123")
+            
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            mock_voice_cloning_service.find_similar_voices.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.voice_cloning
+    @pytest.mark.asyncio
+    async def test_find_similar_voices_without_embedding(
+        self,
+        async_test_client: AsyncClient,
+        mock_voice_cloning_service
+    ):
+        """Test a catalogued clone with no stored embedding is a 404"""
+        
+        mock_voice_cloning_service.find_similar_voices.side_effect = ValueError("Voice clone not found")
+        
+        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
+            
+            response = await async_test_client.get("/api/v1/voice/similar/test_clone_123")
+            
+            assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 class TestVoiceEmbedding:
@@ -601,12 +697,12 @@ class TestVoiceCloningErrorHandling:
         mock_file_handler,
         mock_database
     ):
-        """Test voice clone creation when service fails"""
+        """Test voice clone creation when the job cannot be queued"""
         
-        mock_voice_cloning_service = Mock()
-        mock_voice_cloning_service.create_voice_clone.side_effect = Exception("Service error")
+        mock_job_queue = Mock()
+        mock_job_queue.submit = AsyncMock(side_effect=Exception("Queue error"))
         
-        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+        with patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -673,11 +769,13 @@ class TestVoiceCloningErrorHandling:
     @pytest.mark.asyncio
     async def test_find_similar_voices_service_failure(
         self,
-        async_test_client: AsyncClient
+        async_test_client: AsyncClient,
+        current_user
     ):
         """Test similar voice search when service fails"""
         
         mock_voice_cloning_service = Mock()
+        mock_voice_cloning_service.get_voice_clone.return_value = {'clone_id': 'test_clone_123', 'user_id': current_user.id}
         mock_voice_cloning_service.find_similar_voices.side_effect = Exception("Vector search error")
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
@@ -693,11 +791,13 @@ class TestVoiceCloningErrorHandling:
     @pytest.mark.asyncio
     async def test_delete_voice_clone_service_failure(
         self,
-        async_test_client: AsyncClient
+        async_test_client: AsyncClient,
+        current_user
     ):
         """Test voice clone deletion when service fails"""
         
         mock_voice_cloning_service = Mock()
+        mock_voice_cloning_service.get_voice_clone.return_value = {'clone_id': 'test_clone_123', 'user_id': current_user.id}
         mock_voice_cloning_service.delete_voice_clone.side_effect = Exception("Deletion error")
         
         with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service):
@@ -748,7 +848,7 @@ class TestVoiceCloningEdgeCases:
         self,
         async_test_client: AsyncClient,
         sample_audio_file: str,
-        mock_voice_cloning_service,
+        mock_job_queue,
         mock_file_handler,
         mock_database
     ):
@@ -763,7 +863,7 @@ class TestVoiceCloningEdgeCases:
             "Voice 日本語"
         ]
         
-        with patch('app.api.routes.voice_cloning.get_voice_cloning_service', return_value=mock_voice_cloning_service), \
+        with patch('app.api.routes.voice_cloning.get_job_queue', return_value=mock_job_queue), \
              patch('app.api.routes.voice_cloning.get_file_handler', return_value=mock_file_handler), \
              patch('app.api.routes.voice_cloning.get_database', return_value=mock_database):
             
@@ -779,7 +879,7 @@ class TestVoiceCloningEdgeCases:
                     )
                 
                 # Should handle all names gracefully
-                assert response.status_code == status.HTTP_200_OK
+                assert response.status_code == status.HTTP_202_ACCEPTED
 
     @pytest.mark.unit
     @pytest.mark.voice_cloning
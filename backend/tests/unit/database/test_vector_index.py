@@ -0,0 +1,397 @@
+"""
+Unit tests for the in-process vector index
+Tests exact top-k search, quantized search with re-ranking, metadata
+filtering, persistence, deletion and the ChromaDB-compatible result format
+of the numpy vector store backend
+"""
+
+import os
+import json
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from app.database.vector_index import NumpyVectorIndex, hnswlib
+from app.database.vector_store import VectorStore, voice_filter, voice_metadata
+
+
+def _random_embeddings(count: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+
+
+@pytest.fixture
+def index(temp_dir):
+    return NumpyVectorIndex(temp_dir, "voices")
+
+
+class TestNumpyVectorIndex:
+    """Test the memory-mapped index"""
+
+    @pytest.mark.unit
+    def test_query_matches_brute_force(self, index):
+        """Test top-k results equal a full cosine similarity ranking"""
+        embeddings = _random_embeddings(200)
+        ids = [f"voice_{i}" for i in range(200)]
+        index.add(ids, embeddings.tolist(), [{"n": i} for i in range(200)])
+        query = _random_embeddings(1, seed=1)[0]
+
+        result = index.query(query.tolist(), n_results=5)
+
+        normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        similarity = normalized @ (query / np.linalg.norm(query))
+        expected = np.argsort(-similarity)[:5]
+        assert result["ids"] == [ids[i] for i in expected]
+        np.testing.assert_allclose(result["distances"], 1 - similarity[expected], rtol=1e-4, atol=1e-5)
+        assert result["metadatas"][0] == {"n": int(expected[0])}
+
+    @pytest.mark.unit
+    def test_vectors_persist_across_instances(self, index, temp_dir):
+        """Test a reopened index serves the same vectors"""
+        embeddings = _random_embeddings(3)
+        index.add(["a", "b", "c"], embeddings.tolist())
+
+        reopened = NumpyVectorIndex(temp_dir, "voices")
+
+        assert len(reopened) == 3
+        np.testing.assert_allclose(
+            reopened.get("b"), embeddings[1] / np.linalg.norm(embeddings[1]), rtol=1e-5
+        )
+
+    @pytest.mark.unit
+    def test_growth_keeps_existing_rows(self, index):
+        """Test the matrix grows past its initial capacity without losing data"""
+        embeddings = _random_embeddings(150)
+        for i in range(150):
+            index.add([f"v{i}"], [embeddings[i].tolist()])
+
+        assert len(index) == 150
+        assert index.query(embeddings[7].tolist(), n_results=1)["ids"] == ["v7"]
+
+    @pytest.mark.unit
+    def test_delete_moves_last_row(self, index):
+        """Test deleted ids disappear and the moved row stays addressable"""
+        embeddings = _random_embeddings(4)
+        index.add(["a", "b", "c", "d"], embeddings.tolist())
+
+        index.delete(["b", "missing"])
+
+        assert index.get("b") is None
+        assert sorted(index.query(embeddings[3].tolist(), n_results=10)["ids"]) == ["a", "c", "d"]
+        assert index.query(embeddings[3].tolist(), n_results=1)["ids"] == ["d"]
+
+    @pytest.mark.unit
+    def test_deletes_persist_across_instances(self, index, temp_dir):
+        """Test ids, metadata and rows moved by a delete are reloaded"""
+        embeddings = _random_embeddings(4)
+        index.add(["a", "b", "c", "d"], embeddings.tolist(), [{"n": i} for i in range(4)])
+        index.delete(["a"])
+        index.add(["e"], embeddings[:1].tolist(), [{"n": 4}])
+
+        reopened = NumpyVectorIndex(temp_dir, "voices")
+
+        assert reopened.ids == index.ids == ["d", "b", "c", "e"]
+        assert reopened.metadatas == [{"n": 3}, {"n": 1}, {"n": 2}, {"n": 4}]
+        np.testing.assert_allclose(reopened.get("d"), index.get("d"))
+
+    @pytest.mark.unit
+    def test_json_table_imported(self, index, temp_dir):
+        """Test an id table written by older versions is imported on open"""
+        index.add(["a", "b"], _random_embeddings(2).tolist(), [{"n": 0}, {"n": 1}])
+        (temp_dir / "voices.sqlite3").unlink()
+        (temp_dir / "voices.json").write_text(json.dumps({"ids": ["a", "b"], "metadatas": [{"n": 0}, {"n": 1}]}))
+
+        reopened = NumpyVectorIndex(temp_dir, "voices")
+
+        assert reopened.ids == ["a", "b"]
+        assert reopened.metadatas == [{"n": 0}, {"n": 1}]
+        assert not (temp_dir / "voices.json").exists()
+
+    @pytest.mark.unit
+    @pytest.mark.skipif(sys.platform == "win32", reason="process lock needs fcntl")
+    def test_second_process_rejected(self, index, temp_dir):
+        """Test another process cannot open an index this process holds"""
+        script = (
+            "import sys\n"
+            "from app.database.vector_index import NumpyVectorIndex\n"
+            "try:\n"
+            f"    NumpyVectorIndex({str(temp_dir)!r}, 'voices')\n"
+            "except RuntimeError:\n"
+            "    sys.exit(3)\n"
+        )
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        result = subprocess.run([sys.executable, "-c", script], env=env)
+
+        assert result.returncode == 3
+
+    @pytest.mark.unit
+    def test_re_adding_replaces_vector(self, index):
+        """Test adding an existing id replaces its vector and metadata"""
+        index.add(["a"], [[1.0, 0.0]], [{"v": 1}])
+        index.add(["a"], [[0.0, 1.0]], [{"v": 2}])
+
+        assert len(index) == 1
+        np.testing.assert_allclose(index.get("a"), [0.0, 1.0])
+        assert index.query([0.0, 1.0], n_results=1)["metadatas"] == [{"v": 2}]
+
+    @pytest.mark.unit
+    def test_float16_storage(self, temp_dir):
+        """Test half-precision storage keeps rankings"""
+        index = NumpyVectorIndex(temp_dir, "voices", dtype="float16")
+        embeddings = _random_embeddings(50)
+        index.add([f"v{i}" for i in range(50)], embeddings.tolist())
+
+        assert index.query(embeddings[10].tolist(), n_results=1)["ids"] == ["v10"]
+
+    @pytest.mark.unit
+    def test_empty_index_query(self, index):
+        """Test querying an empty index returns no results"""
+        assert index.query([1.0, 0.0], n_results=5) == {'ids': [], 'distances': [], 'metadatas': []}
+
+    @pytest.mark.unit
+    @pytest.mark.skipif(hnswlib is None, reason="hnswlib not installed")
+    def test_ann_used_above_threshold(self, temp_dir):
+        """Test large collections are searched through HNSW"""
+        index = NumpyVectorIndex(temp_dir, "voices", ann_threshold=100)
+        embeddings = _random_embeddings(500)
+        index.add([f"v{i}" for i in range(500)], embeddings.tolist())
+
+        assert index.query(embeddings[42].tolist(), n_results=3)["ids"][0] == "v42"
+        assert index._ann is not None
+
+    @pytest.mark.unit
+    @pytest.mark.skipif(hnswlib is None, reason="hnswlib not installed")
+    def test_ann_updated_in_place(self, temp_dir):
+        """Test adds and deletes after the first query update the HNSW index without a rebuild"""
+        index = NumpyVectorIndex(temp_dir, "voices", ann_threshold=100)
+        embeddings = _random_embeddings(600)
+        index.add([f"v{i}" for i in range(500)], embeddings[:500].tolist())
+        index.query(embeddings[0].tolist(), n_results=1)
+        ann = index._ann
+
+        index.delete(["v7", "v499"])
+        index.add([f"v{i}" for i in range(500, 600)], embeddings[500:].tolist())
+
+        assert index._ann is ann
+        assert index.query(embeddings[550].tolist(), n_results=1)["ids"] == ["v550"]
+        # v498 was moved into the row freed by v7
+        assert index.query(embeddings[498].tolist(), n_results=1)["ids"] == ["v498"]
+        assert "v7" not in index.query(embeddings[7].tolist(), n_results=5)["ids"]
+
+
+class TestQuantizedIndex:
+    """Test searching a resident quantized copy with full-precision re-ranking"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("quantization", ["int8", "float16"])
+    def test_results_match_exact_search(self, temp_dir, quantization):
+        """Test re-ranked results and distances equal the float32 search"""
+        embeddings = _random_embeddings(500, dim=64)
+        ids = [f"v{i}" for i in range(500)]
+        exact = NumpyVectorIndex(temp_dir / "exact", "voices")
+        quantized = NumpyVectorIndex(temp_dir / "quantized", "voices", quantization=quantization)
+        exact.add(ids, embeddings.tolist())
+        quantized.add(ids, embeddings.tolist())
+
+        for query in _random_embeddings(20, dim=64, seed=1):
+            expected = exact.query(query.tolist(), n_results=5)
+            result = quantized.query(query.tolist(), n_results=5)
+            assert result["ids"] == expected["ids"]
+            np.testing.assert_allclose(result["distances"], expected["distances"], atol=1e-6)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("quantization", [None, "int8"])
+    def test_batched_queries_match_single_queries(self, temp_dir, quantization):
+        """Test query_batch returns what one query per embedding would"""
+        embeddings = _random_embeddings(300, dim=64)
+        index = NumpyVectorIndex(temp_dir, "recordings", quantization=quantization)
+        index.add([f"r{i}" for i in range(300)], embeddings.tolist())
+        queries = _random_embeddings(8, dim=64, seed=2)
+
+        batch = index.query_batch(queries.tolist(), n_results=5)
+
+        assert len(batch) == 8
+        for query, result in zip(queries, batch):
+            expected = index.query(query.tolist(), n_results=5)
+            assert result["ids"] == expected["ids"]
+            np.testing.assert_allclose(result["distances"], expected["distances"], atol=1e-6)
+
+    @pytest.mark.unit
+    def test_int8_memory_is_a_quarter(self, temp_dir):
+        """Test the resident int8 rows take a quarter of float32 plus a scale"""
+        embeddings = _random_embeddings(100, dim=256)
+        exact = NumpyVectorIndex(temp_dir / "exact", "voices")
+        quantized = NumpyVectorIndex(temp_dir / "quantized", "voices", quantization="int8")
+        exact.add([f"v{i}" for i in range(100)], embeddings.tolist())
+        quantized.add([f"v{i}" for i in range(100)], embeddings.tolist())
+
+        assert exact.resident_bytes == 100 * 256 * 4
+        assert quantized.resident_bytes == 100 * (256 + 4)
+
+    @pytest.mark.unit
+    def test_codes_follow_deletes_and_reloads(self, temp_dir):
+        """Test swap-removes and reloads keep the resident rows in step with the file"""
+        embeddings = _random_embeddings(50)
+        index = NumpyVectorIndex(temp_dir, "voices", quantization="int8")
+        index.add([f"v{i}" for i in range(50)], embeddings.tolist())
+        index.delete(["v3"])
+
+        reopened = NumpyVectorIndex(temp_dir, "voices", quantization="int8")
+        for current in (index, reopened):
+            assert current.query(embeddings[49].tolist(), n_results=1)["ids"] == ["v49"]
+            assert "v3" not in current.query(embeddings[3].tolist(), n_results=49)["ids"]
+
+    @pytest.mark.unit
+    def test_unknown_quantization_rejected(self, temp_dir):
+        """Test misconfigured quantization fails at startup"""
+        with pytest.raises(ValueError):
+            NumpyVectorIndex(temp_dir, "voices", quantization="pq")
+
+
+class TestFilteredQuery:
+    """Test metadata filters applied before scoring"""
+
+    @pytest.fixture
+    def tenant_index(self, index):
+        embeddings = _random_embeddings(60)
+        metadatas = [
+            voice_metadata(user_id=f"user_{i % 3}", language="en" if i % 2 else "fr",
+                           tags=["narration"] if i % 5 == 0 else None)
+            for i in range(60)
+        ]
+        index.add([f"v{i}" for i in range(60)], embeddings.tolist(), metadatas)
+        return index, embeddings
+
+    @pytest.mark.unit
+    def test_filter_restricts_results(self, tenant_index):
+        """Test only matching voices are returned, ranked among themselves"""
+        index, embeddings = tenant_index
+        query = embeddings[0]
+
+        result = index.query(query.tolist(), n_results=50, where={"user_id": "user_1", "language": "en"})
+
+        expected = [i for i in range(60) if i % 3 == 1 and i % 2 == 1]
+        normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        scores = normalized[expected] @ (query / np.linalg.norm(query))
+        assert result["ids"] == [f"v{expected[i]}" for i in np.argsort(-scores)]
+        assert all(m["user_id"] == "user_1" for m in result["metadatas"])
+
+    @pytest.mark.unit
+    def test_tag_filter(self, tenant_index):
+        """Test tags are matched through their boolean metadata keys"""
+        index, embeddings = tenant_index
+        result = index.query(embeddings[0].tolist(), n_results=60, where=voice_filter(tags=["narration"]))
+
+        assert sorted(result["ids"]) == sorted(f"v{i}" for i in range(0, 60, 5))
+
+    @pytest.mark.unit
+    def test_exclude_ids_still_returns_n_results(self, tenant_index):
+        """Test excluding the query voice does not shorten the result list"""
+        index, embeddings = tenant_index
+
+        result = index.query(embeddings[0].tolist(), n_results=5, exclude_ids=["v0"])
+        filtered = index.query(embeddings[0].tolist(), n_results=5, where={"user_id": "user_0"}, exclude_ids=["v0"])
+
+        assert len(result["ids"]) == 5 and "v0" not in result["ids"]
+        assert len(filtered["ids"]) == 5 and "v0" not in filtered["ids"]
+
+    @pytest.mark.unit
+    def test_filters_follow_deletes_and_reloads(self, tenant_index, temp_dir):
+        """Test the inverted index tracks swap-removes and is rebuilt on load"""
+        index, embeddings = tenant_index
+        index.delete(["v1", "v4"])
+
+        reopened = NumpyVectorIndex(temp_dir, "voices")
+        for current in (index, reopened):
+            result = current.query(embeddings[0].tolist(), n_results=60, where={"user_id": "user_1"})
+            assert sorted(result["ids"]) == sorted(f"v{i}" for i in range(60) if i % 3 == 1 and i not in (1, 4))
+
+    @pytest.mark.unit
+    def test_no_matches(self, tenant_index):
+        """Test a filter matching nothing returns empty results"""
+        index, embeddings = tenant_index
+        result = index.query(embeddings[0].tolist(), where={"user_id": "nobody"})
+
+        assert result == {'ids': [], 'distances': [], 'metadatas': []}
+
+
+class TestNumpyVectorStore:
+    """Test the vector store facade on the numpy backend"""
+
+    @pytest.mark.unit
+    def test_voice_embedding_round_trip(self, temp_dir):
+        """Test the store methods behave as with ChromaDB"""
+        store = VectorStore(persist_directory=str(temp_dir), backend="numpy")
+        store.store_voice_embedding("clone_1", [3.0, 4.0], {"name": "a"})
+        store.store_voice_embedding("clone_2", [4.0, 3.0], {"name": "b"})
+
+        np.testing.assert_allclose(store.get_voice_embedding("clone_1"), [0.6, 0.8])
+        assert store.find_similar_voices([3.0, 4.0], n_results=2)["ids"] == ["clone_1", "clone_2"]
+
+        store.delete_voice_embedding("clone_1")
+        assert store.get_voice_embedding("clone_1") is None
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["numpy", "chroma"])
+    def test_re_indexing_replaces_on_both_backends(self, temp_dir, backend):
+        """Test storing the same id twice keeps one entry with the latest vector and metadata"""
+        store = VectorStore(persist_directory=str(temp_dir), backend=backend)
+        store.store_voice_embedding("clone_1", [1.0, 0.0], {"name": "old"})
+        store.store_voice_embedding("clone_1", [0.0, 1.0], {"name": "new"})
+
+        result = store.find_similar_voices([0.0, 1.0], n_results=5)
+
+        assert result["ids"] == ["clone_1"]
+        assert result["metadatas"] == [{"name": "new"}]
+        np.testing.assert_allclose(store.get_voice_embedding("clone_1"), [0.0, 1.0], atol=1e-6)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["numpy", "chroma"])
+    def test_filtered_search_on_both_backends(self, temp_dir, backend):
+        """Test both backends apply the filter and exclusion the same way"""
+        store = VectorStore(persist_directory=str(temp_dir), backend=backend)
+        for i, (user, vector) in enumerate([("a", [1.0, 0.0]), ("b", [0.9, 0.1]), ("a", [0.5, 0.5]), ("a", [0.0, 1.0])]):
+            store.store_voice_embedding(f"clone_{i}", vector, voice_metadata(user_id=user, tags=["calm"] if i != 3 else None))
+
+        result = store.find_similar_voices(
+            [1.0, 0.0], n_results=5, where=voice_filter(user_id="a", tags=["calm"]), exclude_ids=["clone_0"]
+        )
+
+        assert result["ids"] == ["clone_2"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["numpy", "chroma"])
+    def test_batched_store(self, temp_dir, backend):
+        """Test a batch larger than Chroma's write limit is stored in full"""
+        store = VectorStore(persist_directory=str(temp_dir), backend=backend)
+        store.voice_index.max_batch_size = 3
+        embeddings = _random_embeddings(10, dim=8)
+
+        store.store_voice_embeddings([f"clone_{i}" for i in range(10)], embeddings.tolist())
+
+        assert len(store.voice_index) == 10
+        assert store.find_similar_voices(embeddings[7].tolist(), n_results=1)["ids"] == ["clone_7"]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["numpy", "chroma"])
+    def test_audio_feature_search(self, temp_dir, backend):
+        """Test recordings added one at a time are found by single and batched queries"""
+        store = VectorStore(persist_directory=str(temp_dir), backend=backend)
+        embeddings = _random_embeddings(6, dim=16)
+        for i, embedding in enumerate(embeddings):
+            store.store_audio_features(f"recording_{i}", embedding.tolist(), {"language": "en"})
+
+        single = store.search_audio_by_features(embeddings[4].tolist(), n_results=2, exclude_ids=["recording_4"])
+        batch = store.search_audio_by_features_batch([embeddings[1].tolist(), embeddings[5].tolist()], n_results=1)
+
+        assert "recording_4" not in single["ids"] and len(single["ids"]) == 2
+        assert [result["ids"] for result in batch] == [["recording_1"], ["recording_5"]]
+        stored = np.array(store.get_audio_features("recording_2"))
+        np.testing.assert_allclose(stored / np.linalg.norm(stored), embeddings[2] / np.linalg.norm(embeddings[2]), atol=1e-5)
+
+    @pytest.mark.unit
+    def test_unknown_backend_rejected(self, temp_dir):
+        """Test misconfigured backends fail at startup"""
+        with pytest.raises(ValueError):
+            VectorStore(persist_directory=str(temp_dir), backend="redis")
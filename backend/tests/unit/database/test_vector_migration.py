@@ -0,0 +1,67 @@
+"""
+Unit tests for the vector store migration tool
+Tests copying ChromaDB collections into the numpy backend and importing
+legacy embedding files
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from app.database.vector_migration import migrate_collections, migrate_legacy_files
+from app.database.vector_store import VectorStore
+from app.security import FileEncryption
+
+
+@pytest.fixture
+def numpy_store(temp_dir):
+    return VectorStore(persist_directory=str(temp_dir / "numpy"), backend="numpy")
+
+
+class TestVectorMigration:
+    """Test moving existing vector data into the canonical store"""
+
+    @pytest.mark.unit
+    def test_chroma_collections_copied(self, temp_dir, numpy_store):
+        """Test ids, vectors and metadata are copied in batches"""
+        chroma = VectorStore(persist_directory=str(temp_dir / "chroma"), backend="chroma")
+        embeddings = np.random.default_rng(0).standard_normal((25, 8))
+        chroma.store_voice_embeddings(
+            [f"clone_{i}" for i in range(25)], embeddings.tolist(), [{"user_id": f"u{i % 2}"} for i in range(25)]
+        )
+        chroma.store_audio_features("audio_1", [1.0, 2.0, 3.0], {"kind": "mfcc"})
+
+        copied = migrate_collections("chroma", numpy_store, str(temp_dir / "chroma"), batch_size=10)
+
+        assert copied == {"voice_embeddings": 25, "audio_features": 1}
+        np.testing.assert_allclose(
+            numpy_store.get_voice_embedding("clone_7"), embeddings[7] / np.linalg.norm(embeddings[7]), rtol=1e-5
+        )
+        assert numpy_store.find_similar_voices(embeddings[4].tolist(), n_results=1, where={"user_id": "u0"})["ids"] == ["clone_4"]
+
+    @pytest.mark.unit
+    def test_same_backend_rejected(self, temp_dir, numpy_store):
+        """Test migrating a backend onto itself is refused"""
+        with pytest.raises(ValueError):
+            migrate_collections("numpy", numpy_store, str(temp_dir / "numpy"))
+
+    @pytest.mark.unit
+    def test_legacy_files_imported_and_removed(self, temp_dir, numpy_store, monkeypatch):
+        """Test plain and encrypted .npy files are imported once and then deleted"""
+        encryption = FileEncryption(key="test-key")
+        monkeypatch.setattr("app.security.get_encryption", lambda: encryption)
+        legacy = temp_dir / "voice_embeddings"
+        legacy.mkdir()
+        np.save(legacy / "plain.npy", np.array([1.0, 0.0], dtype=np.float32))
+        buffer = io.BytesIO()
+        np.save(buffer, np.array([0.0, 1.0], dtype=np.float32))
+        encryption.write_encrypted(str(legacy / "secret.npy.encrypted"), buffer.getvalue())
+        numpy_store.store_voice_embedding("stored", [1.0, 1.0])
+        np.save(legacy / "stored.npy", np.array([5.0, 5.0], dtype=np.float32))
+
+        counts = migrate_legacy_files(numpy_store, str(legacy), remove=True)
+
+        assert counts == {"imported": 2, "present": 1, "removed": 3}
+        np.testing.assert_allclose(numpy_store.get_voice_embedding("secret"), [0.0, 1.0])
+        assert list(legacy.iterdir()) == []
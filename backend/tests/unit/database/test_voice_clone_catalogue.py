@@ -0,0 +1,111 @@
+"""
+Unit tests for the voice clone catalogue in SQLite
+Tests persistence, owner filtering and keyset pagination
+"""
+
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.models import DatabaseManager, VoiceClone
+
+
+def _clone(index: int, user_id: str = "alice", created_at: datetime = datetime(2024, 1, 1)) -> VoiceClone:
+    return VoiceClone(
+        id=f"clone_{index:03d}",
+        name=f"Voice {index}",
+        sample_audio_path=f"uploads/{index}.wav",
+        voice_embedding_path=f"voice_embeddings/clone_{index:03d}",
+        created_at=created_at + timedelta(seconds=index),
+        metadata={"language": "en"},
+        user_id=user_id
+    )
+
+
+@pytest.fixture
+def db(temp_dir):
+    return DatabaseManager(db_path=f"{temp_dir}/app.db")
+
+
+class TestVoiceCloneCatalogue:
+    """Test voice clone records and paginated listing"""
+
+    @pytest.mark.unit
+    def test_clone_round_trip(self, db):
+        """Test a stored clone is read back unchanged"""
+        clone = _clone(1)
+        db.create_voice_clone(clone)
+
+        assert db.get_voice_clone("clone_001") == clone
+        assert db.delete_voice_clone("clone_001")
+        assert db.get_voice_clone("clone_001") is None
+        assert not db.delete_voice_clone("clone_001")
+
+    @pytest.mark.unit
+    def test_pages_cover_owner_clones_newest_first(self, db):
+        """Test following cursors lists each of an owner's clones once, in order"""
+        db.create_voice_clones([_clone(i, "alice" if i % 3 else "bob") for i in range(50)])
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = db.list_voice_clones(user_id="alice", limit=7, cursor=cursor)
+            assert len(page) <= 7
+            seen.extend(clone.id for clone in page)
+            if cursor is None:
+                break
+
+        expected = [f"clone_{i:03d}" for i in reversed(range(50)) if i % 3]
+        assert seen == expected
+
+    @pytest.mark.unit
+    def test_equal_timestamps_split_across_pages(self, db):
+        """Test the id breaks ties so no clone is skipped or repeated"""
+        same_time = datetime(2024, 1, 1)
+        db.create_voice_clones([
+            VoiceClone(id=f"c{i}", name="v", sample_audio_path="s", voice_embedding_path="e",
+                       created_at=same_time, user_id="alice")
+            for i in range(5)
+        ])
+
+        first, cursor = db.list_voice_clones(user_id="alice", limit=2)
+        rest, _ = db.list_voice_clones(user_id="alice", limit=10, cursor=cursor)
+
+        assert [c.id for c in first + rest] == ["c4", "c3", "c2", "c1", "c0"]
+
+    @pytest.mark.unit
+    def test_listing_uses_index(self, db):
+        """Test pages are read by seeking the owner index, not scanning the table"""
+        with sqlite3.connect(db.db_path) as conn:
+            plan = " ".join(row[-1] for row in conn.execute("""
+                EXPLAIN QUERY PLAN SELECT * FROM voice_clones
+                WHERE user_id = ? AND (created_at, id) < (?, ?)
+                ORDER BY created_at DESC, id DESC LIMIT 10
+            """, ("alice", "2024", "x")))
+
+        assert "idx_voice_clones_user_created" in plan
+        assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.unit
+    def test_invalid_cursor_rejected(self, db):
+        """Test a malformed cursor is a ValueError"""
+        with pytest.raises(ValueError):
+            db.list_voice_clones(cursor="not-a-cursor")
+
+    @pytest.mark.unit
+    def test_existing_table_gains_owner_column(self, temp_dir):
+        """Test databases created before clones had owners are upgraded"""
+        path = f"{temp_dir}/old.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute("""
+                CREATE TABLE voice_clones (
+                    id TEXT PRIMARY KEY, name TEXT NOT NULL, sample_audio_path TEXT NOT NULL,
+                    voice_embedding_path TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    metadata TEXT
+                )
+            """)
+
+        db = DatabaseManager(db_path=path)
+        db.create_voice_clone(_clone(1))
+
+        assert db.get_voice_clone("clone_001").user_id == "alice"
@@ -0,0 +1,160 @@
+"""
+Unit tests for the audio I/O layer
+Tests container sniffing, decoding to mono float32 and shared filter caches
+"""
+
+import io
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.services.audio_io import (
+    load_audio, sniff_format, get_resampler, get_mel_filterbank, filter_cache_info
+)
+
+
+def _encode(audio: np.ndarray, sample_rate: int, audio_format: str) -> bytes:
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format=audio_format)
+    return buffer.getvalue()
+
+
+def _tone(sample_rate: int, seconds: float = 1.0, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    return np.stack([tone] * channels, axis=1) if channels > 1 else tone
+
+
+class TestFormatSniffing:
+    """Test container detection from header bytes"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("header,expected", [
+        (b"RIFF\x24\x08\x00\x00WAVE", "wav"),
+        (b"fLaC\x00\x00\x00\x22", "flac"),
+        (b"OggS\x00\x02\x00\x00", "ogg"),
+        (b"ID3\x04\x00\x00\x00\x00", "mp3"),
+        (b"\xff\xfb\x90\x64\x00\x00", "mp3"),
+        (b"\x00\x00\x00\x20ftypM4A ", "m4a"),
+        (b"not audio at all", None),
+    ])
+    def test_sniff_format(self, header, expected):
+        """Test containers are identified regardless of file name"""
+        assert sniff_format(header) == expected
+
+
+class TestLoadAudio:
+    """Test decoding to mono float32 at the target rate"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("audio_format", ["WAV", "FLAC", "OGG"])
+    def test_stereo_decoded_to_mono_16k(self, audio_format):
+        """Test stereo 44.1 kHz audio comes back as 1-D float32 at 16 kHz"""
+        data = _encode(_tone(44100, channels=2), 44100, audio_format)
+
+        audio = load_audio(io.BytesIO(data), 16000)
+
+        assert audio.ndim == 1
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+
+    @pytest.mark.unit
+    def test_native_rate_not_resampled(self, temp_dir):
+        """Test audio already at the target rate is passed through unchanged"""
+        tone = _tone(16000)
+        path = temp_dir / "upload.bin"
+        path.write_bytes(_encode(tone, 16000, "WAV"))
+
+        audio = load_audio(str(path), 16000)
+
+        np.testing.assert_allclose(audio, tone, atol=1e-4)
+
+    @pytest.mark.unit
+    def test_file_position_respected(self):
+        """Test decoding starts from the current position of a file object"""
+        data = _encode(_tone(16000), 16000, "WAV")
+        source = io.BytesIO(b"prefix" + data)
+        source.seek(len(b"prefix"))
+
+        assert len(load_audio(source, 16000)) == 16000
+
+    @pytest.mark.unit
+    def test_corrupted_wav_raises(self):
+        """Test a recognised but broken container raises instead of falling back"""
+        with pytest.raises(RuntimeError):
+            load_audio(io.BytesIO(b"RIFF\x00\x00\x00\x00WAVEgarbage"), 16000)
+
+    @pytest.mark.unit
+    def test_ffmpeg_pipe_failure_falls_back(self):
+        """Test an m4a ffmpeg cannot demux from a pipe is decoded in-process from the start"""
+        data = b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 64
+        source = io.BytesIO(b"prefix" + data)
+        source.seek(len(b"prefix"))
+        failed = Mock(returncode=1, stderr=b"moov atom not found")
+        positions = []
+
+        def librosa_load(stream, sr, mono):
+            positions.append(stream.tell())
+            return _tone(sr), sr
+
+        with patch("app.services.audio_io.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("app.services.audio_io.subprocess.run", return_value=failed) as run, \
+             patch("librosa.load", side_effect=librosa_load):
+            audio = load_audio(source, 16000)
+
+        run.assert_called_once()
+        assert run.call_args.kwargs["input"] == data
+        assert positions == [len(b"prefix")]
+        assert len(audio) == 16000
+
+    @pytest.mark.unit
+    def test_ffmpeg_failure_on_path_raises(self, temp_dir):
+        """Test ffmpeg errors on a file path are reported rather than retried"""
+        path = temp_dir / "broken.m4a"
+        path.write_bytes(b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 64)
+        failed = Mock(returncode=1, stderr=b"Invalid data found")
+
+        with patch("app.services.audio_io.shutil.which", return_value="/usr/bin/ffmpeg"), \
+             patch("app.services.audio_io.subprocess.run", return_value=failed):
+            with pytest.raises(RuntimeError, match="Invalid data found"):
+                load_audio(str(path), 16000)
+
+
+class TestResampler:
+    """Test the shared polyphase resampler"""
+
+    @pytest.mark.unit
+    def test_resampler_cached_per_rate_pair(self):
+        """Test filters are designed once per rate pair"""
+        assert get_resampler(44100, 16000) is get_resampler(44100, 16000)
+        assert get_resampler(48000, 16000) is not get_resampler(44100, 16000)
+
+    @pytest.mark.unit
+    def test_resampling_preserves_tone(self):
+        """Test a 440 Hz tone is still 440 Hz after 48 kHz -> 16 kHz"""
+        audio = get_resampler(48000, 16000)(_tone(48000))
+
+        spectrum = np.abs(np.fft.rfft(audio))
+        assert len(audio) == 16000
+        assert audio.dtype == np.float32
+        assert np.argmax(spectrum) == 440
+
+
+class TestMelFilterbank:
+    """Test the shared mel filterbank cache"""
+
+    @pytest.mark.unit
+    def test_filterbank_shape_and_reuse(self):
+        """Test filterbanks are built once per configuration and shared read-only"""
+        before = filter_cache_info()["mel_filterbanks"]["hits"]
+
+        filters = get_mel_filterbank(16000, 400, 80)
+
+        assert filters.shape == (80, 201)
+        assert filters.dtype == np.float32
+        assert get_mel_filterbank(16000, 400, 80) is filters
+        assert filter_cache_info()["mel_filterbanks"]["hits"] == before + 1
+        with pytest.raises(ValueError):
+            filters[0, 0] = 1.0
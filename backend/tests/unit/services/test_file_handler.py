@@ -0,0 +1,296 @@
+"""
+Unit tests for the file handler service
+Tests streamed upload ingestion, hashing, mid-stream size limits,
+content-addressed deduplication and zip archive expansion
+"""
+
+import hashlib
+import io
+import zipfile
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.database.artifact_index import ArtifactIndex
+from app.database.blob_store import BlobStore
+from app.security import FileEncryption
+from app.services.file_handler import FileHandlerService
+
+
+@pytest.fixture
+def file_handler(temp_dir, monkeypatch):
+    """File handler writing to a temporary upload folder in small blocks"""
+    monkeypatch.chdir(temp_dir)
+    handler = FileHandlerService()
+    handler.artifacts = ArtifactIndex(db_path=f"{temp_dir}/artifacts.db")
+    handler.blobs = BlobStore(db_path=f"{temp_dir}/blobs.db")
+    handler.upload_folder = Path(temp_dir) / "uploads"
+    handler.blob_folder = handler.upload_folder / "blobs"
+    handler.blob_folder.mkdir(parents=True, exist_ok=True)
+    handler.chunk_size = 1024
+    handler.encryption = None
+    return handler
+
+
+def _upload(data: bytes, filename: str = "test_audio.wav") -> UploadFile:
+    """Upload without a declared size, as with chunked transfer encoding"""
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+class TestStreamingUpload:
+    """Test block-wise upload ingestion"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_upload_is_written_and_hashed(self, file_handler):
+        """Test streamed uploads produce the same file and hash as the input"""
+        data = bytes(range(256)) * 20
+
+        result = await file_handler.save_upload_file(_upload(data), subfolder="stt_input")
+
+        assert result["file_size"] == len(data)
+        assert result["file_hash"] == hashlib.sha256(data).hexdigest()
+        assert Path(result["file_path"]).read_bytes() == data
+        assert file_handler.artifacts.get(result["file_path"])["kind"] == "upload"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_upload_is_read_in_blocks(self, file_handler):
+        """Test the upload is never read in one piece"""
+        data = b"x" * 5000
+        upload = _upload(data)
+        reads = []
+        original_read = upload.read
+
+        async def tracking_read(size=-1):
+            reads.append(size)
+            return await original_read(size)
+
+        upload.read = tracking_read
+        await file_handler.save_upload_file(upload)
+
+        assert reads and all(size == file_handler.chunk_size for size in reads)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_size_limit_enforced_mid_stream(self, file_handler):
+        """Test oversized uploads without a declared size are rejected and removed"""
+        file_handler.max_file_size = 4096
+
+        with pytest.raises(HTTPException) as exc_info:
+            await file_handler.save_upload_file(_upload(b"x" * 10000))
+
+        assert exc_info.value.status_code == 413
+        assert list(file_handler.upload_folder.rglob("*.*")) == []
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_encrypted_upload_round_trip(self, file_handler, temp_dir):
+        """Test encrypted uploads decrypt back to the original bytes"""
+        file_handler.encryption = FileEncryption(key="k" * 32)
+        data = b"audio bytes " * 1000
+
+        result = await file_handler.save_upload_file(_upload(data))
+
+        assert result["file_path"].endswith(".encrypted")
+        assert result["file_hash"] == hashlib.sha256(data).hexdigest()
+        decrypted = file_handler.encryption.decrypt_file(result["file_path"], f"{temp_dir}/plain.wav")
+        assert Path(decrypted).read_bytes() == data
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_encrypted_content_read_without_temp_files(self, file_handler):
+        """Test encrypted uploads are read back in memory without plaintext on disk"""
+        file_handler.encryption = FileEncryption(key="k" * 32)
+        data = b"audio bytes " * 1000
+
+        result = await file_handler.save_upload_file(_upload(data), subfolder="stt_input")
+        before = set(file_handler.upload_folder.rglob("*"))
+
+        content = file_handler.get_file_content(result["filename"], "stt_input")
+
+        assert content == data
+        assert set(file_handler.upload_folder.rglob("*")) == before
+
+
+class TestOutputFiles:
+    """Test locating and opening generated audio files"""
+
+    @pytest.mark.unit
+    def test_encrypted_output_reports_plaintext_size(self, file_handler, temp_dir):
+        """Test encrypted outputs are found in the output folder with their plaintext size"""
+        file_handler.audio_output_folder = Path(temp_dir) / "audio_outputs"
+        file_handler.audio_output_folder.mkdir(exist_ok=True)
+        file_handler.encryption = FileEncryption(key="k" * 32)
+        data = b"synthesized audio " * 500
+        file_handler.encryption.write_encrypted(
+            str(file_handler.audio_output_folder / "tts_test.wav.encrypted"), data
+        )
+
+        info = file_handler.get_output_file_info("tts_test.wav")
+
+        assert info["encrypted"] is True
+        assert info["size"] == len(data)
+        with file_handler.open_output_file(info) as f:
+            f.seek(100)
+            assert f.read(50) == data[100:150]
+
+    @pytest.mark.unit
+    def test_output_lookup_rejects_paths(self, file_handler):
+        """Test only plain file names inside the output folder are served"""
+        assert file_handler.get_output_file_info("../app_data.db") is None
+        assert file_handler.get_output_file_info("missing.wav") is None
+
+
+class TestContentAddressedStorage:
+    """Test deduplicated blob storage of uploads"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_duplicate_upload_stored_once(self, file_handler):
+        """Test re-uploading the same content reuses the stored file"""
+        data = b"same recording" * 100
+
+        first = await file_handler.save_upload_file(_upload(data, "a.wav"))
+        second = await file_handler.save_upload_file(_upload(data, "b.wav"))
+
+        assert first["deduplicated"] is False
+        assert second["deduplicated"] is True
+        assert second["file_path"] == first["file_path"]
+        assert not first["filename"].startswith(first["file_hash"])
+        assert first["filename"].startswith(file_handler._blob_name(first["file_hash"]))
+        assert file_handler.blobs.get(first["file_hash"])["ref_count"] == 2
+        assert len([p for p in file_handler.blob_folder.rglob("*") if p.is_file()]) == 1
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_blob_deleted_with_last_reference(self, file_handler):
+        """Test deleting an upload only removes the file once unreferenced"""
+        data = b"shared" * 100
+        first = await file_handler.save_upload_file(_upload(data))
+        await file_handler.save_upload_file(_upload(data))
+
+        assert file_handler.delete_file(first["filename"], "stt_input")
+        assert Path(first["file_path"]).exists()
+
+        assert file_handler.delete_file(first["filename"], "stt_input")
+        assert not Path(first["file_path"]).exists()
+        assert file_handler.blobs.get(first["file_hash"]) is None
+        assert file_handler.artifacts.get(first["file_path"]) is None
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_missing_blob_file_is_restored(self, file_handler):
+        """Test an upload replaces a stored copy that has gone missing"""
+        data = b"restored" * 100
+        first = await file_handler.save_upload_file(_upload(data))
+        Path(first["file_path"]).unlink()
+
+        second = await file_handler.save_upload_file(_upload(data))
+
+        assert Path(second["file_path"]).read_bytes() == data
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_results_outlive_last_reference(self, file_handler):
+        """Test derived results stay valid after the last stored copy is released"""
+        data = b"transcribed" * 100
+        first = await file_handler.save_upload_file(_upload(data))
+        await file_handler.save_upload_file(_upload(data))
+        file_handler.blobs.put_result(first["file_hash"], "transcription", {"text": "hi"})
+
+        file_handler.delete_file(first["filename"])
+        assert file_handler.blobs.get_result(first["file_hash"], "transcription") == {"text": "hi"}
+
+        file_handler.delete_file(first["filename"])
+        assert file_handler.blobs.get(first["file_hash"]) is None
+        assert file_handler.blobs.get_result(first["file_hash"], "transcription") == {"text": "hi"}
+
+    @pytest.mark.unit
+    def test_results_looked_up_by_content_hash(self, file_handler):
+        """Test derived results are keyed by hash, kind and parameters"""
+        file_handler.blobs.put_result("abc", "transcription", {"text": "hi"}, params="en")
+
+        assert file_handler.blobs.get_result("abc", "transcription", params="en") == {"text": "hi"}
+        assert file_handler.blobs.get_result("abc", "transcription", params="fr") is None
+
+
+class TestArchiveExpansion:
+    """Test zip uploads expanded into per-sample uploads"""
+
+    @staticmethod
+    def _zip(entries) -> UploadFile:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in entries.items():
+                archive.writestr(name, data)
+        buffer.seek(0)
+        return _upload(buffer.getvalue(), "samples.zip")
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_audio_entries_saved(self, file_handler):
+        """Test audio entries are saved and other entries skipped"""
+        archive = self._zip({
+            "voices/alice.wav": b"alice" * 300,
+            "voices/bob.flac": b"bob" * 300,
+            "voices/notes.txt": b"ignored",
+            "__MACOSX/voices/._alice.wav": b"resource fork",
+        })
+
+        entries = file_handler.expand_archive(archive)
+        saved = [await file_handler.save_upload_file(entry) for entry in entries]
+
+        assert [entry.filename for entry in entries] == ["alice.wav", "bob.flac"]
+        assert Path(saved[0]["file_path"]).read_bytes() == b"alice" * 300
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_oversized_entry_rejected(self, file_handler):
+        """Test the size limit applies to each entry as it is streamed"""
+        file_handler.max_file_size = 1000
+        entries = file_handler.expand_archive(self._zip({"big.wav": b"x" * 5000}))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await file_handler.save_upload_file(entries[0])
+        assert exc_info.value.status_code == 413
+
+    @pytest.mark.unit
+    def test_high_compression_ratio_rejected(self, file_handler):
+        """Test entries that inflate far beyond their compressed size are refused"""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("bomb.wav", b"\0" * (1024 * 1024))
+
+        with pytest.raises(HTTPException) as exc_info:
+            file_handler.expand_archive(_upload(buffer.getvalue(), "samples.zip"))
+        assert exc_info.value.status_code == 413
+
+    @pytest.mark.unit
+    def test_total_expanded_size_limited(self, file_handler, monkeypatch):
+        """Test the archive's entries together must fit the expansion budget"""
+        monkeypatch.setattr("app.services.file_handler.settings.VOICE_INGEST_MAX_ARCHIVE_BYTES", 2000)
+
+        with pytest.raises(HTTPException) as exc_info:
+            file_handler.expand_archive(self._zip({"a.wav": b"a" * 1500, "b.wav": b"b" * 1500}))
+        assert exc_info.value.status_code == 413
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_expansion_budget_enforced_while_streaming(self, file_handler):
+        """Test the budget counts inflated bytes, not the sizes the archive declares"""
+        entries = file_handler.expand_archive(self._zip({"a.wav": b"a" * 3000}))
+        entries[0].file.budget["remaining"] = 1500
+
+        with pytest.raises(HTTPException) as exc_info:
+            await file_handler.save_upload_file(entries[0])
+        assert exc_info.value.status_code == 413
+        assert not [p for p in file_handler.blob_folder.rglob("*") if p.is_file()]
+
+    @pytest.mark.unit
+    def test_invalid_archive_rejected(self, file_handler):
+        """Test a file that is not a zip archive is a client error"""
+        with pytest.raises(HTTPException) as exc_info:
+            file_handler.expand_archive(_upload(b"not a zip", "samples.zip"))
+        assert exc_info.value.status_code == 400
@@ -0,0 +1,331 @@
+"""
+Unit tests for the persistent job store and background job queue
+Tests priority ordering, atomic claiming, crash recovery and retries
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from unittest.mock import Mock, patch
+
+from app.database.job_store import JobStore, JobStatus
+from app.services.job_queue import JobQueue, run_voice_clone_job, release_transcription_upload
+
+
+@pytest.fixture
+def job_store(temp_dir):
+    """Job store backed by a temporary SQLite file"""
+    return JobStore(db_path=f"{temp_dir}/jobs.db")
+
+
+class TestJobStore:
+    """Test the SQLite-backed job table"""
+
+    @pytest.mark.unit
+    def test_claim_orders_by_priority_then_age(self, job_store):
+        """Test higher priority jobs are claimed first, oldest first within a priority"""
+        low = job_store.create_job("transcribe", {"n": 1}, priority=0)
+        high = job_store.create_job("transcribe", {"n": 2}, priority=5)
+        low_later = job_store.create_job("transcribe", {"n": 3}, priority=0)
+
+        claimed = [job_store.claim_next_job().id for _ in range(3)]
+
+        assert claimed == [high.id, low.id, low_later.id]
+        assert job_store.claim_next_job() is None
+
+    @pytest.mark.unit
+    def test_claim_marks_job_running(self, job_store):
+        """Test claiming moves a job to running and counts the attempt"""
+        job = job_store.create_job("transcribe", {"file_path": "a.wav"})
+
+        claimed = job_store.claim_next_job(["transcribe"])
+
+        assert claimed.status == JobStatus.RUNNING
+        assert claimed.attempts == 1
+        assert claimed.payload == {"file_path": "a.wav"}
+        assert job_store.get_job(job.id).status == JobStatus.RUNNING
+
+    @pytest.mark.unit
+    def test_claim_filters_job_types(self, job_store):
+        """Test workers only claim job types they can handle"""
+        job_store.create_job("voice_clone", {})
+
+        assert job_store.claim_next_job(["transcribe"]) is None
+
+    @pytest.mark.unit
+    def test_requeue_only_expired_leases(self, job_store):
+        """Test jobs of a dead worker are re-queued and live workers keep theirs"""
+        stale = job_store.create_job("transcribe", {}, priority=1)
+        live = job_store.create_job("transcribe", {})
+        job_store.claim_next_job(worker_id="dead")
+        job_store.claim_next_job(worker_id="alive")
+
+        assert job_store.get_job(stale.id).worker_id == "dead"
+        assert job_store.requeue_stale_jobs(lease_seconds=60, max_attempts=3) == 0
+
+        with job_store._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ?",
+                ((datetime.now() - timedelta(minutes=5)).isoformat(), "dead")
+            )
+        job_store.heartbeat("alive")
+
+        assert job_store.requeue_stale_jobs(lease_seconds=60, max_attempts=3) == 1
+        assert job_store.get_job(stale.id).status == JobStatus.QUEUED
+        assert job_store.get_job(stale.id).worker_id is None
+        assert job_store.get_job(live.id).status == JobStatus.RUNNING
+
+    @pytest.mark.unit
+    def test_stale_job_on_last_attempt_is_failed(self, job_store):
+        """Test an expired lease on the final attempt fails the job instead of re-queuing it"""
+        retried = job_store.create_job("transcribe", {}, priority=1)
+        exhausted = job_store.create_job("transcribe", {"file_path": "a.wav"})
+        job_store.claim_next_job(worker_id="dead")
+        job_store.claim_next_job(worker_id="dead")
+
+        with job_store._connect() as conn:
+            conn.execute("UPDATE jobs SET attempts = 3 WHERE id = ?", (exhausted.id,))
+            conn.execute("UPDATE jobs SET heartbeat_at = ?", ((datetime.now() - timedelta(minutes=5)).isoformat(),))
+
+        failed = job_store.fail_stale_jobs(lease_seconds=60, max_attempts=3)
+
+        assert [job.id for job in failed] == [exhausted.id]
+        assert failed[0].payload == {"file_path": "a.wav"}
+        assert job_store.get_job(exhausted.id).status == JobStatus.FAILED
+        assert job_store.requeue_stale_jobs(lease_seconds=60, max_attempts=3) == 1
+        assert job_store.get_job(retried.id).status == JobStatus.QUEUED
+        assert job_store.get_job(exhausted.id).status == JobStatus.FAILED
+
+    @pytest.mark.unit
+    def test_only_lease_holder_finishes_job(self, job_store):
+        """Test a worker that lost its lease cannot complete or fail the job"""
+        job = job_store.create_job("transcribe", {})
+        job_store.claim_next_job(worker_id="first")
+        with job_store._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ?", ((datetime.now() - timedelta(minutes=5)).isoformat(),))
+        job_store.requeue_stale_jobs(lease_seconds=60, max_attempts=3)
+        job_store.claim_next_job(worker_id="second")
+
+        assert job_store.complete_job(job.id, "first", {"text": "late"}) is False
+        assert job_store.fail_job(job.id, "first", "late failure") is False
+        assert job_store.get_job(job.id).status == JobStatus.RUNNING
+
+        assert job_store.complete_job(job.id, "second", {"text": "done"}) is True
+        assert job_store.fail_job(job.id, "second", "after completion") is False
+        assert job_store.get_job(job.id).result == {"text": "done"}
+
+    @pytest.mark.unit
+    def test_requeue_worker_jobs(self, job_store):
+        """Test a stopping worker hands back only its own jobs"""
+        mine = job_store.create_job("transcribe", {}, priority=1)
+        theirs = job_store.create_job("transcribe", {})
+        job_store.claim_next_job(worker_id="me")
+        job_store.claim_next_job(worker_id="other")
+
+        assert job_store.requeue_worker_jobs("me") == 1
+        assert job_store.get_job(mine.id).status == JobStatus.QUEUED
+        assert job_store.get_job(theirs.id).status == JobStatus.RUNNING
+
+    @pytest.mark.unit
+    def test_cancel_only_queued_jobs(self, job_store):
+        """Test running jobs cannot be cancelled"""
+        queued = job_store.create_job("transcribe", {}, priority=0)
+        running = job_store.create_job("transcribe", {}, priority=1)
+        job_store.claim_next_job()
+
+        assert job_store.cancel_job(queued.id) is True
+        assert job_store.cancel_job(running.id) is False
+        assert job_store.get_job(queued.id).status == JobStatus.CANCELLED
+
+
+class TestJobQueue:
+    """Test background workers consuming the job store"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_job_runs_and_reports_progress(self, job_store):
+        """Test a submitted job runs, publishes progress and stores its result"""
+        def handler(payload, report_progress):
+            report_progress(0.5)
+            return {"echo": payload["value"]}
+
+        job_queue = JobQueue(store=job_store, workers=1)
+        job_queue.register("echo", handler)
+        await job_queue.start()
+
+        try:
+            job = await job_queue.submit("echo", {"value": 42})
+            events = job_queue.subscribe(job["job_id"])
+
+            while True:
+                event = await asyncio.wait_for(events.get(), timeout=5)
+                if event["status"] in JobStatus.TERMINAL:
+                    break
+        finally:
+            await job_queue.stop()
+
+        assert event["status"] == JobStatus.COMPLETED
+        assert event["result"] == {"echo": 42}
+        assert event["progress"] == 1.0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_failed_job_is_retried_then_failed(self, job_store):
+        """Test failing jobs are retried up to the attempt limit"""
+        calls = []
+
+        def handler(payload, report_progress):
+            calls.append(payload)
+            raise RuntimeError("model unavailable")
+
+        job_queue = JobQueue(store=job_store, workers=1)
+        job_queue.register("broken", handler)
+        await job_queue.start()
+
+        try:
+            job = await job_queue.submit("broken", {})
+            for _ in range(100):
+                state = await job_queue.get(job["job_id"])
+                if state["status"] == JobStatus.FAILED:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await job_queue.stop()
+
+        assert state["status"] == JobStatus.FAILED
+        assert state["error"] == "model unavailable"
+        assert len(calls) == state["attempts"]
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cleanup_runs_on_final_failure(self, job_store):
+        """Test a job that will not be retried releases what it held"""
+        cleanup = Mock()
+
+        def handler(payload, report_progress):
+            raise RuntimeError("corrupt upload")
+
+        job_queue = JobQueue(store=job_store, workers=1)
+        job_queue.register("broken", handler, cleanup)
+        await job_queue.start()
+
+        try:
+            job = await job_queue.submit("broken", {"file_path": "a.wav"})
+            for _ in range(100):
+                state = await job_queue.get(job["job_id"])
+                if state["status"] == JobStatus.FAILED:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await job_queue.stop()
+
+        assert state["status"] == JobStatus.FAILED
+        cleanup.assert_called_once_with({"file_path": "a.wav"})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cleanup_runs_for_exhausted_stale_job(self, job_store):
+        """Test a job whose lease expired on its last attempt is failed and cleaned up on start"""
+        cleanup = Mock()
+        job = job_store.create_job("echo", {"file_path": "a.wav"})
+        job_store.claim_next_job(worker_id="dead")
+        with job_store._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET attempts = ?, heartbeat_at = ?",
+                (3, (datetime.now() - timedelta(minutes=5)).isoformat())
+            )
+
+        job_queue = JobQueue(store=job_store, workers=1)
+        job_queue.register("echo", Mock(), cleanup)
+        await job_queue.start()
+        await job_queue.stop()
+
+        assert job_store.get_job(job.id).status == JobStatus.FAILED
+        cleanup.assert_called_once_with({"file_path": "a.wav"})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_cleanup_runs_on_cancel(self, job_store):
+        """Test cancelling a queued job releases what it held"""
+        cleanup = Mock()
+        job_queue = JobQueue(store=job_store, workers=1)
+        job_queue.register("echo", Mock(), cleanup)
+
+        job = await job_queue.submit("echo", {"file_path": "a.wav"})
+
+        assert await job_queue.cancel(job["job_id"])
+        cleanup.assert_called_once_with({"file_path": "a.wav"})
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_submit_unknown_job_type(self, job_store):
+        """Test unknown job types are rejected"""
+        job_queue = JobQueue(store=job_store, workers=1)
+
+        with pytest.raises(ValueError):
+            await job_queue.submit("unknown", {})
+
+
+class TestVoiceCloneJob:
+    """Test the background voice clone handler"""
+
+    PAYLOAD = {
+        "clone_id": "reserved_clone_id",
+        "name": "Queued Voice",
+        "sample_path": "/test/voice_samples/sample.wav",
+        "file_hash": "abc123",
+        "user_id": "user_1",
+        "language": "en",
+        "tags": ["calm"]
+    }
+
+    @pytest.mark.unit
+    def test_creates_clone_under_reserved_id(self):
+        """Test the handler creates the clone with the ID handed out at submission"""
+        voice_service = Mock()
+        voice_service.get_created_clone.return_value = None
+        voice_service.create_voice_clone.return_value = {"clone_id": "reserved_clone_id", "status": "created"}
+        report_progress = Mock()
+
+        with patch('app.services.job_queue.get_voice_cloning_service', return_value=voice_service):
+            result = run_voice_clone_job(self.PAYLOAD, report_progress)
+
+        assert result["clone_id"] == "reserved_clone_id"
+        kwargs = voice_service.create_voice_clone.call_args.kwargs
+        assert kwargs["clone_id"] == "reserved_clone_id"
+        assert kwargs["sample_audio_path"] == "/test/voice_samples/sample.wav"
+        assert kwargs["content_hash"] == "abc123"
+        assert kwargs["tags"] == ["calm"]
+        assert kwargs["progress_callback"] is report_progress
+
+    @pytest.mark.unit
+    def test_retry_returns_existing_clone(self):
+        """Test a retried job does not create the clone twice"""
+        voice_service = Mock()
+        voice_service.get_created_clone.return_value = {"clone_id": "reserved_clone_id", "status": "created"}
+
+        with patch('app.services.job_queue.get_voice_cloning_service', return_value=voice_service):
+            result = run_voice_clone_job(self.PAYLOAD, Mock())
+
+        assert result == voice_service.get_created_clone.return_value
+        voice_service.get_created_clone.assert_called_once_with("reserved_clone_id")
+        voice_service.create_voice_clone.assert_not_called()
+
+
+class TestTranscriptionJob:
+    """Test releasing a transcription job's upload"""
+
+    @pytest.mark.unit
+    def test_release_never_unlinks_directly(self, temp_dir):
+        """Test an upload the file handler does not release stays on disk"""
+        upload = temp_dir / "shared_blob.wav"
+        upload.write_bytes(b"audio")
+        file_handler = Mock()
+        file_handler.delete_file.return_value = False
+
+        with patch('app.services.job_queue.get_file_handler', return_value=file_handler):
+            release_transcription_upload({"file_path": str(upload)})
+
+        file_handler.delete_file.assert_called_once_with("shared_blob.wav")
+        assert upload.exists()
@@ -0,0 +1,186 @@
+"""
+Unit tests for the artifact index and retention service
+Tests TTL expiry, quota enforcement with LRU eviction and size accounting
+"""
+
+import os
+import time
+import pytest
+
+from app.database.artifact_index import ArtifactIndex
+from app.database.blob_store import BlobStore
+from app.services.retention import RetentionService
+
+
+@pytest.fixture
+def artifact_index(temp_dir):
+    """Artifact index backed by a temporary SQLite file"""
+    return ArtifactIndex(db_path=f"{temp_dir}/artifacts.db")
+
+
+@pytest.fixture
+def blob_store(temp_dir):
+    """Blob store backed by a temporary SQLite file"""
+    return BlobStore(db_path=f"{temp_dir}/blobs.db")
+
+
+def _store(temp_dir, index, name, size, **kwargs):
+    """Create a file of the given size and register it"""
+    path = temp_dir / name
+    path.write_bytes(b"x" * size)
+    index.register(str(path), size, kind="upload", **kwargs)
+    return path
+
+
+class TestArtifactIndex:
+    """Test the SQLite artifact index"""
+
+    @pytest.mark.unit
+    def test_stats_track_registrations(self, artifact_index, temp_dir):
+        """Test total size and count are maintained incrementally"""
+        first = _store(temp_dir, artifact_index, "a.wav", 100)
+        _store(temp_dir, artifact_index, "b.wav", 50)
+        # Re-registering replaces the previous size
+        artifact_index.register(str(first), 70, kind="upload")
+
+        assert artifact_index.stats() == {"total_size": 120, "total_count": 2}
+
+        artifact_index.remove([str(first)])
+        assert artifact_index.stats() == {"total_size": 50, "total_count": 1}
+
+    @pytest.mark.unit
+    def test_expired_returns_only_past_ttl(self, artifact_index, temp_dir):
+        """Test only files past their TTL are reported, limited per batch"""
+        for i in range(3):
+            _store(temp_dir, artifact_index, f"old{i}.wav", 10, ttl_seconds=1)
+        _store(temp_dir, artifact_index, "fresh.wav", 10, ttl_seconds=3600)
+        _store(temp_dir, artifact_index, "forever.wav", 10)
+
+        expired = artifact_index.expired(limit=2, now=time.time() + 10)
+
+        assert len(expired) == 2
+        assert all("old" in entry["path"] for entry in expired)
+
+
+class TestRetentionService:
+    """Test retention passes"""
+
+    @pytest.mark.unit
+    def test_expired_files_deleted(self, artifact_index, blob_store, temp_dir):
+        """Test expired files are removed from disk and the index"""
+        expired = _store(temp_dir, artifact_index, "expired.wav", 10, ttl_seconds=-1)
+        kept = _store(temp_dir, artifact_index, "kept.wav", 10, ttl_seconds=3600)
+
+        result = RetentionService(index=artifact_index, blobs=blob_store, quota_bytes=10**9).run_once()
+
+        assert result == {"expired": 1, "evicted": 0, "results": 0}
+        assert not expired.exists()
+        assert kept.exists()
+        assert artifact_index.get(str(expired)) is None
+
+    @pytest.mark.unit
+    def test_quota_evicts_least_recently_used(self, artifact_index, blob_store, temp_dir):
+        """Test the quota is enforced by evicting the least recently used files"""
+        oldest = _store(temp_dir, artifact_index, "oldest.wav", 100)
+        used = _store(temp_dir, artifact_index, "used.wav", 100)
+        newest = _store(temp_dir, artifact_index, "newest.wav", 100)
+        time.sleep(0.01)
+        artifact_index.touch(str(oldest))
+
+        result = RetentionService(index=artifact_index, blobs=blob_store, quota_bytes=200).run_once()
+
+        assert result == {"expired": 0, "evicted": 1, "results": 0}
+        assert not used.exists()
+        assert oldest.exists() and newest.exists()
+        assert artifact_index.stats()["total_size"] == 200
+
+    @pytest.mark.unit
+    def test_referenced_blobs_kept(self, artifact_index, blob_store, temp_dir):
+        """Test uploads still referenced are neither expired nor evicted"""
+        in_use = _store(temp_dir, artifact_index, "in_use.wav", 100, ttl_seconds=-1)
+        blob_store.add_reference("a" * 64, str(in_use), 100)
+        blob_store.put_result("a" * 64, "transcription", {"text": "hi"})
+        unused = _store(temp_dir, artifact_index, "unused.wav", 100)
+
+        result = RetentionService(index=artifact_index, blobs=blob_store, quota_bytes=50).run_once()
+
+        assert result == {"expired": 0, "evicted": 1, "results": 0}
+        assert in_use.exists() and not unused.exists()
+        assert blob_store.get("a" * 64)["ref_count"] == 1
+        assert blob_store.get_result("a" * 64, "transcription") == {"text": "hi"}
+        # Pinned, so it no longer takes up a slot in the next expiry batches
+        assert artifact_index.get(str(in_use))["expires_at"] > time.time()
+
+    @pytest.mark.unit
+    def test_pin_expires_after_last_reference(self, artifact_index, blob_store, temp_dir):
+        """Test a pinned upload gets its TTL back once nothing references it"""
+        upload = _store(temp_dir, artifact_index, "upload.wav", 100, ttl_seconds=-1)
+        blob_store.add_reference("a" * 64, str(upload), 100)
+        retention = RetentionService(index=artifact_index, blobs=blob_store, hold_seconds=3600)
+
+        assert retention.run_once()["expired"] == 0
+        assert artifact_index.expired(limit=10, now=time.time() + 7200) == [{"path": str(upload), "size": 100}]
+
+        blob_store.release("a" * 64)
+        with artifact_index._connect() as conn:
+            conn.execute("UPDATE artifacts SET expires_at = ?", (time.time() - 1,))
+
+        assert retention.run_once()["expired"] == 1
+        assert not upload.exists()
+
+    @pytest.mark.unit
+    def test_cached_results_expire_independently(self, artifact_index, blob_store):
+        """Test results outlive their audio but not their TTL or the row cap"""
+        blob_store.put_result("old", "transcription", {"text": "old"})
+        with blob_store._connect() as conn:
+            conn.execute("UPDATE blob_results SET created_at = created_at - 7200")
+        for name in ("a", "b", "c"):
+            blob_store.put_result(name, "transcription", {"text": name})
+            time.sleep(0.01)
+
+        retention = RetentionService(
+            index=artifact_index, blobs=blob_store, result_ttl_seconds=3600, max_results=2
+        )
+
+        assert retention.run_once()["results"] == 2
+        assert blob_store.get_result("old", "transcription") is None
+        assert blob_store.get_result("a", "transcription") is None
+        assert blob_store.get_result("c", "transcription") == {"text": "c"}
+
+    @pytest.mark.unit
+    def test_untracked_files_registered_once(self, artifact_index, blob_store, temp_dir):
+        """Test files stored before the index are registered with a TTL from their mtime"""
+        uploads, outputs = temp_dir / "uploads", temp_dir / "outputs"
+        (uploads / "voice_samples").mkdir(parents=True)
+        outputs.mkdir()
+        old_upload = uploads / "old.wav"
+        old_upload.write_bytes(b"x" * 10)
+        os.utime(old_upload, (time.time() - 7 * 86400,) * 2)
+        (uploads / "voice_samples" / "sample.wav").write_bytes(b"x" * 10)
+        (outputs / "tts.wav").write_bytes(b"x" * 20)
+        tracked = _store(temp_dir, artifact_index, "uploads/tracked.wav", 5, ttl_seconds=3600)
+
+        retention = RetentionService(
+            index=artifact_index, blobs=blob_store, upload_folder=str(uploads), output_folder=str(outputs)
+        )
+
+        assert retention.register_untracked() == 2
+        assert artifact_index.get(str(outputs / "tts.wav"))["kind"] == "output"
+        assert artifact_index.get(str(uploads / "voice_samples" / "sample.wav")) is None
+        assert artifact_index.get(str(tracked))["expires_at"] > time.time()
+
+        (uploads / "new.wav").write_bytes(b"x")
+        assert retention.register_untracked() == 0
+
+        assert retention.run_once()["expired"] == 1
+        assert not old_upload.exists()
+
+    @pytest.mark.unit
+    def test_missing_files_dropped_from_index(self, artifact_index, blob_store, temp_dir):
+        """Test entries for files already deleted elsewhere are cleaned up"""
+        gone = _store(temp_dir, artifact_index, "gone.wav", 10, ttl_seconds=-1)
+        gone.unlink()
+
+        RetentionService(index=artifact_index, blobs=blob_store).run_once()
+
+        assert artifact_index.stats()["total_count"] == 0
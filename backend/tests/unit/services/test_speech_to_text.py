@@ -0,0 +1,276 @@
+"""
+Unit tests for the speech-to-text service
+Tests the content-hash result and encoder output caches without loading models
+"""
+
+import numpy as np
+import pytest
+import torch
+from unittest.mock import Mock, patch
+from transformers.modeling_outputs import BaseModelOutput
+
+from app.core.cache import LRUCache
+from app.database.blob_store import BlobStore
+from app.database.vector_store import VectorStore
+from app.services.speech_to_text import WhisperSTTService, ENCODER_FRAME_SAMPLES
+from app.services.speech_translation import SpeechTranslationPipeline
+
+CONTENT_HASH = "ab" * 32
+
+
+@pytest.fixture
+def stt_service(temp_dir):
+    """STT service with a temporary result store and stubbed decoding"""
+    service = WhisperSTTService()
+    service.results = BlobStore(db_path=f"{temp_dir}/results.db")
+    service.preprocess_audio = Mock(return_value=np.zeros(16000, dtype=np.float32))
+    service.transcribe_array = Mock(return_value={
+        "transcription": "hello world",
+        "language": "en",
+        "task": "transcribe",
+        "model": service.model_name,
+        "audio_duration": 1.0,
+        "confidence": 1.0
+    })
+    return service
+
+
+class TestTranscriptionCache:
+    """Test transcription results cached by audio content hash"""
+
+    @pytest.mark.unit
+    def test_repeated_audio_skips_decoding(self, stt_service):
+        """Test identical content is decoded once"""
+        first = stt_service.transcribe_audio("a.wav", language="en", content_hash=CONTENT_HASH)
+        second = stt_service.transcribe_audio("b.wav", language="en", content_hash=CONTENT_HASH)
+
+        assert second == first
+        assert stt_service.transcribe_array.call_count == 1
+        assert stt_service.preprocess_audio.call_count == 1
+
+    @pytest.mark.unit
+    def test_options_are_part_of_the_key(self, stt_service):
+        """Test a different language or task is not served from the cache"""
+        stt_service.transcribe_audio("a.wav", language="en", content_hash=CONTENT_HASH)
+        stt_service.transcribe_audio("a.wav", language="fr", content_hash=CONTENT_HASH)
+        stt_service.transcribe_audio("a.wav", language="en", task="translate", content_hash=CONTENT_HASH)
+
+        assert stt_service.transcribe_array.call_count == 3
+
+    @pytest.mark.unit
+    def test_results_persist_beyond_memory(self, stt_service):
+        """Test results are found in SQLite after the in-memory cache is cleared"""
+        stt_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+        stt_service._result_cache.clear()
+
+        result = stt_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+
+        assert result["transcription"] == "hello world"
+        assert stt_service.transcribe_array.call_count == 1
+
+    @pytest.mark.unit
+    def test_cached_result_is_a_copy(self, stt_service):
+        """Test callers modifying a result do not corrupt the cache"""
+        first = stt_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+        first["transcription"] = "changed"
+
+        second = stt_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+
+        assert second["transcription"] == "hello world"
+
+    @pytest.mark.unit
+    def test_timestamped_results_cached_separately(self, stt_service):
+        """Test timestamped results are served from the cache without the model"""
+        params = stt_service.result_params(language=None, task="transcribe")
+        stt_service.cache_result(
+            CONTENT_HASH, "timestamped_transcription", params,
+            {"transcription": "hi", "segments": [{"start": 0.0, "end": 1.0, "text": "hi"}]}
+        )
+        stt_service.load_model = Mock(side_effect=AssertionError("model loaded"))
+
+        result = stt_service.transcribe_with_timestamps("a.wav", content_hash=CONTENT_HASH)
+
+        assert result["segments"][0]["text"] == "hi"
+        assert stt_service.get_cached_result(CONTENT_HASH, "transcription", params) is None
+
+
+def _encoder_states(frames: int, value: float, padding: int = 10) -> BaseModelOutput:
+    """Encoder output whose audio frames hold value and whose padding frames hold 100"""
+    states = torch.full((1, frames + padding, 4), 100.0)
+    states[0, :frames] = value
+    return BaseModelOutput(last_hidden_state=states)
+
+
+class TestAudioFeatureIndex:
+    """Test pooled encoder states stored per recording"""
+
+    @pytest.fixture
+    def indexing_service(self, stt_service, temp_dir):
+        stt_service.vector_store = VectorStore(persist_directory=f"{temp_dir}/vectors", backend="numpy")
+        return stt_service
+
+    @pytest.mark.unit
+    def test_pooling_ignores_padding(self):
+        """Test only frames covering audio are averaged"""
+        vector, frames = WhisperSTTService._pool(_encoder_states(5, 1.0), 5 * ENCODER_FRAME_SAMPLES)
+
+        assert frames == 5
+        np.testing.assert_allclose(vector, np.ones(4))
+
+    @pytest.mark.unit
+    def test_windows_weighted_by_length(self, indexing_service):
+        """Test a long recording's windows are combined into one vector by length"""
+        features = [(np.array([1.0, 0.0, 0.0, 0.0]), 3), (np.array([0.0, 1.0, 0.0, 0.0]), 1)]
+
+        indexing_service.index_audio_features(CONTENT_HASH, features, {"language": "en", "audio_duration": 4.0})
+
+        stored = np.array(indexing_service.vector_store.get_audio_features(CONTENT_HASH))
+        np.testing.assert_allclose(stored, np.array([3.0, 1.0, 0.0, 0.0]) / np.sqrt(10.0), atol=1e-6)
+        assert indexing_service.vector_store.audio_index.metadatas[0]["duration_seconds"] == 4.0
+
+    @pytest.mark.unit
+    def test_transcription_indexes_recording(self, indexing_service):
+        """Test transcribing stores the encoder states the decode already computed"""
+        indexing_service.transcribe_array.side_effect = lambda audio, language, task, features, content_hash: (
+            features.append((np.ones(4), 50)) or {"transcription": "hi", "language": "en", "audio_duration": 1.0}
+        )
+
+        indexing_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+
+        assert indexing_service.vector_store.get_audio_features(CONTENT_HASH) is not None
+
+    @pytest.mark.unit
+    def test_similar_recordings_use_stored_vector(self, indexing_service):
+        """Test an indexed recording is searched without running the encoder"""
+        other_hash = "cd" * 32
+        indexing_service.index_audio_features(CONTENT_HASH, [(np.array([1.0, 0.0, 0.0, 0.0]), 1)], {})
+        indexing_service.index_audio_features(other_hash, [(np.array([0.9, 0.1, 0.0, 0.0]), 1)], {})
+        indexing_service._encode = Mock(side_effect=AssertionError("encoder run"))
+
+        result = indexing_service.find_similar_recordings("a.wav", content_hash=CONTENT_HASH)
+
+        assert result["ids"] == [other_hash]
+
+    @pytest.mark.unit
+    def test_similar_recordings_encode_new_audio(self, indexing_service):
+        """Test audio that is not indexed runs the encoder only"""
+        indexing_service.index_audio_features(CONTENT_HASH, [(np.ones(4), 1)], {})
+        indexing_service.processor, indexing_service.model = Mock(), Mock()
+        indexing_service._encode = Mock(return_value=_encoder_states(50, 1.0))
+
+        result = indexing_service.find_similar_recordings("new.wav", content_hash="ef" * 32)
+
+        assert result["ids"] == [CONTENT_HASH]
+        indexing_service.model.generate.assert_not_called()
+
+
+class TestEncoderCache:
+    """Test Whisper encoder outputs reused across decodes of the same audio"""
+
+    @pytest.fixture
+    def model_service(self, temp_dir):
+        """STT service with a stubbed processor and model that count encoder passes"""
+        service = WhisperSTTService()
+        service.results = BlobStore(db_path=f"{temp_dir}/results.db")
+        service.preprocess_audio = Mock(return_value=np.zeros(16000, dtype=np.float32))
+
+        service.processor = Mock(return_value=Mock(input_features=torch.zeros(1, 80, 3000)))
+        service.processor.batch_decode.return_value = ["hola"]
+        service.processor.decode.return_value = "hola"
+        service.processor.get_decoder_prompt_ids.return_value = None
+
+        encoder = Mock(side_effect=lambda features: BaseModelOutput(last_hidden_state=torch.zeros(1, 1500, 8)))
+        service.model = Mock()
+        service.model.get_encoder.return_value = encoder
+        service.model.generate.return_value = torch.zeros(1, 4, dtype=torch.long)
+        service.model.detect_language.return_value = torch.tensor([7])
+        service.model.generation_config.lang_to_id = {"<|en|>": 6, "<|es|>": 7}
+        service.encoder = encoder
+        return service
+
+    @pytest.mark.unit
+    def test_other_options_only_run_the_decoder(self, model_service):
+        """Test a second language, translation and timestamps reuse one encoder pass"""
+        model_service.transcribe_audio("a.wav", language="es", content_hash=CONTENT_HASH)
+        model_service.transcribe_audio("a.wav", language="es", task="translate", content_hash=CONTENT_HASH)
+        model_service.transcribe_with_timestamps("a.wav", language="es", content_hash=CONTENT_HASH)
+
+        assert model_service.encoder.call_count == 1
+        assert model_service.model.generate.call_count == 3
+        assert "encoder_outputs" in model_service.model.generate.call_args.kwargs
+
+    @pytest.mark.unit
+    def test_language_detection_reuses_encoder(self, model_service):
+        """Test language detection after a transcription runs no encoder pass"""
+        model_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+
+        assert model_service.detect_language("a.wav", content_hash=CONTENT_HASH) == "es"
+        assert model_service.encoder.call_count == 1
+
+    @pytest.mark.unit
+    def test_transcription_detects_language(self, model_service):
+        """Test audio without a language is decoded in the detected one"""
+        result = model_service.transcribe_array(np.zeros(16000, dtype=np.float32))
+
+        assert result["language"] == "es"
+        model_service.processor.get_decoder_prompt_ids.assert_called_once_with(language="es", task="transcribe")
+        assert model_service.encoder.call_count == 1
+
+    @pytest.mark.unit
+    def test_pipeline_translates_from_detected_language(self, model_service):
+        """Test the speech translation pipeline translates from the detected language"""
+        translation_service = Mock()
+        translation_service.translate_texts.return_value = [
+            {"translated_text": "hello", "target_language": "en"}
+        ]
+        tts_service = Mock()
+        tts_service.synthesize_array.return_value = np.zeros(10, dtype=np.float32)
+        tts_service.save_audio.return_value = {"audio_path": "out.wav", "filename": "out.wav", "duration_seconds": 0.1}
+
+        with patch("app.services.speech_translation.get_stt_service", return_value=model_service), \
+             patch("app.services.speech_translation.get_translation_service", return_value=translation_service), \
+             patch("app.services.speech_translation.get_tts_service", return_value=tts_service), \
+             patch("app.services.speech_translation.get_database"):
+            events = list(SpeechTranslationPipeline().iter_events(
+                np.zeros(16000, dtype=np.float32), target_language="en"
+            ))
+
+        assert events[0]["language"] == "es"
+        assert translation_service.translate_texts.call_args.args[1] == "es"
+
+    @pytest.mark.unit
+    def test_different_audio_is_encoded(self, model_service):
+        """Test audio without a content hash or with another hash is not served from the cache"""
+        model_service.transcribe_audio("a.wav", content_hash=CONTENT_HASH)
+        model_service.transcribe_audio("b.wav", content_hash="cd" * 32)
+        model_service.transcribe_array(np.zeros(16000, dtype=np.float32))
+
+        assert model_service.encoder.call_count == 3
+
+    @pytest.mark.unit
+    def test_long_audio_windows_cached_separately(self, model_service):
+        """Test each window of a long recording keeps its own encoder output"""
+        audio = np.zeros(70 * 16000, dtype=np.float32)
+
+        model_service.transcribe_long(audio, language="es", content_hash=CONTENT_HASH)
+        model_service.transcribe_long(audio, language="es", task="translate", content_hash=CONTENT_HASH)
+
+        assert model_service.encoder.call_count == 3
+
+    @pytest.mark.unit
+    def test_cache_bounded_by_bytes(self, model_service):
+        """Test least recently used outputs are evicted once the byte budget is exceeded"""
+        entry_bytes = 1500 * 8 * 4
+        model_service._encoder_cache = LRUCache(
+            maxsize=100,
+            maxbytes=2 * entry_bytes,
+            sizeof=lambda states: states.numel() * states.element_size()
+        )
+
+        audio = np.zeros(16000, dtype=np.float32)
+        for content_hash in ["aa" * 32, "bb" * 32, "cc" * 32]:
+            model_service._encode(audio, content_hash)
+
+        assert model_service._encoder_cache.bytes == 2 * entry_bytes
+        model_service._encode(audio, "aa" * 32)
+        assert model_service.encoder.call_count == 4
@@ -0,0 +1,165 @@
+"""
+Unit tests for the translation service
+Tests language registry lookups and validation without loading models
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from app.services.translation import (
+    LanguageRegistry, TranslationService, UnsupportedLanguageError
+)
+
+
+class TestLanguageRegistry:
+    """Test precomputed language lookup tables"""
+
+    @pytest.fixture
+    def registry(self):
+        return LanguageRegistry()
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("alias", ["en", "EN", "eng", "english", "eng_Latn", "en-US"])
+    def test_normalize_aliases(self, registry, alias):
+        """Test names, ISO 639-1/3, FLORES and regional codes resolve to ISO 639-1"""
+        assert registry.normalize(alias) == "en"
+
+    @pytest.mark.unit
+    def test_normalize_unknown_language(self, registry):
+        """Test unknown languages are rejected"""
+        with pytest.raises(UnsupportedLanguageError):
+            registry.normalize("klingon")
+
+    @pytest.mark.unit
+    def test_validate_pair_unsupported_by_model(self, registry):
+        """Test languages known globally but not supported by the model are rejected"""
+        # Thai is only assumed for aya until a tokenizer says otherwise
+        assert registry.validate_pair("aya", "english", "thai") == ("en", "th")
+        with pytest.raises(UnsupportedLanguageError):
+            registry.validate_pair("m2m", "english", "thai")
+
+    @pytest.mark.unit
+    def test_validate_pair_unknown_model(self, registry):
+        """Test unknown model types are rejected"""
+        with pytest.raises(ValueError):
+            registry.validate_pair("unknown", "en", "es")
+
+    @pytest.mark.unit
+    def test_register_nllb_tokenizer(self, registry):
+        """Test NLLB tables are built from the tokenizer vocabulary"""
+        tokenizer = Mock()
+        tokenizer.unk_token_id = 3
+        tokenizer.lang_code_to_id = {"eng_Latn": 256047, "spa_Latn": 256161}
+        tokenizer.convert_tokens_to_ids = Mock(return_value=3)
+
+        registry.register_tokenizer("nllb", tokenizer)
+
+        assert registry.supported_languages()["nllb"] == ["en", "es"]
+        assert registry.model_code("nllb", "es") == "spa_Latn"
+        assert registry.forced_bos_token_id("nllb", "es") == 256161
+        with pytest.raises(UnsupportedLanguageError):
+            registry.validate_pair("nllb", "en", "fr")
+
+
+class TestTranslationService:
+    """Test translation service request validation"""
+
+    @pytest.mark.unit
+    def test_unsupported_pair_rejected_before_model_load(self):
+        """Test unsupported pairs never trigger model loading"""
+        service = TranslationService()
+        service.load_model = Mock()
+
+        with pytest.raises(UnsupportedLanguageError):
+            service.translate_text("Hello", "en", "klingon")
+
+        service.load_model.assert_not_called()
+
+    @pytest.mark.unit
+    def test_supported_languages_served_from_registry(self):
+        """Test supported languages come from the registry"""
+        service = TranslationService()
+        supported = service.get_supported_languages()
+
+        assert set(supported) == {"nllb", "m2m", "aya"}
+        assert "en" in supported["nllb"]
+
+
+class TestTokenizationCache:
+    """Test cached tokenization, cost estimation and cost-ordered batching"""
+
+    @pytest.fixture
+    def service(self):
+        """Translation service with a fake NLLB tokenizer and model"""
+        service = TranslationService()
+        service.current_model_name = service.models["nllb"]
+
+        tokenizer = Mock()
+        tokenizer.pad_token_id = 1
+        tokenizer.side_effect = lambda text, **kwargs: {
+            "input_ids": [0] + [len(word) for word in text.split()] + [2]
+        }
+        tokenizer.batch_decode = Mock(
+            side_effect=lambda ids, **kwargs: [" ".join(map(str, row.tolist())) for row in ids]
+        )
+        service.tokenizer = tokenizer
+
+        model = Mock()
+        model.generate = Mock(side_effect=lambda input_ids, attention_mask, **kwargs: input_ids)
+        service.model = model
+        return service
+
+    @pytest.mark.unit
+    def test_repeated_text_is_tokenized_once(self, service):
+        """Test the tokenizer only runs on cache misses"""
+        service._encode("nllb", "hello world", "en")
+        service._encode("nllb", "hello world", "en")
+
+        assert service.tokenizer.call_count == 1
+        assert service.estimate_tokens("hello world", "en") == 4
+
+    @pytest.mark.unit
+    def test_cache_keyed_by_requested_language(self, service):
+        """Test encodings are cached per requested language, not tokenizer state"""
+        def tokenize(text, **kwargs):
+            # Another thread switching languages must not affect this encoding
+            language = service.tokenizer.src_lang
+            service.tokenizer.src_lang = "deu_Latn"
+            return {"input_ids": [0, 10 if language == "eng_Latn" else 20, 2]}
+        service.tokenizer.side_effect = tokenize
+
+        english = service._encode("nllb", "hello", "en")
+        french = service._encode("nllb", "hello", "fr")
+
+        assert service.tokenizer.call_count == 2
+        assert english != french
+        assert service._encode("nllb", "hello", "en") == english
+        assert service.estimate_tokens("hello", "en") == len(english)
+
+    @pytest.mark.unit
+    def test_estimate_tokens_scales_with_length(self, service):
+        """Test the heuristic estimate grows with input length and CJK characters"""
+        short = service.estimate_tokens("Hello there")
+        long = service.estimate_tokens("Hello there " * 50)
+
+        assert short < long
+        assert service.estimate_tokens("这是一个测试") >= 6
+
+    @pytest.mark.unit
+    def test_split_text_respects_budget(self, service):
+        """Test long inputs are split into chunks within the token budget"""
+        text = " ".join(f"Sentence number {i} is here." for i in range(100))
+        chunks = service.split_text(text, 50)
+
+        assert len(chunks) > 1
+        assert all(service.estimate_tokens(chunk) <= 50 for chunk in chunks)
+        assert " ".join(chunks) == text
+
+    @pytest.mark.unit
+    def test_translate_texts_preserves_order(self, service):
+        """Test cost-sorted batching returns results in input order"""
+        texts = ["a much longer input text here", "short", "mid length"]
+        results = service.translate_texts(texts, "en", "es")
+
+        assert [r["original_text"] for r in results] == texts
+        assert results[1]["translated_text"].split()[1] == "5"
@@ -0,0 +1,302 @@
+"""
+Unit tests for the voice cloning service and speaker encoder
+Tests sample decoding, bounded cropping, batching, embedding reuse,
+filtered similarity search, speaker tensor caching and the clone catalogue
+without loading models
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pytest
+import soundfile as sf
+from unittest.mock import Mock
+
+from app.database.blob_store import BlobStore
+from app.database.models import DatabaseManager, VoiceClone
+from app.database.vector_store import VectorStore, voice_metadata
+from app.services.audio_io import get_resampler
+from app.services.speaker_encoder import SpeakerEncoder
+from app.services.voice_cloning import VoiceCloningService
+
+
+def _fake_segment_embeddings(segments):
+    """Deterministic stand-in for the x-vector model: one row per crop"""
+    return np.array(
+        [[np.abs(s).mean(), np.abs(s).std(), 1.0, 0.0] for s in segments],
+        dtype=np.float32
+    )
+
+
+@pytest.fixture
+def speaker_encoder():
+    """Speaker encoder with 1 s crops and a stubbed model"""
+    encoder = SpeakerEncoder(segment_seconds=1.0, max_segments=4, batch_size=3)
+    encoder.model = Mock()
+    encoder._embed_segments = Mock(side_effect=_fake_segment_embeddings)
+    return encoder
+
+
+@pytest.fixture
+def voice_service(temp_dir, speaker_encoder):
+    """Voice cloning service with temporary stores and no encryption"""
+    service = VoiceCloningService()
+    service.blobs = BlobStore(db_path=f"{temp_dir}/results.db")
+    service.db = DatabaseManager(db_path=f"{temp_dir}/app.db")
+    service.encoder = speaker_encoder
+    service.encryption = None
+    service.file_handler = Mock()
+    return service
+
+
+def _write_sample(path, sample_rate: int, seconds: float = 1.0, amplitude: float = 0.5):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    tone = (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    sf.write(str(path), np.stack([tone, tone], axis=1), sample_rate)
+    return str(path)
+
+
+class TestSpeakerEncoder:
+    """Test cropping and batched embedding"""
+
+    @pytest.mark.unit
+    def test_long_samples_cropped_to_bounded_cost(self, speaker_encoder):
+        """Test at most max_segments fixed-length crops are taken"""
+        crops = speaker_encoder.crop(np.zeros(16000 * 60, dtype=np.float32))
+
+        assert len(crops) == 4
+        assert all(len(crop) == 16000 for crop in crops)
+
+    @pytest.mark.unit
+    def test_short_samples_kept_whole(self, speaker_encoder):
+        """Test samples shorter than a crop are embedded as they are"""
+        crops = speaker_encoder.crop(np.zeros(8000, dtype=np.float32))
+
+        assert len(crops) == 1 and len(crops[0]) == 8000
+
+    @pytest.mark.unit
+    def test_batch_matches_individual_embeddings(self, speaker_encoder):
+        """Test batching crops across samples gives the same per-sample embeddings"""
+        rng = np.random.default_rng(0)
+        audios = [rng.standard_normal(n).astype(np.float32) * scale
+                  for n, scale in [(16000 * 5, 0.1), (12000, 1.0), (16000 * 2, 0.5)]]
+
+        batched = speaker_encoder.embed_batch(audios)
+        individual = np.stack([speaker_encoder.embed(audio) for audio in audios])
+
+        np.testing.assert_allclose(batched, individual, rtol=1e-5)
+        np.testing.assert_allclose(np.linalg.norm(batched, axis=1), 1.0, rtol=1e-5)
+        # 4 + 1 + 2 crops in batches of 3
+        assert all(len(call.args[0]) <= 3 for call in speaker_encoder._embed_segments.call_args_list)
+
+    @pytest.mark.unit
+    def test_empty_sample_rejected(self, speaker_encoder):
+        """Test empty audio is rejected before reaching the model"""
+        with pytest.raises(ValueError):
+            speaker_encoder.embed_batch([np.zeros(0, dtype=np.float32)])
+
+
+class TestVoiceEmbeddingExtraction:
+    """Test embedding extraction from voice samples"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("sample_rate", [16000, 44100, 48000])
+    def test_samples_decoded_at_encoder_rate(self, voice_service, temp_dir, sample_rate):
+        """Test samples at common rates reuse the shared resampler for that rate"""
+        first = _write_sample(temp_dir / "a.wav", sample_rate)
+        second = _write_sample(temp_dir / "b.wav", sample_rate)
+        resampler = get_resampler(sample_rate, SpeakerEncoder.sample_rate)
+
+        voice_service.extract_voice_embedding(first)
+        embedding = voice_service.extract_voice_embedding(second)
+
+        assert embedding.shape == (4,)
+        assert get_resampler(sample_rate, SpeakerEncoder.sample_rate) is resampler
+
+    @pytest.mark.unit
+    def test_many_samples_embedded_together(self, voice_service, temp_dir):
+        """Test several samples share encoder passes and keep input order"""
+        paths = [_write_sample(temp_dir / f"{i}.wav", 16000, amplitude=0.2 * (i + 1)) for i in range(3)]
+
+        embeddings = voice_service.extract_voice_embeddings(paths)
+
+        assert len(embeddings) == 3
+        assert voice_service.encoder._embed_segments.call_count == 1
+        assert embeddings[0][0] < embeddings[2][0]
+
+    @pytest.mark.unit
+    def test_embedding_reused_by_content_hash(self, voice_service, temp_dir):
+        """Test a sample with a known content hash is not decoded again"""
+        path = _write_sample(temp_dir / "a.wav", 22050)
+        content_hash = "cd" * 32
+
+        first = voice_service.extract_voice_embedding(path, content_hash)
+        (temp_dir / "a.wav").unlink()
+        second = voice_service.extract_voice_embedding(path, content_hash)
+
+        np.testing.assert_array_equal(first, second)
+
+
+class TestSimilarVoices:
+    """Test similarity search scoped by user, language and tags"""
+
+    @pytest.fixture
+    def populated_service(self, voice_service, temp_dir):
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        voices = [
+            ("query", "alice", "en", ["calm"], [1.0, 0.0]),
+            ("alice_en", "alice", "en", ["calm"], [0.9, 0.1]),
+            ("alice_fr", "alice", "fr", ["calm"], [0.95, 0.05]),
+            ("alice_loud", "alice", "en", ["loud"], [0.8, 0.2]),
+            ("bob_en", "bob", "en", ["calm"], [1.0, 0.01]),
+        ]
+        for clone_id, user_id, language, tags, vector in voices:
+            voice_service.vector_store.store_voice_embedding(
+                clone_id, vector, voice_metadata(user_id=user_id, language=language, tags=tags)
+            )
+        return voice_service
+
+    @pytest.mark.unit
+    def test_results_are_lists_without_query_voice(self, populated_service):
+        """Test the response keeps its list structure and n_results entries"""
+        result = populated_service.find_similar_voices("query", n_results=2)
+
+        assert result["ids"] == ["bob_en", "alice_fr"]
+        assert len(result["distances"]) == len(result["metadatas"]) == 2
+
+    @pytest.mark.unit
+    def test_filters_scope_results(self, populated_service):
+        """Test other users' voices and non-matching voices are excluded"""
+        assert populated_service.find_similar_voices("query", user_id="alice")["ids"] == [
+            "alice_fr", "alice_en", "alice_loud"
+        ]
+        assert populated_service.find_similar_voices(
+            "query", user_id="alice", language="en", tags=["calm"]
+        )["ids"] == ["alice_en"]
+
+    @pytest.mark.unit
+    def test_unknown_query_voice_raises(self, populated_service):
+        """Test a missing query voice is reported instead of matching nothing"""
+        with pytest.raises(ValueError):
+            populated_service.find_similar_voices("missing")
+
+
+class TestBulkVoiceClones:
+    """Test bulk clone creation with batched embedding and storage"""
+
+    @pytest.mark.unit
+    def test_samples_embedded_in_batches_and_stored_once(self, voice_service, temp_dir, monkeypatch):
+        """Test embeddings are computed per batch and written with one add"""
+        monkeypatch.chdir(temp_dir)
+        monkeypatch.setattr("app.services.voice_cloning.settings.VOICE_INGEST_BATCH_SIZE", 2)
+        voice_service.vector_store = Mock(embedding_ref=VectorStore.embedding_ref)
+        voice_service.extract_voice_embeddings = Mock(
+            side_effect=lambda paths, hashes: [np.ones(4, dtype=np.float32)] * len(paths)
+        )
+        samples = [{"name": f"voice_{i}", "sample_path": f"{i}.wav"} for i in range(5)]
+
+        result = voice_service.create_voice_clones(samples, user_id="alice", tags=["catalogue"])
+
+        assert len(result["created"]) == 5 and result["failed"] == []
+        assert [len(c.args[0]) for c in voice_service.extract_voice_embeddings.call_args_list] == [2, 2, 1]
+        stored = voice_service.vector_store.store_voice_embeddings.call_args.kwargs
+        assert voice_service.vector_store.store_voice_embeddings.call_count == 1
+        assert stored["voice_ids"] == [clone["clone_id"] for clone in result["created"]]
+        assert all(m["user_id"] == "alice" and m["tag:catalogue"] for m in stored["metadatas"])
+        assert len(voice_service.list_voice_clones(user_id="alice", limit=10)["voice_clones"]) == 5
+
+    @pytest.mark.unit
+    def test_bad_sample_does_not_fail_batch(self, voice_service, temp_dir, monkeypatch):
+        """Test an undecodable sample is reported while the others are created"""
+        monkeypatch.chdir(temp_dir)
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        good = [_write_sample(temp_dir / f"{i}.wav", 16000, amplitude=0.1 * (i + 1)) for i in range(3)]
+        (temp_dir / "broken.wav").write_bytes(b"RIFF....WAVEnot audio")
+        samples = [{"name": Path(p).stem, "sample_path": p} for p in good[:2] + [str(temp_dir / "broken.wav")] + good[2:]]
+
+        result = voice_service.create_voice_clones(samples)
+
+        assert [clone["name"] for clone in result["created"]] == ["0", "1", "2"]
+        assert [failure["name"] for failure in result["failed"]] == ["broken"]
+        assert len(voice_service.vector_store.voice_index) == 3
+
+
+class TestSpeakerConditioningCache:
+    """Test cached speaker tensors for cloned-voice synthesis"""
+
+    @pytest.fixture
+    def cached_service(self, voice_service, temp_dir):
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        voice_service.vector_store.store_voice_embedding("clone_1", [3.0, 4.0])
+        voice_service.db.create_voice_clone(VoiceClone(
+            id="clone_1", name="a", sample_audio_path="a.wav",
+            voice_embedding_path="voice_embeddings/clone_1", created_at=datetime.now()
+        ))
+        voice_service.vector_store.get_voice_embedding = Mock(wraps=voice_service.vector_store.get_voice_embedding)
+        return voice_service
+
+    @pytest.mark.unit
+    def test_repeated_lookups_skip_vector_store(self, cached_service):
+        """Test a popular voice is read from the store once"""
+        first = cached_service.get_speaker_conditioning("clone_1")
+        second = cached_service.get_speaker_conditioning("clone_1")
+
+        assert second is first
+        assert first.shape == (1, 2) and str(first.device).startswith(cached_service.device)
+        assert cached_service.vector_store.get_voice_embedding.call_count == 1
+
+    @pytest.mark.unit
+    def test_delete_invalidates_cached_tensor(self, cached_service):
+        """Test a deleted clone can no longer be used for synthesis"""
+        cached_service.get_speaker_conditioning("clone_1")
+
+        assert cached_service.delete_voice_clone("clone_1")
+        with pytest.raises(ValueError):
+            cached_service.get_speaker_conditioning("clone_1")
+
+
+class TestVoiceCloneCatalogue:
+    """Test clones recorded in the database and listed from it"""
+
+    @pytest.mark.unit
+    def test_created_clone_listed_and_deleted(self, voice_service, temp_dir):
+        """Test a new clone is listed for its owner only and removed on delete"""
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        path = _write_sample(temp_dir / "a.wav", 16000)
+
+        clone = voice_service.create_voice_clone("Alice", path, user_id="alice")
+
+        listed = voice_service.list_voice_clones(user_id="alice")
+        assert [c["clone_id"] for c in listed["voice_clones"]] == [clone["clone_id"]]
+        assert listed["next_cursor"] is None
+        assert voice_service.list_voice_clones(user_id="bob")["voice_clones"] == []
+        assert voice_service.get_voice_clone(clone["clone_id"])["user_id"] == "alice"
+
+        assert voice_service.delete_voice_clone(clone["clone_id"])
+        assert voice_service.get_voice_clone(clone["clone_id"]) is None
+        voice_service.file_handler.delete_file.assert_called_once_with("a.wav")
+
+        assert not voice_service.delete_voice_clone(clone["clone_id"])
+        assert voice_service.file_handler.delete_file.call_count == 1
+
+    @pytest.mark.unit
+    def test_delete_unknown_clone_keeps_embedding(self, voice_service, temp_dir):
+        """Test an id with no catalogue row leaves the vector store untouched"""
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        voice_service.vector_store.store_voice_embedding("orphan", [3.0, 4.0])
+
+        assert not voice_service.delete_voice_clone("orphan")
+        assert voice_service.vector_store.get_voice_embedding("orphan") is not None
+        voice_service.file_handler.delete_file.assert_not_called()
+
+    @pytest.mark.unit
+    def test_created_clone_result_reproducible(self, voice_service, temp_dir):
+        """Test an existing clone is described exactly as its creation was"""
+        voice_service.vector_store = VectorStore(persist_directory=str(temp_dir / "vectors"), backend="numpy")
+        path = _write_sample(temp_dir / "a.wav", 16000)
+
+        clone = voice_service.create_voice_clone("Alice", path, user_id="alice", clone_id="reserved")
+
+        assert voice_service.get_created_clone("reserved") == clone
+        assert voice_service.get_created_clone("missing") is None